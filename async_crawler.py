@@ -0,0 +1,234 @@
+"""Concurrent crawling of several LG exhibition pages (async Playwright API)."""
+import asyncio
+import logging
+import time
+from typing import List, Dict, Optional, Tuple
+from playwright.async_api import async_playwright, Browser, Page, TimeoutError as PlaywrightTimeoutError
+from card_parser import unique_products
+from card_selectors import PRODUCT_SELECTORS, TABPANEL_ITEM_SELECTOR, card_selector
+from config import (
+    LG_TIMEDEAL_URLS, CRAWL_CONCURRENCY, CRAWL_URL_TIMEOUT, SAVE_SNAPSHOTS,
+    READY_TIMEOUT_MS, CARD_STABLE_MS, TAB_TIMEOUT_MS,
+    LOAD_MORE, LOAD_MORE_TEXT, LOAD_MORE_WAIT_MS, LOAD_MORE_GRACE_MS, MAX_CARDS, EXTRACT_BUDGET_MS
+)
+from crawler import (
+    LGTimedealCrawler, ANY_CARD_SELECTOR, CARDS_STABLE_JS, READ_NEW_CARDS_JS, LOAD_MORE_JS,
+    TAB_CRAWL_JS, merge_tab_cards, snapshot_tag
+)
+from metrics import current_run
+from network_capture import ResponseCapture, products_from_payloads, save_payloads
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class AsyncLGTimedealCrawler:
+    """Crawl several exhibition pages at once, one browser context per page.
+
+    Each URL is crawled by its own LGTimedealCrawler (settings, parsing,
+    snapshots), under a concurrency limit and a per-URL time budget. A
+    failing or slow page only loses its own products.
+    """
+
+    def __init__(self, urls: Optional[List[str]] = None, concurrency: int = CRAWL_CONCURRENCY,
+                 url_timeout: float = CRAWL_URL_TIMEOUT):
+        self.urls = urls or LG_TIMEDEAL_URLS
+        self.concurrency = concurrency
+        self.url_timeout = url_timeout
+        # Per-URL outcome of the last crawl: {"products": n} or {"error": "..."}
+        self.results: Dict[str, Dict] = {}
+
+    async def crawl(self) -> List[Dict]:
+        """Crawl all URLs and return their products tagged with source_url."""
+        logger.info(f"Starting crawl of {len(self.urls)} pages (concurrency {self.concurrency})")
+        semaphore = asyncio.Semaphore(self.concurrency)
+        self.results = {}
+
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=True)
+            try:
+                per_url = await asyncio.gather(
+                    *(self._crawl_url_limited(browser, url, semaphore) for url in self.urls)
+                )
+            finally:
+                await browser.close()
+
+        products = [product for url_products in per_url for product in url_products]
+        failed = [url for url, result in self.results.items() if "error" in result]
+        logger.info(f"Crawled {len(products)} products from {len(self.urls) - len(failed)}/"
+                    f"{len(self.urls)} pages")
+        return products
+
+    @property
+    def incomplete_urls(self) -> List[str]:
+        """URLs whose last crawl failed, timed out or stopped at a budget (products are missing)."""
+        return [url for url, result in self.results.items() if "error" in result or result.get("partial")]
+
+    async def _crawl_url_limited(self, browser: Browser, url: str,
+                                 semaphore: asyncio.Semaphore) -> List[Dict]:
+        async with semaphore:
+            try:
+                products = await asyncio.wait_for(self.crawl_url(browser, url), self.url_timeout)
+            except asyncio.TimeoutError:
+                logger.error(f"Crawl of {url} exceeded {self.url_timeout:.0f}s")
+                self.results[url] = {"error": "timeout"}
+                return []
+            except Exception as e:
+                logger.error(f"Error during crawl of {url}: {e}")
+                self.results[url] = {"error": str(e)}
+                return []
+
+        for product in products:
+            product["source_url"] = url
+        # crawl_url may have marked the page partial
+        self.results[url] = {**self.results.get(url, {}), "products": len(products)}
+        return products
+
+    async def crawl_url(self, browser: Browser, url: str) -> List[Dict]:
+        """Crawl one page in its own browser context."""
+        crawler = LGTimedealCrawler(url=url)
+
+        context = await browser.new_context()
+        try:
+            page = await context.new_page()
+            capture = ResponseCapture() if crawler.network_capture else None
+            if capture is not None:
+                capture.attach(page)
+
+            await self._load_page(crawler, page)
+            crawler.deadline = time.monotonic() + EXTRACT_BUDGET_MS / 1000
+
+            # Every card is loaded before the API responses or the cards are read,
+            # like LGTimedealCrawler does for paginated APIs
+            with crawler.timer.phase("select"):
+                selector = await self._find_card_selector(crawler, page)
+            if LOAD_MORE and selector is not None:
+                await self._load_all(crawler, page, selector)
+            if crawler.partial:
+                self.results[url] = {"partial": True}
+
+            payloads = await capture.async_payloads() if capture is not None else []
+
+            if SAVE_SNAPSHOTS:
+                with crawler.timer.phase("snapshot"):
+                    try:
+                        crawler.save_snapshot(await page.content())
+                        if payloads:
+                            save_payloads(payloads, snapshot_tag(url))
+                    except Exception as e:
+                        logger.warning(f"Failed to save snapshot of {url}: {e}")
+
+            with crawler.timer.phase("extract"):
+                products = products_from_payloads(payloads)
+                if products:
+                    logger.info(f"Extracted {len(products)} products from captured API responses of {url}")
+                else:
+                    products = crawler.parse_cards(await self._extract_cards(page, selector))
+                unique = list(unique_products(products))
+                crawler.timer.count("duplicates_dropped", len(products) - len(unique))
+                products = unique
+        finally:
+            await context.close()
+            logger.info(f"Crawl timings for {url}: {crawler.timer.summary()}")
+            current_run().merge(crawler.timer)
+
+        return products
+
+    async def _load_page(self, crawler: LGTimedealCrawler, page: Page):
+        """Async counterpart of LGTimedealCrawler.load_page."""
+        if crawler.page_load_profile != "fast":
+            with crawler.timer.phase("goto"):
+                await page.goto(crawler.url, wait_until="networkidle", timeout=60000)
+            with crawler.timer.phase("ready"):
+                await page.wait_for_timeout(3000)
+            return
+
+        async def route_request(route):
+            if crawler.is_blocked(route.request):
+                await route.abort()
+            else:
+                await route.continue_()
+
+        await page.route("**/*", route_request)
+
+        with crawler.timer.phase("goto"):
+            await page.goto(crawler.url, wait_until="domcontentloaded", timeout=60000)
+
+        with crawler.timer.phase("ready"):
+            try:
+                await page.wait_for_selector(ANY_CARD_SELECTOR, timeout=READY_TIMEOUT_MS)
+                await page.wait_for_function(
+                    CARDS_STABLE_JS,
+                    arg=[ANY_CARD_SELECTOR, CARD_STABLE_MS],
+                    polling=100,
+                    timeout=READY_TIMEOUT_MS,
+                )
+            except PlaywrightTimeoutError:
+                logger.warning(f"Timed out waiting for product cards on {crawler.url}")
+
+    async def _find_card_selector(self, crawler: LGTimedealCrawler, page: Page) -> Optional[str]:
+        """Async counterpart of LGTimedealCrawler.find_card_selector."""
+        for selector in PRODUCT_SELECTORS:
+            cards = card_selector(selector)
+            matches, count = await page.evaluate(
+                "(selectors) => selectors.map((s) => document.querySelectorAll(s).length)", [selector, cards]
+            )
+            if count:
+                if matches > count:
+                    crawler.timer.count("nested_cards_skipped", matches - count)
+                logger.info(f"Found {count} products using selector: {selector} on {crawler.url}")
+                return cards
+        return None
+
+    async def _load_all(self, crawler: LGTimedealCrawler, page: Page, selector: str) -> int:
+        """Async counterpart of LGTimedealCrawler.load_all."""
+        count = await page.evaluate("(selector) => document.querySelectorAll(selector).length", selector)
+        while not crawler._over_budget(count):
+            with crawler.timer.phase("load_more"):
+                added = await page.evaluate(LOAD_MORE_JS, {
+                    "selector": selector, "buttonText": LOAD_MORE_TEXT,
+                    "waitMs": LOAD_MORE_WAIT_MS, "quietMs": CARD_STABLE_MS, "graceMs": LOAD_MORE_GRACE_MS,
+                })
+            if added <= 0:
+                break
+            crawler.timer.count("load_more_steps")
+            count += added
+        return count
+
+    async def _extract_cards(self, page: Page, selector: Optional[str]) -> List[Dict]:
+        """Read the cards matching selector in one evaluate (at most MAX_CARDS), else the tabs."""
+        if selector is not None:
+            return await page.evaluate(READ_NEW_CARDS_JS, [selector, MAX_CARDS])
+
+        # Tab-aware fallback, see LGTimedealCrawler.crawl_tabs
+        options = {"clickTabs": True, "quietMs": CARD_STABLE_MS, "timeoutMs": TAB_TIMEOUT_MS}
+        result = await page.evaluate(TAB_CRAWL_JS, options)
+        tab_cards = await asyncio.gather(
+            *(self._read_linked_tab(page, link, options) for link in result["links"])
+        )
+        return merge_tab_cards([result["cards"], *tab_cards])
+
+    async def _read_linked_tab(self, page: Page, link: Dict, options: Dict) -> List[Dict]:
+        tab_page = await page.context.new_page()
+        try:
+            await tab_page.goto(link["href"], wait_until="domcontentloaded", timeout=60000)
+            await tab_page.wait_for_selector(TABPANEL_ITEM_SELECTOR, timeout=READY_TIMEOUT_MS)
+            result = await tab_page.evaluate(TAB_CRAWL_JS, {**options, "clickTabs": False})
+        except Exception as e:
+            logger.warning(f"Failed to read tab {link['label']}: {e}")
+            return []
+        finally:
+            await tab_page.close()
+        for card in result["cards"]:
+            card["tab"] = link["label"]
+        return result["cards"]
+
+
+def crawl_urls(urls: Optional[List[str]] = None) -> Tuple[List[Dict], List[str]]:
+    """Crawl several pages concurrently from synchronous code.
+
+    Returns the products and the URLs whose products may be missing.
+    """
+    crawler = AsyncLGTimedealCrawler(urls)
+    products = asyncio.run(crawler.crawl())
+    return products, crawler.incomplete_urls
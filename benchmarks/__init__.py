@@ -0,0 +1 @@
+"""Benchmarks for LG Time Deal crawler."""
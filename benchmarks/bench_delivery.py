@@ -0,0 +1,91 @@
+"""Benchmark Telegram delivery against a local fake Bot API server.
+
+Compares one requests.post per message, sent in order (the old
+send_message), with DeliveryQueue: pooled connections, token buckets,
+retries and concurrent chats. Reports time, delivered messages, 429s and
+TCP connections, and checks that each chat received its messages in order.
+
+Usage:
+    python -m benchmarks.bench_delivery --messages 120 --chats 30 --error-rate 0.05
+"""
+import argparse
+import os
+import tempfile
+import time
+from typing import Dict, List, Tuple
+import requests
+from benchmarks.fake_telegram import FakeTelegramServer
+from delivery import DeliveryQueue
+
+TOKEN = "123456:bench"
+
+
+def build_messages(count: int, chats: int) -> List[Tuple[str, str]]:
+    """Build (chat_id, text) pairs spread round-robin over the chats."""
+    return [(str(1000 + i % chats), f"message {i}") for i in range(count)]
+
+
+def in_order(server: FakeTelegramServer, messages: List[Tuple[str, str]]) -> bool:
+    """Check every chat received its messages in the order they were queued."""
+    expected: Dict[str, List[str]] = {}
+    for chat_id, text in messages:
+        expected.setdefault(chat_id, []).append(text)
+    received: Dict[str, List[str]] = {}
+    for payload in server.messages:
+        received.setdefault(str(payload["chat_id"]), []).append(payload["text"])
+    return received == expected
+
+
+def run_naive(messages: List[Tuple[str, str]], args) -> FakeTelegramServer:
+    """One requests.post per message, no retry."""
+    server = FakeTelegramServer(global_rate=args.global_rate, chat_rate=args.chat_rate,
+                                error_rate=args.error_rate).start()
+    for chat_id, text in messages:
+        try:
+            requests.post(f"{server.url}/bot{TOKEN}/sendMessage",
+                          json={"chat_id": chat_id, "text": text}, timeout=10).raise_for_status()
+        except requests.exceptions.RequestException:
+            pass
+    return server
+
+
+def run_queue(messages: List[Tuple[str, str]], args) -> FakeTelegramServer:
+    """Everything queued in the outbox, then one deliver()."""
+    server = FakeTelegramServer(global_rate=args.global_rate, chat_rate=args.chat_rate,
+                                error_rate=args.error_rate).start()
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = DeliveryQueue(bot_token=TOKEN, api_base=server.url,
+                              outbox_path=os.path.join(tmp, "outbox.db"),
+                              concurrency=args.concurrency, global_rate=args.global_rate,
+                              chat_rate=args.chat_rate)
+        for chat_id, text in messages:
+            queue.enqueue(chat_id, text, parse_mode=None)
+        queue.deliver()
+        queue.close()
+    return server
+
+
+def main():
+    """Run the delivery benchmark."""
+    parser = argparse.ArgumentParser(description='Telegram delivery benchmark')
+    parser.add_argument('--messages', type=int, default=120, help='Number of messages')
+    parser.add_argument('--chats', type=int, default=30, help='Number of chats')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent chats in DeliveryQueue')
+    parser.add_argument('--global-rate', type=float, default=30, help='Server limit, messages/s overall')
+    parser.add_argument('--chat-rate', type=float, default=1, help='Server limit, messages/s per chat')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of requests failing with 500')
+    args = parser.parse_args()
+
+    messages = build_messages(args.messages, args.chats)
+    for label, run in (("naive", run_naive), ("queue", run_queue)):
+        start = time.perf_counter()
+        server = run(messages, args)
+        elapsed = time.perf_counter() - start
+        server.shutdown()
+        print(f"{label:>5}: {len(server.messages)}/{len(messages)} delivered in {elapsed:.2f} s, "
+              f"{server.rate_limited} rate limited, {server.errors} errors, "
+              f"{server.connections} connections, in order: {in_order(server, messages)}")
+
+
+if __name__ == "__main__":
+    main()
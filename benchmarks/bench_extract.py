@@ -0,0 +1,84 @@
+"""Benchmark bulk card extraction against the per-handle path.
+
+Both paths are the crawler's own batch readers (EXTRACTION_MODE "bulk" and
+"handle"), reading every card of the page as one batch.
+
+Usage:
+    python -m benchmarks.bench_extract --cards 200 --repeat 3
+"""
+import argparse
+import time
+from typing import List
+from playwright.sync_api import sync_playwright
+from card_selectors import card_selector
+from crawler import READ_MARK, LGTimedealCrawler
+
+SELECTOR = card_selector('[data-ec-product]')
+
+
+def build_page(count: int) -> str:
+    """Build a synthetic exhibition page with count product cards."""
+    cards = []
+    for i in range(count):
+        cards.append(
+            f'<li class="product-item" data-ec-product=\'{{"model_id":"MD{i:05d}"}}\'>'
+            f'<a href="/tvs/oled42c4ena-{i}">LG 올레드 TV {i}</a>'
+            f'<p>OLED42C4ENA</p>'
+            f'<p>할인율 {i % 50}%</p>'
+            f'<p>할인 후 판매가 {1000000 + i * 100:,}원</p>'
+            f'<p>할인 전 정가 {1500000 + i * 100:,}원</p>'
+            f'<p>최대혜택가 {900000 + i * 100:,}원</p>'
+            f'<p>{i % 20 + 1}개 남음</p>'
+            f'</li>'
+        )
+    return f"<html><body><ul>{''.join(cards)}</ul></body></html>"
+
+
+def time_path(read_batch, crawler: LGTimedealCrawler, page, count: int) -> float:
+    """Time one batch read of every card through read_batch, then parsing."""
+    # The readers skip cards marked as read by an earlier run
+    page.evaluate("(mark) => document.querySelectorAll(`[${mark}]`).forEach((el) => el.removeAttribute(mark))",
+                  READ_MARK)
+    start = time.perf_counter()
+    cards = read_batch(page, SELECTOR, count)
+    products = [crawler.parse_card(card) for card in cards]
+    elapsed = time.perf_counter() - start
+    assert len(products) == count and all(products)
+    return elapsed
+
+
+def report(label: str, timings: List[float], cards: int):
+    """Print the best and mean timings for a path."""
+    best = min(timings)
+    mean = sum(timings) / len(timings)
+    print(f"{label:<8} best {best * 1000:9.1f} ms  mean {mean * 1000:9.1f} ms  "
+          f"({best * 1000000 / cards:8.1f} us/card)")
+
+
+def main():
+    """Run the extraction benchmark."""
+    parser = argparse.ArgumentParser(description='Bulk vs per-handle extraction benchmark')
+    parser.add_argument('--cards', type=int, default=200, help='Number of cards on the page')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of timed runs per path')
+    args = parser.parse_args()
+    
+    crawler = LGTimedealCrawler()
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        page = browser.new_page()
+        page.set_content(build_page(args.cards))
+        
+        handle_timings = [time_path(crawler._read_batch_by_handle, crawler, page, args.cards)
+                          for _ in range(args.repeat)]
+        bulk_timings = [time_path(crawler._read_batch_bulk, crawler, page, args.cards)
+                        for _ in range(args.repeat)]
+        browser.close()
+    
+    print(f"Extracting {args.cards} cards, {args.repeat} runs each")
+    report("handle", handle_timings, args.cards)
+    report("bulk", bulk_timings, args.cards)
+    print(f"speedup  {min(handle_timings) / min(bulk_timings):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
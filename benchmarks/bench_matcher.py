@@ -0,0 +1,77 @@
+"""Benchmark watchlist matching: compiled automaton vs per-code substring loop.
+
+Usage:
+    python -m benchmarks.bench_matcher --products 10000 --codes 5000
+"""
+import argparse
+import random
+import time
+from typing import Dict, List
+from watchlist import WatchlistMatcher
+
+MODEL_PREFIXES = ["OLED", "QNED", "NANO", "UHD", "F", "W", "M", "S", "RH", "DUE"]
+MODEL_SIZES = ["42", "48", "55", "65", "77", "83", "86", "97"]
+
+
+def build_model(rng: random.Random) -> str:
+    """Build a model name in LG's format, e.g. OLED42C4ENA."""
+    suffix = ''.join(rng.choice("ABCDEGHKNPRSTUW") for _ in range(3))
+    return f"{rng.choice(MODEL_PREFIXES)}{rng.choice(MODEL_SIZES)}{rng.choice('ABCGMZ')}{rng.randint(1, 5)}{suffix}"
+
+
+def build_products(count: int, rng: random.Random) -> List[Dict]:
+    """Build synthetic products with LG-style names and models."""
+    products = []
+    for i in range(count):
+        model = build_model(rng)
+        products.append({"name": f"LG 올레드 evo TV {i} ({model})", "model": model})
+    return products
+
+
+def build_codes(count: int, rng: random.Random) -> List[str]:
+    """Build watch codes: fragments of LG-style model names."""
+    codes = set()
+    while len(codes) < count:
+        model = build_model(rng)
+        start = rng.randint(0, 4)
+        codes.add(model[start:start + rng.randint(4, 8)])
+    return list(codes)
+
+
+def naive_match(codes: List[str], product: Dict) -> List[str]:
+    """Per-code substring loop, as TelegramSender.is_priority_product used to do."""
+    name = product.get('name', '').upper()
+    model = product.get('model', '').upper()
+    return [code for code in codes if code in name or code in model]
+
+
+def main():
+    """Run the matcher benchmark."""
+    parser = argparse.ArgumentParser(description='Watchlist matcher benchmark')
+    parser.add_argument('--products', type=int, default=10000, help='Number of products')
+    parser.add_argument('--codes', type=int, default=5000, help='Number of watch codes')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of timed runs')
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    products = build_products(args.products, rng)
+    codes = build_codes(args.codes, rng)
+
+    start = time.perf_counter()
+    matcher = WatchlistMatcher(codes)
+    print(f"Compiled {len(matcher)} codes in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    for label, match in (("naive", lambda p: naive_match(matcher.codes, p)),
+                         ("automaton", matcher.match_product)):
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            matched = sum(1 for product in products if match(product))
+            timings.append(time.perf_counter() - start)
+        best = min(timings)
+        print(f"{label:>9}: {args.products} products in {best * 1000:.1f} ms "
+              f"({args.products / best:,.0f} products/s, {matched} matched)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Benchmark card text parsing throughput (no browser needed).
+
+Usage:
+    python -m benchmarks.bench_parser --cards 20000
+"""
+import argparse
+import time
+from typing import List
+from card_parser import parse_card_text
+
+
+def build_card_texts(count: int) -> List[str]:
+    """Build synthetic card texts in the exhibition page format."""
+    texts = []
+    for i in range(count):
+        texts.append(
+            f"LG 올레드 evo TV {i}\n"
+            f"OLED42C4ENA\n"
+            f"할인율 {i % 50}%\n"
+            f"할인 후 판매가\n{1000000 + i * 100:,}원\n"
+            f"할인 전 정가\n{1500000 + i * 100:,}원\n"
+            f"최대혜택가\n{900000 + i * 100:,}원\n"
+            f"{i % 20 + 1}개 남음"
+        )
+    return texts
+
+
+def main():
+    """Run the parser benchmark."""
+    parser = argparse.ArgumentParser(description='Card text parser benchmark')
+    parser.add_argument('--cards', type=int, default=20000, help='Number of card texts to parse')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of timed runs')
+    args = parser.parse_args()
+    
+    texts = build_card_texts(args.cards)
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        for text in texts:
+            parse_card_text(text)
+        timings.append(time.perf_counter() - start)
+    
+    best = min(timings)
+    print(f"Parsed {args.cards} cards in {best * 1000:.1f} ms ({args.cards / best:,.0f} cards/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Synthetic exhibition corpora: products, card texts, card HTML and API payloads.
+
+Products use LG-style model names (some of them matching the default
+PRIORITY_PRODUCTS) and the card formats of the exhibition page:
+"할인율 N%", "할인 후 판매가", "할인 전 정가", "최대혜택가" and "N개 남음".
+"""
+import html
+import json
+import random
+from typing import Dict, List
+from card_parser import ProductRecord
+
+# Corpus sizes used by the benchmark suite
+SIZES = [10, 1000, 100000]
+
+MODEL_PREFIXES = ["OLED", "QNED", "NANO", "UHD"]
+MODEL_SIZES = ["42", "48", "55", "65", "77", "83"]
+MODEL_SERIES = ["B", "C", "G", "M", "Z"]
+
+
+def build_model(rng: random.Random) -> str:
+    """Build a model name in LG's format, e.g. OLED42C4ENA."""
+    suffix = ''.join(rng.choice("ABEKNPRSTUW") for _ in range(3))
+    return (f"{rng.choice(MODEL_PREFIXES)}{rng.choice(MODEL_SIZES)}"
+            f"{rng.choice(MODEL_SERIES)}{rng.randint(3, 5)}{suffix}")
+
+
+def build_products(count: int, seed: int = 0) -> List[ProductRecord]:
+    """Build count products with varied prices, discounts and stock."""
+    rng = random.Random(seed)
+    products = []
+    for i in range(count):
+        model = build_model(rng)
+        original = rng.randrange(500, 9000) * 1000
+        discount = rng.randint(5, 50)
+        sale = original * (100 - discount) // 100 // 10 * 10
+        products.append(ProductRecord(
+            name=f"LG 올레드 evo TV {i}",
+            model=model,
+            link=f"https://www.lge.co.kr/tvs/{model.lower()}-{i}",
+            discount_rate=discount,
+            sale_price=sale,
+            original_price=original,
+            max_benefit_price=sale - rng.randrange(0, 50) * 1000,
+            stock=rng.choice([0, 1, 2, 3, 5, 10, 20, 50]),
+        ))
+    return products
+
+
+def card_text(product: ProductRecord) -> str:
+    """Rendered text of a product card, as read through innerText."""
+    return (
+        f"{product['name']}\n"
+        f"{product['model']}\n"
+        f"할인율 {product['discount_rate']}%\n"
+        f"할인 후 판매가\n{product['sale_price']:,}원\n"
+        f"할인 전 정가\n{product['original_price']:,}원\n"
+        f"최대혜택가\n{product['max_benefit_price']:,}원\n"
+        f"{product['stock']}개 남음"
+    )
+
+
+def card_html(product: ProductRecord) -> str:
+    """HTML of a product card."""
+    ec_product = html.escape(json.dumps({"model_id": product["model"]}), quote=True)
+    path = product["link"].replace("https://www.lge.co.kr", "")
+    return (
+        f'<li class="product-item" data-ec-product="{ec_product}">'
+        f'<a href="{path}">{html.escape(product["name"])}</a>'
+        f'<p>{product["model"]}</p>'
+        f'<p>할인율 {product["discount_rate"]}%</p>'
+        f'<p>할인 후 판매가 {product["sale_price"]:,}원</p>'
+        f'<p>할인 전 정가 {product["original_price"]:,}원</p>'
+        f'<p>최대혜택가 {product["max_benefit_price"]:,}원</p>'
+        f'<p>{product["stock"]}개 남음</p>'
+        f'</li>'
+    )
+
+
+def build_page(products: List[ProductRecord]) -> str:
+    """Exhibition page with every product card rendered in the HTML."""
+    cards = "".join(card_html(product) for product in products)
+    return f'<html><head><meta charset="utf-8"></head><body><ul class="product-list">{cards}</ul></body></html>'
+
+
+def build_payload(products: List[ProductRecord]) -> Dict:
+    """Product-list API response with the field names of LG's API."""
+    return {"data": {"totalCount": len(products), "list": [
+        {
+            "modelDisplayName": product["name"],
+            "modelName": product["model"],
+            "modelUrlPath": product["link"].replace("https://www.lge.co.kr", ""),
+            "discountRate": product["discount_rate"],
+            "obsSellingPrice": product["sale_price"],
+            "obsOriginalPrice": product["original_price"],
+            "maxBenefitPrice": product["max_benefit_price"],
+            "stockQty": product["stock"],
+        }
+        for product in products
+    ]}}
@@ -0,0 +1,134 @@
+"""Local stand-in for the LG exhibition page, serving a synthetic corpus.
+
+In "dom" mode the cards are rendered in the page HTML. In "api" mode the
+page is an empty shell that fetches /api/products (JSON with LG's field
+names) and renders the cards from it, like the real page does, so both the
+network capture and the DOM extraction paths can be exercised offline.
+
+Usage:
+    python -m benchmarks.fake_exhibition --port 8080 --products 1000 --mode api
+    LG_TIMEDEAL_URL=http://127.0.0.1:8080/exhibition python main.py --mode crawl
+"""
+import argparse
+import json
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+from benchmarks.corpus import build_page, build_payload, build_products
+from card_parser import ProductRecord
+
+# Renders /api/products into cards with the same markup as corpus.card_html
+API_PAGE = """<html><head><meta charset="utf-8"></head><body>
+<ul class="product-list"></ul>
+<script>
+fetch('/api/products').then((response) => response.json()).then((payload) => {
+    const fmt = (n) => n.toLocaleString('ko-KR');
+    const esc = (s) => String(s).replace(/[&<>"]/g, (c) => ({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;'})[c]);
+    document.querySelector('.product-list').innerHTML = payload.data.list.map((item) =>
+        `<li class="product-item" data-ec-product="${esc(JSON.stringify({model_id: item.modelName}))}">` +
+        `<a href="${item.modelUrlPath}">${esc(item.modelDisplayName)}</a>` +
+        `<p>${item.modelName}</p>` +
+        `<p>할인율 ${item.discountRate}%</p>` +
+        `<p>할인 후 판매가 ${fmt(item.obsSellingPrice)}원</p>` +
+        `<p>할인 전 정가 ${fmt(item.obsOriginalPrice)}원</p>` +
+        `<p>최대혜택가 ${fmt(item.maxBenefitPrice)}원</p>` +
+        `<p>${item.stockQty}개 남음</p></li>`
+    ).join('');
+});
+</script>
+</body></html>
+"""
+
+
+class FakeExhibitionServer(ThreadingHTTPServer):
+    """Threaded HTTP server answering GET /exhibition and GET /api/products."""
+
+    daemon_threads = True
+
+    def __init__(self, products: List[ProductRecord], port: int = 0, mode: str = "dom"):
+        super().__init__(("127.0.0.1", port), FakeExhibitionHandler)
+        self.products = products
+        self.mode = mode
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        """Exhibition page URL to use as LG_TIMEDEAL_URL."""
+        return f"http://127.0.0.1:{self.server_address[1]}/exhibition"
+
+    def start(self) -> "FakeExhibitionServer":
+        """Serve in a background thread."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def change_stock(self, share: float, seed: int = 0) -> int:
+        """Lower the stock of a share of the products; returns how many changed."""
+        rng = random.Random(seed)
+        changed = 0
+        with self._lock:
+            for product in self.products:
+                if product["stock"] and rng.random() < share:
+                    product["stock"] -= 1
+                    changed += 1
+        return changed
+
+    def page(self) -> str:
+        """HTML of the exhibition page."""
+        with self._lock:
+            return API_PAGE if self.mode == "api" else build_page(self.products)
+
+    def payload(self) -> str:
+        """JSON of the product-list API."""
+        with self._lock:
+            return json.dumps(build_payload(self.products), ensure_ascii=False)
+
+
+class FakeExhibitionHandler(BaseHTTPRequestHandler):
+    """Request handler of FakeExhibitionServer (HTTP/1.1 keep-alive)."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        with self.server._lock:
+            self.server.requests += 1
+        path = self.path.split("?", 1)[0]
+        if path == "/api/products":
+            self._reply(200, "application/json; charset=utf-8", self.server.payload())
+        elif path.startswith("/exhibition"):
+            self._reply(200, "text/html; charset=utf-8", self.server.page())
+        else:
+            self._reply(404, "text/plain; charset=utf-8", "Not Found")
+
+    def _reply(self, status: int, content_type: str, body: str):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    """Run the fake exhibition server in the foreground."""
+    parser = argparse.ArgumentParser(description='Fake LG exhibition page server')
+    parser.add_argument('--port', type=int, default=8080, help='Port to listen on')
+    parser.add_argument('--products', type=int, default=1000, help='Number of products on the page')
+    parser.add_argument('--mode', choices=['dom', 'api'], default='dom',
+                        help='Render cards in the HTML (dom) or from a JSON API in the page (api)')
+    args = parser.parse_args()
+
+    server = FakeExhibitionServer(build_products(args.products), args.port, args.mode)
+    print(f"Fake exhibition page with {args.products} products on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"Served {server.requests} requests")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Local fake of the Telegram Bot API sendMessage endpoint.
+
+Enforces global and per-chat rate limits like Telegram (HTTP 429 with
+parameters.retry_after), can fail a share of requests with HTTP 500, and
+records every accepted message, so delivery code can be exercised without
+the network.
+
+Usage:
+    python -m benchmarks.fake_telegram --port 8081
+    TELEGRAM_API_BASE=http://127.0.0.1:8081 python main.py --mode send
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Deque, Dict, List
+
+
+class FakeTelegramServer(ThreadingHTTPServer):
+    """Threaded HTTP server answering POST /bot<token>/sendMessage."""
+
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, global_rate: float = 30, chat_rate: float = 1,
+                 error_rate: float = 0.0, retry_after: int = 1):
+        super().__init__(("127.0.0.1", port), FakeTelegramHandler)
+        self.global_rate = global_rate
+        self.chat_rate = chat_rate
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.messages: List[Dict] = []
+        self.rate_limited = 0
+        self.errors = 0
+        self.connections = 0
+        self._global_sent: Deque[float] = deque()
+        self._chat_sent: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        """Base URL to use as TELEGRAM_API_BASE."""
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self) -> "FakeTelegramServer":
+        """Serve in a background thread."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def accept(self, payload: Dict) -> Dict:
+        """Decide the response to one sendMessage call: (status, body)."""
+        chat_id = str(payload.get("chat_id"))
+        with self._lock:
+            if self.error_rate and random.random() < self.error_rate:
+                self.errors += 1
+                return {"status": 500, "body": {"ok": False, "error_code": 500,
+                                                "description": "Internal Server Error"}}
+
+            now = time.monotonic()
+            chat_sent = self._chat_sent.setdefault(chat_id, deque())
+            # Sliding one-second windows
+            for sent in (self._global_sent, chat_sent):
+                while sent and now - sent[0] >= 1:
+                    sent.popleft()
+            if len(self._global_sent) >= self.global_rate or len(chat_sent) >= self.chat_rate:
+                self.rate_limited += 1
+                return {"status": 429, "body": {
+                    "ok": False, "error_code": 429,
+                    "description": f"Too Many Requests: retry after {self.retry_after}",
+                    "parameters": {"retry_after": self.retry_after},
+                }}
+
+            self._global_sent.append(now)
+            chat_sent.append(now)
+            self.messages.append(payload)
+            return {"status": 200, "body": {"ok": True, "result": {
+                "message_id": len(self.messages), "chat": {"id": chat_id}, "text": payload.get("text"),
+            }}}
+
+
+class FakeTelegramHandler(BaseHTTPRequestHandler):
+    """Request handler of FakeTelegramServer (HTTP/1.1 keep-alive)."""
+
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server._lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if not self.path.endswith("/sendMessage"):
+            self._reply(404, {"ok": False, "error_code": 404, "description": "Not Found"})
+            return
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            self._reply(400, {"ok": False, "error_code": 400, "description": "Bad Request"})
+            return
+        if not payload.get("chat_id") or not payload.get("text"):
+            self._reply(400, {"ok": False, "error_code": 400,
+                              "description": "Bad Request: chat_id and text are required"})
+            return
+        response = self.server.accept(payload)
+        self._reply(response["status"], response["body"])
+
+    def _reply(self, status: int, body: Dict):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    """Run the fake Bot API server in the foreground."""
+    parser = argparse.ArgumentParser(description='Fake Telegram Bot API server')
+    parser.add_argument('--port', type=int, default=8081, help='Port to listen on')
+    parser.add_argument('--global-rate', type=float, default=30, help='Messages per second, all chats')
+    parser.add_argument('--chat-rate', type=float, default=1, help='Messages per second, per chat')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of requests failing with 500')
+    args = parser.parse_args()
+
+    server = FakeTelegramServer(args.port, args.global_rate, args.chat_rate, args.error_rate)
+    print(f"Fake Telegram Bot API listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"Accepted {len(server.messages)} messages, {server.rate_limited} rate limited, "
+              f"{server.errors} errors, {server.connections} connections")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""Offline benchmark suite with baselines.
+
+Measures, on synthetic corpora of 10 / 1k / 100k products:
+
+- parser: card texts parsed per second (card_parser.parse_card_text)
+- api: products built per second from a product-list API payload
+- matcher: products matched per second against the watchlist
+- messages: products rendered and packed into Telegram messages per second
+
+and, when Chromium is installed, on the local fake exhibition page and
+fake Telegram Bot API:
+
+- extract: cards extracted per second by a real crawl (dom and api pages)
+- e2e: wall time of `main.py --mode crawl --test` (crawl, save, send)
+
+Results are compared with a saved baseline; a metric more than
+--tolerance worse than its baseline is flagged and the exit code is 1.
+
+Usage:
+    python -m benchmarks.suite --save-baseline
+    python -m benchmarks.suite
+    python -m benchmarks.suite --sizes 10,1000 --browser-sizes 10 --tolerance 0.3
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, NamedTuple, Optional
+from benchmarks.corpus import build_payload, build_products, card_text
+from benchmarks.fake_exhibition import FakeExhibitionServer
+from benchmarks.fake_telegram import FakeTelegramServer
+from card_parser import parse_card_text
+from config import PRIORITY_PRODUCTS
+from network_capture import products_from_payloads
+from telegram_sender import TelegramSender
+from watchlist import WatchlistMatcher
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(REPO_DIR, "benchmarks", "baseline.json")
+TOKEN = "123456:bench"
+
+
+class Result(NamedTuple):
+    """One measured metric."""
+    name: str
+    value: float
+    unit: str
+    higher_is_better: bool
+
+
+def best_of(repeat: int, func: Callable[[], object]) -> float:
+    """Best wall time of repeat calls, in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def bench_parser(size: int, repeat: int) -> List[Result]:
+    """Card texts parsed per second."""
+    texts = [card_text(product) for product in build_products(size)]
+    elapsed = best_of(repeat, lambda: [parse_card_text(text) for text in texts])
+    return [Result(f"parser_{size}", size / elapsed, "cards/s", True)]
+
+
+def bench_api(size: int, repeat: int) -> List[Result]:
+    """Products built per second from a captured API payload."""
+    payloads = [{"url": "bench", "data": build_payload(build_products(size))}]
+    elapsed = best_of(repeat, lambda: products_from_payloads(payloads))
+    return [Result(f"api_{size}", size / elapsed, "products/s", True)]
+
+
+def bench_matcher(size: int, repeat: int) -> List[Result]:
+    """Products matched per second against the default watchlist."""
+    products = build_products(size)
+    matcher = WatchlistMatcher(PRIORITY_PRODUCTS)
+    elapsed = best_of(repeat, lambda: [matcher.match_product(product) for product in products])
+    return [Result(f"matcher_{size}", size / elapsed, "products/s", True)]
+
+
+def bench_messages(size: int, repeat: int) -> List[Result]:
+    """Products rendered and packed into messages per second."""
+    products = build_products(size)
+    sender = TelegramSender()
+    elapsed = best_of(repeat, lambda: sender.create_messages(products))
+    return [Result(f"messages_{size}", size / elapsed, "products/s", True)]
+
+
+def chromium_available() -> bool:
+    """Check if Playwright's Chromium is installed."""
+    try:
+        from playwright.sync_api import sync_playwright
+        with sync_playwright() as p:
+            return os.path.exists(p.chromium.executable_path)
+    except Exception:
+        return False
+
+
+def run_crawl(size: int, mode: str, tier: str = "browser") -> Optional[Dict]:
+    """Run `main.py --mode crawl --test` against the fake servers in a scratch directory.
+
+    The crawl is pinned to one fetch tier ("http" or "browser"). Returns the
+    run's metrics record (see metrics.py) with its wall time.
+    """
+    exhibition = FakeExhibitionServer(build_products(size), mode=mode).start()
+    telegram = FakeTelegramServer(global_rate=1000, chat_rate=1000).start()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(
+                os.environ,
+                LG_TIMEDEAL_URL=exhibition.url,
+                TELEGRAM_API_BASE=telegram.url,
+                TELEGRAM_BOT_TOKEN=TOKEN,
+                TELEGRAM_CHAT_ID="1000",
+                SAVE_SNAPSHOTS="false",
+                FETCH_TIERS=tier,
+                METRICS_DIR=os.path.join(tmp, "metrics"),
+            )
+            start = time.perf_counter()
+            completed = subprocess.run(
+                [sys.executable, os.path.join(REPO_DIR, "main.py"), "--mode", "crawl", "--test"],
+                cwd=tmp, env=env, capture_output=True, text=True,
+            )
+            elapsed = time.perf_counter() - start
+            if completed.returncode != 0:
+                print(completed.stderr[-2000:], file=sys.stderr)
+                return None
+            with open(os.path.join(tmp, "metrics", "runs.jsonl"), encoding="utf-8") as f:
+                record = json.loads(f.readlines()[-1])
+    finally:
+        exhibition.shutdown()
+        telegram.shutdown()
+    if not record["counts"].get(f"tier_{tier}"):
+        print(f"  crawl was not served by the {tier} tier", file=sys.stderr)
+        return None
+    record["wall_s"] = elapsed
+    record["messages"] = len(telegram.messages)
+    return record
+
+
+def bench_browser(size: int) -> List[Result]:
+    """Extraction throughput and end-to-end latency of real crawls, per page mode and fetch tier."""
+    results = []
+    for mode, tier, prefix in (("dom", "browser", ""), ("api", "browser", ""), ("dom", "http", "http_")):
+        record = run_crawl(size, mode, tier)
+        if record is None:
+            print(f"  {tier} crawl of the {mode} page with {size} products failed")
+            continue
+        extract = record["phases_s"].get("extract")
+        if extract:
+            results.append(Result(f"extract_{prefix}{mode}_{size}", size / extract, "cards/s", True))
+        results.append(Result(f"e2e_{prefix}{mode}_{size}", record["wall_s"], "s", False))
+    return results
+
+
+def load_baseline(path: str) -> Dict[str, Dict]:
+    """Metrics of the saved baseline, by name."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["metrics"]
+
+
+def save_baseline(results: List[Result], path: str):
+    """Save results as the new baseline."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({
+            "created_at": datetime.now().isoformat(timespec='seconds'),
+            "python": platform.python_version(),
+            "machine": platform.platform(),
+            "metrics": {result.name: result._asdict() for result in results},
+        }, f, indent=2)
+    print(f"Saved baseline with {len(results)} metrics to {path}")
+
+
+def change(result: Result, baseline: Dict) -> float:
+    """Relative change against the baseline, positive when better."""
+    ratio = result.value / baseline["value"] if baseline["value"] else 1.0
+    return ratio - 1 if result.higher_is_better else 1 - ratio
+
+
+def report(results: List[Result], baseline: Dict[str, Dict], tolerance: float) -> List[str]:
+    """Print results next to the baseline; returns the regressed metric names."""
+    regressions = []
+    print(f"{'metric':<22} {'value':>14} {'unit':<11} {'baseline':>14} {'change':>8}")
+    for result in results:
+        line = f"{result.name:<22} {result.value:>14,.2f} {result.unit:<11}"
+        if result.name in baseline:
+            delta = change(result, baseline[result.name])
+            flag = ""
+            if delta < -tolerance:
+                regressions.append(result.name)
+                flag = "  REGRESSION"
+            line += f" {baseline[result.name]['value']:>14,.2f} {delta:>+8.0%}{flag}"
+        print(line)
+    return regressions
+
+
+def main():
+    """Run the benchmark suite."""
+    parser = argparse.ArgumentParser(description='Offline benchmark suite')
+    parser.add_argument('--sizes', default="10,1000,100000", help='Corpus sizes for the in-process benchmarks')
+    parser.add_argument('--browser-sizes', default="10,1000", help='Corpus sizes for real crawls')
+    parser.add_argument('--skip-browser', action='store_true', help='Skip the crawls that need Chromium')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per in-process benchmark (best kept)')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='Baseline file')
+    parser.add_argument('--save-baseline', action='store_true', help='Save the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Flag metrics more than this share worse than the baseline')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    results: List[Result] = []
+    for bench in (bench_parser, bench_api, bench_matcher, bench_messages):
+        for size in sizes:
+            print(f"Running {bench.__name__} on {size} products")
+            results += bench(size, args.repeat)
+
+    if args.skip_browser:
+        pass
+    elif not chromium_available():
+        print("Chromium is not installed (playwright install chromium), skipping crawl benchmarks")
+    else:
+        for size in (int(size) for size in args.browser_sizes.split(",") if size):
+            print(f"Running crawls of {size} products")
+            results += bench_browser(size)
+
+    regressions = report(results, load_baseline(args.baseline), args.tolerance)
+    if args.save_baseline:
+        save_baseline(results, args.baseline)
+    elif regressions:
+        print(f"{len(regressions)} metrics regressed by more than {args.tolerance:.0%}: "
+              f"{', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
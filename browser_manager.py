@@ -0,0 +1,128 @@
+"""Long-lived Chromium browser shared across scheduled crawls."""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+from playwright.sync_api import sync_playwright, Browser, BrowserContext, Playwright
+from config import BROWSER_MAX_RUNS, BROWSER_MAX_RSS_MB
+from metrics import count, timed
+
+try:
+    import psutil
+except ImportError:  # RSS-based recycling is skipped without psutil
+    psutil = None
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class BrowserManager:
+    """Keep one browser warm and hand each run a fresh BrowserContext.
+
+    Playwright's sync API is bound to the thread that started it, so all
+    browser work runs on one dedicated thread owned by the manager. The
+    browser is relaunched when it has crashed and recycled after max_runs
+    runs or when the driver and browser processes exceed max_rss_mb.
+    """
+
+    def __init__(self, max_runs: int = BROWSER_MAX_RUNS, max_rss_mb: int = BROWSER_MAX_RSS_MB,
+                 headless: bool = True):
+        self.max_runs = max_runs
+        self.max_rss_mb = max_rss_mb
+        self.headless = headless
+        self.run_count = 0
+        self.launch_count = 0
+        self._playwright: Optional[Playwright] = None
+        self._browser: Optional[Browser] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="browser")
+
+    def run(self, func: Callable[[BrowserContext], T]) -> T:
+        """Run func with a fresh BrowserContext on the browser thread."""
+        return self._executor.submit(self._run, func).result()
+
+    def close(self):
+        """Close the browser and stop the browser thread."""
+        self._executor.submit(self._shutdown).result()
+        self._executor.shutdown()
+
+    def is_healthy(self) -> bool:
+        """Check if the browser is running and connected."""
+        return self._browser is not None and self._browser.is_connected()
+
+    def rss_mb(self) -> Optional[float]:
+        """Resident memory of the Playwright driver and browser processes, in MB."""
+        if psutil is None:
+            return None
+        total = 0
+        for child in psutil.Process().children(recursive=True):
+            try:
+                total += child.memory_info().rss
+            except psutil.Error:
+                continue
+        return total / (1024 * 1024)
+
+    def _run(self, func: Callable[[BrowserContext], T]) -> T:
+        self._ensure_browser()
+        context = self._browser.new_context()
+        try:
+            return func(context)
+        finally:
+            try:
+                context.close()
+            except Exception as e:
+                logger.warning(f"Failed to close browser context: {e}")
+            self.run_count += 1
+            self._recycle_if_needed()
+
+    def _ensure_browser(self):
+        if self.is_healthy():
+            return
+        if self._browser is not None:
+            logger.warning("Browser disconnected, relaunching")
+            self._close_browser()
+        try:
+            self._launch()
+        except Exception as e:
+            # The driver itself may have died with the browser; restart it
+            logger.warning(f"Browser launch failed ({e}), restarting Playwright")
+            self._shutdown()
+            self._launch()
+        self.run_count = 0
+        self.launch_count += 1
+        count("browser_launches")
+        logger.info(f"Launched browser (launch #{self.launch_count})")
+
+    @timed("launch")
+    def _launch(self):
+        if self._playwright is None:
+            self._playwright = sync_playwright().start()
+        self._browser = self._playwright.chromium.launch(headless=self.headless)
+
+    def _recycle_if_needed(self):
+        if self.run_count >= self.max_runs:
+            logger.info(f"Recycling browser after {self.run_count} runs")
+            self._close_browser()
+            return
+        rss = self.rss_mb()
+        if rss is not None and rss > self.max_rss_mb:
+            logger.info(f"Recycling browser at {rss:.0f} MB RSS (limit {self.max_rss_mb} MB)")
+            self._close_browser()
+
+    def _close_browser(self):
+        if self._browser is None:
+            return
+        try:
+            self._browser.close()
+        except Exception as e:
+            logger.warning(f"Failed to close browser: {e}")
+        self._browser = None
+
+    def _shutdown(self):
+        self._close_browser()
+        if self._playwright is not None:
+            try:
+                self._playwright.stop()
+            except Exception as e:
+                logger.warning(f"Failed to stop Playwright: {e}")
+            self._playwright = None
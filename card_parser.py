@@ -0,0 +1,178 @@
+"""Parser for LG Time Deal product card text.
+
+The parser is pure Python and does not depend on Playwright, so it can be
+used on archived card text in backfills, tests and benchmarks.
+"""
+import re
+from typing import Dict, Iterable, Iterator, NotRequired, Optional, Set, TypedDict
+from urllib.parse import urlsplit
+
+
+class ProductRecord(TypedDict):
+    """Parsed product card."""
+    name: str
+    model: str
+    link: str
+    discount_rate: Optional[int]
+    sale_price: Optional[int]
+    original_price: Optional[int]
+    max_benefit_price: Optional[int]
+    stock: Optional[int]
+    # Exhibition page the product was found on (multi-URL crawls)
+    source_url: NotRequired[str]
+
+
+BASE_URL = "https://www.lge.co.kr"
+
+# Patterns are compiled once. The label patterns start with a literal, so a
+# search jumps straight to the label instead of testing every position.
+NAME_PATTERN = re.compile(r'([^0-9]+?)([A-Z0-9]{6,})')
+MODEL_PATTERN = re.compile(r'\b([A-Z]{2,}\d{2,}[A-Z0-9]*)\b')
+DISCOUNT_PATTERN = re.compile(r'할인\s*율[^\d]*(\d+)%')
+DISCOUNT_ALT_PATTERN = re.compile(r'(\d+)%\s*할인')
+SALE_PATTERN = re.compile(r'할인\s*후\s*판매가[^\d]*([\d,]+)')
+SALE_ALT_PATTERN = re.compile(r'할인\s*후[^\d]*([\d,]+)')
+ORIGINAL_PATTERN = re.compile(r'할인\s*전\s*정가[^\d]*([\d,]+)')
+ORIGINAL_ALT_PATTERN = re.compile(r'정가[^\d]*([\d,]+)')
+MAX_BENEFIT_PATTERN = re.compile(r'최대혜택가[^\d]*([\d,]+)')
+PERCENT_PATTERN = re.compile(r'(\d+)%')
+STOCK_PATTERN = re.compile(r'(\d+)개\s*남음')
+STOCK_LABEL_PATTERN = re.compile(r'개\s*남음')
+PRICE_STRIP_PATTERN = re.compile(r'[,\s원]')
+
+
+def parse_price(text: str) -> Optional[int]:
+    """Parse a price string (remove commas and '원')."""
+    if not text:
+        return None
+    try:
+        return int(PRICE_STRIP_PATTERN.sub('', text))
+    except ValueError:
+        return None
+
+
+def parse_discount_rate(text: str) -> Optional[int]:
+    """Parse the first number before '%'."""
+    if not text:
+        return None
+    match = PERCENT_PATTERN.search(text)
+    return int(match.group(1)) if match else None
+
+
+def parse_stock(text: str) -> Optional[int]:
+    """Parse the number before '개 남음'."""
+    if not text or '남음' not in text:
+        return None
+    # Same result as STOCK_PATTERN.search, but starts from the literal label
+    # and walks back over the digits instead of trying every digit position
+    for match in STOCK_LABEL_PATTERN.finditer(text):
+        end = match.start()
+        start = end
+        while start and text[start - 1].isdecimal():
+            start -= 1
+        if start < end:
+            return int(text[start:end])
+    return None
+
+
+def absolute_link(href: str) -> str:
+    """Make a product link absolute on the LG site."""
+    if href and not href.startswith('http'):
+        return f"{BASE_URL}{href}"
+    return href or ""
+
+
+def _labelled_price(text: str, pattern, alt_pattern=None) -> Optional[int]:
+    """Price after a label, falling back to alt_pattern if the label is missing."""
+    match = pattern.search(text)
+    if match is None and alt_pattern is not None:
+        match = alt_pattern.search(text)
+    if match is None:
+        return None
+    # The group only holds digits and commas
+    digits = match.group(1).replace(',', '')
+    return int(digits) if digits else None
+
+
+def parse_card_text(text: str, name: str = "", href: str = "") -> Optional[ProductRecord]:
+    """Parse one product card.
+
+    Returns None when the text is not a product card or no name can be found.
+    """
+    if not text or '할인' not in text or '판매가' not in text:
+        return None
+
+    name = (name or "").strip()
+    link = absolute_link(href)
+
+    # If no name given, try to extract from text
+    if not name:
+        # Look for product name pattern (usually before model number)
+        name_match = NAME_PATTERN.match(text)
+        if name_match:
+            name = name_match.group(1).strip()
+        else:
+            # Fallback: take first meaningful line
+            name = next((line.strip() for line in text.split('\n') if line.strip()), "")
+
+    # Only return if we have at least a name
+    if not name:
+        return None
+
+    model_match = MODEL_PATTERN.search(text)
+
+    discount_rate = None
+    if '%' in text:
+        discount_match = DISCOUNT_PATTERN.search(text) or DISCOUNT_ALT_PATTERN.search(text)
+        if discount_match:
+            discount_rate = int(discount_match.group(1))
+
+    # '판매가' is always present here, '정가' and '최대혜택가' often are not
+    sale_price = _labelled_price(text, SALE_PATTERN, SALE_ALT_PATTERN)
+    original_price = None
+    if '정가' in text:
+        original_price = _labelled_price(text, ORIGINAL_PATTERN, ORIGINAL_ALT_PATTERN)
+    max_benefit_price = None
+    if '최대혜택가' in text:
+        max_benefit_price = _labelled_price(text, MAX_BENEFIT_PATTERN)
+
+    return ProductRecord(
+        name=name,
+        model=model_match.group(1) if model_match else "",
+        link=link,
+        discount_rate=discount_rate,
+        sale_price=sale_price,
+        original_price=original_price,
+        max_benefit_price=max_benefit_price,
+        stock=parse_stock(text),
+    )
+
+
+def parse_card(card: Dict) -> Optional[ProductRecord]:
+    """Parse a card dict as returned by the crawler's card reader."""
+    return parse_card_text(card.get("text") or "", card.get("name") or "", card.get("href") or "")
+
+
+def product_key(product: Dict) -> str:
+    """Normalized identity of a product: model and link (name if both are missing)."""
+    model = (product.get("model") or "").strip().upper()
+    link = (product.get("link") or "").strip()
+    if link:
+        parts = urlsplit(link)
+        link = f"{parts.netloc.lower()}{parts.path.rstrip('/')}"
+        if parts.query:
+            link += f"?{parts.query}"
+    if not model and not link:
+        return f"name:{(product.get('name') or '').strip()}"
+    return f"{model}|{link}"
+
+
+def unique_products(products: Iterable[Dict], seen: Optional[Set[str]] = None) -> Iterator[Dict]:
+    """Yield the first product of each product_key, skipping keys already in seen."""
+    if seen is None:
+        seen = set()
+    for product in products:
+        key = product_key(product)
+        if key not in seen:
+            seen.add(key)
+            yield product
@@ -0,0 +1,55 @@
+"""CSS selectors shared by the browser crawler and the HTML snapshot replay."""
+from config import CARD_NESTING
+
+# Selectors tried in order to find product cards
+PRODUCT_SELECTORS = [
+    '[data-ec-product]',
+    '.product-item',
+    'li[class*="product"]',
+    'div[class*="product"]',
+]
+
+# Cascade entries that also match list wrappers and parts of a card. Nesting
+# says nothing about which of their matches is the card, so every match
+# holding a link is read: parts without the price fail to parse, and list
+# wrappers are dropped by their CARD_LABEL count (see below).
+BROAD_SELECTORS = {
+    'li[class*="product"]',
+    'div[class*="product"]',
+}
+
+# Text every product card holds (parse_card_text needs it). A match that
+# contains two or more matches holding it is a list wrapper, never a card:
+# it would parse as its first card with prices and stock of the others.
+CARD_LABEL = '판매가'
+
+# Selectors tried in order to find the product link inside a card
+NAME_SELECTORS = [
+    'a[href*="/"]',
+    'a[href*="lge.co.kr"]',
+    'link',
+]
+
+# Fallback when no card selector matches: list items inside tab panels
+TABPANEL_SELECTOR = 'div[role="tabpanel"]'
+TABPANEL_ITEM_SELECTOR = 'div[role="tabpanel"] li'
+TAB_SELECTOR = '[role="tab"]'
+
+
+def card_selector(selector: str, nesting: str = CARD_NESTING) -> str:
+    """Restrict a card selector to the outermost or innermost of nested matches.
+
+    Broad selectors only keep matches that contain a link.
+    """
+    if selector in BROAD_SELECTORS:
+        return f"{selector}:has(a[href])"
+    if nesting == "outermost":
+        return f"{selector}:not({selector} {selector})"
+    if nesting == "innermost":
+        return f"{selector}:not(:has({selector}))"
+    return selector
+
+
+def is_product_text(text: str) -> bool:
+    """Check if a tabpanel list item contains product information."""
+    return '할인' in text and ('판매가' in text or '정가' in text)
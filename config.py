@@ -8,21 +8,160 @@ load_dotenv()
 # Telegram configuration
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID", "")
+TELEGRAM_API_BASE = os.getenv("TELEGRAM_API_BASE", "https://api.telegram.org")
 
-# LG Time Deal URL
-LG_TIMEDEAL_URL = os.getenv(
-    "LG_TIMEDEAL_URL",
-    "https://www.lge.co.kr/benefits/exhibitions/detail-PE00385001"
-)
+# LG Time Deal URL(s), comma-separated to watch several exhibition pages
+LG_TIMEDEAL_URLS = [
+    url.strip() for url in os.getenv(
+        "LG_TIMEDEAL_URL",
+        "https://www.lge.co.kr/benefits/exhibitions/detail-PE00385001"
+    ).split(",") if url.strip()
+]
+# Empty when LG_TIMEDEAL_URL is set but blank (reported by main.check_urls)
+LG_TIMEDEAL_URL = LG_TIMEDEAL_URLS[0] if LG_TIMEDEAL_URLS else ""
+# Pages crawled at the same time, and the time budget per page (seconds)
+CRAWL_CONCURRENCY = int(os.getenv("CRAWL_CONCURRENCY", "4"))
+CRAWL_URL_TIMEOUT = float(os.getenv("CRAWL_URL_TIMEOUT", "90"))
 
 # Priority product codes
 PRIORITY_PRODUCTS = os.getenv("PRIORITY_PRODUCTS", "42C5,42C4,48C5,48C4").split(",")
 
 # Data storage
 DATA_DIR = "data"
-PRODUCTS_JSON = os.path.join(DATA_DIR, "products.json")
+# Products snapshot format: "json" (products.json), "ndjson" (one product per
+# line, streamed on read) or "msgpack" (needs the msgpack package)
+PRODUCTS_FORMAT = os.getenv("PRODUCTS_FORMAT", "json")
+# Replaced snapshots are gzipped here; only the newest ones are kept (0: none)
+PRODUCTS_ARCHIVE_DIR = os.path.join(DATA_DIR, "archive")
+PRODUCTS_ARCHIVE_KEEP = int(os.getenv("PRODUCTS_ARCHIVE_KEEP", "24"))
+# Append-only price/stock history (python main.py --mode history)
+HISTORY_DB = os.path.join(DATA_DIR, "history.db")
+# Per-run metrics: one JSON line per run, and the last run as a Prometheus
+# textfile (point node_exporter's --collector.textfile.directory at METRICS_DIR)
+METRICS_DIR = os.getenv("METRICS_DIR", os.path.join(DATA_DIR, "metrics"))
+METRICS_JSONL = os.path.join(METRICS_DIR, "runs.jsonl")
+METRICS_TEXTFILE = os.path.join(METRICS_DIR, "lg_timedeal.prom")
 
 # Scheduler configuration
 SCHEDULE_HOUR = 9
 SCHEDULE_MINUTE = 0
+# "daily": one run at SCHEDULE_HOUR:SCHEDULE_MINUTE, "poll": adaptive polling below
+SCHEDULE_MODE = os.getenv("SCHEDULE_MODE", "daily")
+# Polling windows "HH:MM-HH:MM=seconds", comma-separated, and the interval outside them (seconds)
+POLL_WINDOWS = os.getenv("POLL_WINDOWS", "08:55-09:30=30")
+POLL_INTERVAL = float(os.getenv("POLL_INTERVAL", "900"))
+# Random delay added to each poll, as a fraction of its interval
+POLL_JITTER = float(os.getenv("POLL_JITTER", "0.1"))
+# Largest interval multiplier while the page does not change
+POLL_MAX_BACKOFF = float(os.getenv("POLL_MAX_BACKOFF", "4"))
+# Watch mode (python main.py --mode watch): seconds between samples of the
+# watched products, and between full crawls
+WATCH_INTERVAL = float(os.getenv("WATCH_INTERVAL", "1"))
+WATCH_FULL_INTERVAL = float(os.getenv("WATCH_FULL_INTERVAL", "300"))
+
+
+# Card extraction mode: "bulk" reads all cards in one page.evaluate call,
+# "handle" reads each card through separate element handle calls
+EXTRACTION_MODE = os.getenv("EXTRACTION_MODE", "bulk")
+
+# Card selectors can match cards nested in cards: keep only the "outermost"
+# or the "innermost" matching element ("all" keeps every match). Broad
+# selectors are handled differently, see card_selectors.BROAD_SELECTORS
+CARD_NESTING = os.getenv("CARD_NESTING", "outermost")
+
+# Rendered page snapshots for offline replay (python main.py --mode replay)
+SNAPSHOT_DIR = os.path.join(DATA_DIR, "snapshots")
+SAVE_SNAPSHOTS = os.getenv("SAVE_SNAPSHOTS", "true").lower() == "true"
+SNAPSHOT_KEEP = int(os.getenv("SNAPSHOT_KEEP", "20"))
+
+# Run each scheduled crawl in a supervised child process (see worker.py), with a
+# hard timeout (seconds) and a memory cap for its whole process tree; a worker
+# is replaced after WORKER_MAX_RUNS runs
+WORKER_PROCESS = os.getenv("WORKER_PROCESS", "false").lower() == "true"
+WORKER_TIMEOUT = float(os.getenv("WORKER_TIMEOUT", "300"))
+WORKER_MAX_RSS_MB = int(os.getenv("WORKER_MAX_RSS_MB", "1536"))
+WORKER_MAX_RUNS = int(os.getenv("WORKER_MAX_RUNS", "20"))
+
+# Browser reuse across scheduled runs
+BROWSER_REUSE = os.getenv("BROWSER_REUSE", "true").lower() == "true"
+BROWSER_MAX_RUNS = int(os.getenv("BROWSER_MAX_RUNS", "50"))
+BROWSER_MAX_RSS_MB = int(os.getenv("BROWSER_MAX_RSS_MB", "1024"))
+
+# Fetch tiers tried in order until one finds products: "http" (one plain GET
+# parsed without a browser, for pages whose HTML already holds the products)
+# and "browser" (Playwright)
+FETCH_TIERS = [t.strip() for t in os.getenv("FETCH_TIERS", "http,browser").split(",") if t.strip()]
+# Timeout of the plain GET (seconds), and the browser User-Agent it sends
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+HTTP_USER_AGENT = os.getenv(
+    "HTTP_USER_AGENT",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/120.0.0.0 Safari/537.36"
+)
+
+# Page load profile: "fast" blocks unused resources and waits for the product
+# cards, "legacy" waits for networkidle plus a fixed 3 seconds
+PAGE_LOAD_PROFILE = os.getenv("PAGE_LOAD_PROFILE", "fast")
+# Resource types and URL fragments aborted in the fast profile
+BLOCKED_RESOURCE_TYPES = [
+    t.strip() for t in os.getenv("BLOCKED_RESOURCE_TYPES", "image,media,font").split(",") if t.strip()
+]
+BLOCKED_URL_PATTERNS = [
+    p.strip() for p in os.getenv(
+        "BLOCKED_URL_PATTERNS",
+        "google-analytics.com,googletagmanager.com,doubleclick.net,facebook.net,"
+        "criteo.com,kakao.com/pixel,naver.net/wcs,hotjar.com"
+    ).split(",") if p.strip()
+]
+# Time to wait for the first product card, and how long the card count
+# must stay unchanged before the page counts as loaded (milliseconds)
+READY_TIMEOUT_MS = int(os.getenv("READY_TIMEOUT_MS", "20000"))
+CARD_STABLE_MS = int(os.getenv("CARD_STABLE_MS", "500"))
+
+# Build products from the page's product-list API responses when captured,
+# falling back to DOM extraction
+NETWORK_CAPTURE = os.getenv("NETWORK_CAPTURE", "true").lower() == "true"
+
+# Time budget for one tab's panel to settle in the tab-aware fallback (milliseconds)
+TAB_TIMEOUT_MS = int(os.getenv("TAB_TIMEOUT_MS", "10000"))
+
+# Lazy-loaded pages: keep scrolling / clicking the "load more" button and
+# extracting the new cards until the card count stops growing
+LOAD_MORE = os.getenv("LOAD_MORE", "true").lower() == "true"
+LOAD_MORE_TEXT = os.getenv("LOAD_MORE_TEXT", "더보기")
+# How long to wait for new cards after a click, or after a scroll that
+# started a request (milliseconds)
+LOAD_MORE_WAIT_MS = int(os.getenv("LOAD_MORE_WAIT_MS", "3000"))
+# How long a scroll without a "load more" button gets to start a request
+LOAD_MORE_GRACE_MS = int(os.getenv("LOAD_MORE_GRACE_MS", "200"))
+# Budgets for one page: cards extracted, and time spent extracting (milliseconds)
+MAX_CARDS = int(os.getenv("MAX_CARDS", "5000"))
+EXTRACT_BUDGET_MS = int(os.getenv("EXTRACT_BUDGET_MS", "120000"))
+
+# Per-product state between runs, for change-based notifications
+STATE_JSON = os.path.join(DATA_DIR, "state.json")
+# Scheduled runs skip extraction and notification when the page fingerprint
+# (product API payload or card HTML) matches the last processed run
+SKIP_UNCHANGED = os.getenv("SKIP_UNCHANGED", "true").lower() == "true"
+FINGERPRINT_JSON = os.path.join(DATA_DIR, "fingerprints.json")
+# "changes": scheduled runs notify only on changes, "all": every priority product
+NOTIFY_MODE = os.getenv("NOTIFY_MODE", "changes")
+# Change types that trigger a notification:
+# new, price_dropped, sold_out, stock_changed, removed
+NOTIFY_CHANGE_TYPES = [
+    t.strip() for t in os.getenv("NOTIFY_CHANGE_TYPES", "new,price_dropped,sold_out").split(",") if t.strip()
+]
+# Minimum price drop (percent of the previous sale price) and stock change to notify
+NOTIFY_MIN_PRICE_DROP_PCT = float(os.getenv("NOTIFY_MIN_PRICE_DROP_PCT", "1.0"))
+NOTIFY_MIN_STOCK_CHANGE = int(os.getenv("NOTIFY_MIN_STOCK_CHANGE", "1"))
+
+# Subscriber registry: chats with their own watchlists and thresholds, see subscribers.py.
+# Without this file TELEGRAM_CHAT_ID and PRIORITY_PRODUCTS are the only subscriber.
+SUBSCRIBERS_JSON = os.getenv("SUBSCRIBERS_JSON", os.path.join(DATA_DIR, "subscribers.json"))
 
+# Telegram delivery: durable outbox, rate limits (messages/second) and retries
+OUTBOX_DB = os.path.join(DATA_DIR, "outbox.db")
+DELIVERY_CONCURRENCY = int(os.getenv("DELIVERY_CONCURRENCY", "4"))
+TELEGRAM_GLOBAL_RATE = float(os.getenv("TELEGRAM_GLOBAL_RATE", "30"))
+TELEGRAM_CHAT_RATE = float(os.getenv("TELEGRAM_CHAT_RATE", "1"))
+DELIVERY_MAX_RETRIES = int(os.getenv("DELIVERY_MAX_RETRIES", "5"))
@@ -2,282 +2,964 @@
 import json
 import os
 import re
-from typing import List, Dict, Optional
-from playwright.sync_api import sync_playwright, Page, Browser
+import time
+from typing import Iterable, Iterator, List, Dict, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from playwright.sync_api import (
+    sync_playwright, Page, Browser, BrowserContext, Route,
+    TimeoutError as PlaywrightTimeoutError
+)
 import logging
-from config import LG_TIMEDEAL_URL, PRODUCTS_JSON, DATA_DIR
+from datetime import datetime
+from card_parser import parse_card, parse_price, parse_discount_rate, parse_stock, product_key
+from card_selectors import (
+    PRODUCT_SELECTORS, NAME_SELECTORS, CARD_LABEL, card_selector, TABPANEL_SELECTOR, TABPANEL_ITEM_SELECTOR,
+    TAB_SELECTOR, is_product_text
+)
+from config import (
+    LG_TIMEDEAL_URL, EXTRACTION_MODE,
+    SNAPSHOT_DIR, SAVE_SNAPSHOTS, SNAPSHOT_KEEP,
+    PAGE_LOAD_PROFILE, BLOCKED_RESOURCE_TYPES, BLOCKED_URL_PATTERNS,
+    READY_TIMEOUT_MS, CARD_STABLE_MS, NETWORK_CAPTURE, TAB_TIMEOUT_MS,
+    LOAD_MORE, LOAD_MORE_TEXT, LOAD_MORE_WAIT_MS, LOAD_MORE_GRACE_MS, MAX_CARDS, EXTRACT_BUDGET_MS,
+    FETCH_TIERS, HTTP_TIMEOUT, HTTP_USER_AGENT
+)
+from fingerprint import FingerprintStore, html_fingerprint, payload_fingerprint
+from metrics import PhaseTimer, current_run, timed
+from network_capture import ResponseCapture, products_from_payloads, save_payloads
+import storage
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Reads one card element into a plain object (same fields as read_card_handle)
+READ_CARD_JS = """
+(el) => {
+    const selectors = %s;
+    let name = '';
+    let href = '';
+    for (const selector of selectors) {
+        const nameEl = el.querySelector(selector);
+        if (nameEl) {
+            name = (nameEl.innerText || '').trim();
+            href = nameEl.getAttribute('href') || '';
+            break;
+        }
+    }
+    return {
+        name: name,
+        href: href,
+        ec_product: el.getAttribute('data-ec-product') || '',
+        text: el.innerText || '',
+    };
+}
+""" % json.dumps(NAME_SELECTORS)
+
+# Elements matching a card selector, without list wrappers: matches that
+# contain two or more matches holding card_selectors.CARD_LABEL
+CARD_ELEMENTS_JS = """
+(selector) => {
+    const matches = Array.from(document.querySelectorAll(selector));
+    const labelled = new Map();
+    for (const el of matches) {
+        if (!(el.textContent || '').includes(%s)) continue;
+        for (let parent = el.parentElement; parent; parent = parent.parentElement) {
+            labelled.set(parent, (labelled.get(parent) || 0) + 1);
+        }
+    }
+    return matches.filter((el) => (labelled.get(el) || 0) < 2);
+}
+""" % json.dumps(CARD_LABEL)
+
+# Attribute set on cards already extracted, so each batch reads only new ones
+READ_MARK = "data-lg-read"
+
+# Reads up to limit not yet extracted cards matching a selector and marks them
+READ_NEW_CARDS_JS = """
+([selector, limit]) => {
+    const readCard = %s;
+    const cardElements = %s;
+    const cards = [];
+    for (const el of cardElements(selector)) {
+        if (cards.length >= limit) break;
+        if (el.hasAttribute(%s)) continue;
+        el.setAttribute(%s, '');
+        cards.push(readCard(el));
+    }
+    return cards;
+}
+""" % (READ_CARD_JS, CARD_ELEMENTS_JS, json.dumps(READ_MARK), json.dumps(READ_MARK))
+
+# Up to limit not yet extracted cards matching a selector, as element handles
+UNREAD_CARD_ELEMENTS_JS = """
+([selector, limit]) => (%s)(selector).filter((el) => !el.hasAttribute(%s)).slice(0, limit)
+""" % (CARD_ELEMENTS_JS, json.dumps(READ_MARK))
+
+# Clicks a visible "load more" button (or scrolls to the bottom when there is
+# none), then waits until more cards match selector and their count settles.
+# Without a button, it returns at once when the page is already scrolled to
+# the bottom, and after graceMs when the scroll started no fetch/XHR request;
+# only a click or a started request gets the full waitMs. Returns how many
+# cards were added (0 when nothing more loaded).
+LOAD_MORE_JS = """
+async ({selector, buttonText, waitMs, quietMs, graceMs}) => {
+    const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+    const count = () => document.querySelectorAll(selector).length;
+    const before = count();
+    const button = Array.from(document.querySelectorAll('button, a, [role="button"]')).find((el) =>
+        (el.innerText || '').includes(buttonText) && el.offsetParent !== null
+        && !el.disabled && el.getAttribute('aria-disabled') !== 'true');
+    if (!button) {
+        const root = document.scrollingElement || document.documentElement;
+        if (window.scrollY + window.innerHeight >= root.scrollHeight - 2) {
+            return 0;
+        }
+    }
+
+    // Notice requests the click or scroll starts (infinite scroll fetches the next page)
+    let requests = 0;
+    const fetch = window.fetch;
+    const send = XMLHttpRequest.prototype.send;
+    window.fetch = function (...args) {
+        requests++;
+        return fetch.apply(this, args);
+    };
+    XMLHttpRequest.prototype.send = function (...args) {
+        requests++;
+        return send.apply(this, args);
+    };
+    try {
+        if (button) {
+            button.scrollIntoView({block: 'center'});
+            button.click();
+        } else {
+            window.scrollTo(0, document.documentElement.scrollHeight);
+        }
+        const start = performance.now();
+        let last = before;
+        let since = start;
+        while (true) {
+            await sleep(50);
+            const now = performance.now();
+            const current = count();
+            if (current !== last) {
+                last = current;
+                since = now;
+            } else if (current > before) {
+                if (now - since >= quietMs) return current - before;
+            } else if (now - start >= (button || requests ? waitMs : graceMs)) {
+                return 0;
+            }
+        }
+    } finally {
+        window.fetch = fetch;
+        XMLHttpRequest.prototype.send = send;
+    }
+}
+"""
+
+# HTML of every card matching the first product selector that matches any
+# (null when only the tab fallback would find products)
+CARDS_HTML_JS = """
+(selectors) => {
+    for (const selector of selectors) {
+        const cards = document.querySelectorAll(selector);
+        if (cards.length) return Array.from(cards, (card) => card.outerHTML).join('\\n');
+    }
+    return null;
+}
+"""
+
+# Any card or tabpanel item, used to detect that the product grid rendered
+ANY_CARD_SELECTOR = ", ".join(PRODUCT_SELECTORS + [TABPANEL_ITEM_SELECTOR])
+
+# True once the number of cards has not changed for quietMs (polled in the page)
+CARDS_STABLE_JS = """
+([selector, quietMs]) => {
+    const count = document.querySelectorAll(selector).length;
+    const now = performance.now();
+    const state = window.__lgCardCount || (window.__lgCardCount = {count: -1, since: now});
+    if (count !== state.count) {
+        state.count = count;
+        state.since = now;
+        return false;
+    }
+    return count > 0 && now - state.since >= quietMs;
+}
+"""
+
+# Walks every tab of the page inside the browser and returns
+# {"cards": [...], "links": [...]}. Button tabs are clicked one after another
+# and their panel read once its item count settles; list items are filtered
+# and deduplicated in the page. Tabs that are real links are returned so the
+# caller can load them in parallel pages.
+TAB_CRAWL_JS = """
+async ({clickTabs, quietMs, timeoutMs}) => {
+    const readCard = %s;
+    const panelSelector = %s;
+    const tabSelector = %s;
+    const isProduct = (text) => text.includes('할인') && (text.includes('판매가') || text.includes('정가'));
+    const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+    const seen = new Set();
+    const cards = [];
+    const links = [];
+
+    const collect = (panel, tab) => {
+        for (const item of panel.querySelectorAll('li')) {
+            const card = readCard(item);
+            if (!isProduct(card.text)) continue;
+            const key = card.href + '\\u0000' + card.text;
+            if (seen.has(key)) continue;
+            seen.add(key);
+            card.tab = tab;
+            cards.push(card);
+        }
+    };
+    const panelFor = (tab) => {
+        const id = tab.getAttribute('aria-controls');
+        return (id && document.getElementById(id))
+            || document.querySelector(panelSelector + ':not([hidden])');
+    };
+    const waitStable = async (tab) => {
+        const start = performance.now();
+        let last = -1;
+        let since = start;
+        while (performance.now() - start < timeoutMs) {
+            const panel = panelFor(tab);
+            const count = panel ? panel.querySelectorAll('li').length : 0;
+            const now = performance.now();
+            if (count !== last) {
+                last = count;
+                since = now;
+            } else if (count > 0 && now - since >= quietMs) {
+                return;
+            }
+            await sleep(100);
+        }
+    };
+
+    // Panels that are already rendered, active or not
+    for (const panel of document.querySelectorAll(panelSelector)) {
+        collect(panel, '');
+    }
+    if (!clickTabs) return {cards, links};
+
+    for (const tab of document.querySelectorAll(tabSelector)) {
+        const label = (tab.innerText || '').trim();
+        const href = tab.getAttribute('href') || '';
+        if (href && !href.startsWith('#') && !href.startsWith('javascript:')) {
+            links.push({label: label, href: tab.href});
+            continue;
+        }
+        if (tab.getAttribute('aria-selected') !== 'true') {
+            tab.click();
+            await waitStable(tab);
+        }
+        const panel = panelFor(tab);
+        if (panel) collect(panel, label);
+    }
+    return {cards, links};
+}
+""" % (READ_CARD_JS, json.dumps(TABPANEL_SELECTOR), json.dumps(TAB_SELECTOR))
+
+
+def merge_tab_cards(card_lists: List[List[Dict]]) -> List[Dict]:
+    """Merge cards collected from several tabs, dropping repeats."""
+    seen = set()
+    merged = []
+    for cards in card_lists:
+        for card in cards:
+            key = (card.get("href"), card.get("text"))
+            if key not in seen:
+                seen.add(key)
+                merged.append(card)
+    return merged
+
+
+_http_session: Optional[requests.Session] = None
+
+
+def http_session() -> requests.Session:
+    """Keep-alive session shared by every plain-HTTP fetch of this process."""
+    global _http_session
+    if _http_session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update({
+            "User-Agent": HTTP_USER_AGENT,
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+            "Accept-Language": "ko-KR,ko;q=0.9,en;q=0.8",
+        })
+        _http_session = session
+    return _http_session
+
+
+def valid_http_products(products: List[Dict], card_count: int) -> bool:
+    """Check products read from plain HTML before trusting them over the browser.
+    
+    Needs products, most of them with a sale price, parsed from most of the
+    cards found (a skeleton page or changed markup fails this).
+    """
+    if not products:
+        return False
+    priced = sum(1 for product in products if product.get('sale_price'))
+    if priced * 2 < len(products):
+        return False
+    return card_count == 0 or len(products) * 2 >= card_count
+
+
+def snapshot_tag(url: str) -> str:
+    """Short file-name-safe tag for a page URL (its last path segment)."""
+    return re.sub(r'[^A-Za-z0-9_-]+', '-', url.rstrip('/').rsplit('/', 1)[-1])[:40] or "page"
+
 
 class LGTimedealCrawler:
     """Crawler for LG Time Deal products."""
     
-    def __init__(self):
-        self.url = LG_TIMEDEAL_URL
+    def __init__(self, extraction_mode: str = EXTRACTION_MODE,
+                 page_load_profile: str = PAGE_LOAD_PROFILE,
+                 network_capture: bool = NETWORK_CAPTURE, url: str = LG_TIMEDEAL_URL,
+                 skip_unchanged: bool = False, tiers: Optional[List[str]] = None):
+        self.url = url
         self.products = []
+        # "bulk": one page.evaluate per page, "handle": per-element round trips
+        self.extraction_mode = extraction_mode
+        # "fast": blocked resources + readiness conditions, "legacy": networkidle + 3s
+        self.page_load_profile = page_load_profile
+        self.blocked_resource_types = set(BLOCKED_RESOURCE_TYPES)
+        self.blocked_url_pattern = (
+            re.compile("|".join(re.escape(p) for p in BLOCKED_URL_PATTERNS))
+            if BLOCKED_URL_PATTERNS else None
+        )
+        self.timer = PhaseTimer()
+        # Build products from captured API responses, DOM extraction as fallback
+        self.network_capture = network_capture
+        # Where the last crawl's products came from: "network" or "dom"
+        self.extraction_source = None
+        # Fetch tiers tried in order ("http", "browser"), and the one that served the last crawl
+        self.tiers = tiers if tiers is not None else FETCH_TIERS
+        self.tier: Optional[str] = None
+        # Skip extraction when the page fingerprint matches the last processed run
+        self.skip_unchanged = skip_unchanged
+        self.fingerprint: Optional[str] = None
+        self.unchanged = False
+        # Error that ended the last crawl early, and when its page finished loading
+        self.error: Optional[Exception] = None
+        self.loaded_at: Optional[float] = None
+        # Products may be missing although nothing failed (e.g. a budget was reached)
+        self.partial = False
+        # time.monotonic() after which extraction stops loading more cards
+        self.deadline = 0.0
         
     def extract_price(self, text: str) -> Optional[int]:
         """Extract price from text (remove commas and '원')."""
-        if not text:
-            return None
-        # Remove commas and '원', then extract numbers
-        price_str = re.sub(r'[,\s원]', '', text)
-        try:
-            return int(price_str)
-        except ValueError:
-            return None
+        return parse_price(text)
     
     def extract_discount_rate(self, text: str) -> Optional[int]:
         """Extract discount rate from text."""
-        if not text:
-            return None
-        # Extract number before %
-        match = re.search(r'(\d+)%', text)
-        if match:
-            try:
-                return int(match.group(1))
-            except ValueError:
-                return None
-        return None
+        return parse_discount_rate(text)
     
     def extract_stock(self, text: str) -> Optional[int]:
         """Extract stock quantity from text."""
-        if not text:
+        return parse_stock(text)
+    
+    def read_card_handle(self, product_element) -> Dict:
+        """Read a card element into a plain dict using per-handle calls."""
+        card = {
+            "name": "",
+            "href": "",
+            "ec_product": product_element.get_attribute('data-ec-product') or "",
+            "text": product_element.inner_text(),
+        }
+        
+        for selector in NAME_SELECTORS:
+            name_element = product_element.query_selector(selector)
+            if name_element:
+                card["name"] = name_element.inner_text().strip()
+                card["href"] = name_element.get_attribute('href') or ""
+                break
+        
+        return card
+    
+    def parse_card(self, card: Dict) -> Optional[Dict]:
+        """Parse product information from a card dict (no browser calls)."""
+        try:
+            with self.timer.phase("parse"):
+                return parse_card(card)
+        except Exception as e:
+            logger.error(f"Error extracting product info: {e}")
             return None
-        # Extract number before '개 남음'
-        match = re.search(r'(\d+)개\s*남음', text)
-        if match:
-            try:
-                return int(match.group(1))
-            except ValueError:
-                return None
-        return None
     
     def extract_product_info(self, page: Page, product_element) -> Optional[Dict]:
         """Extract product information from a product element."""
         try:
-            # Get all text content first
-            full_text = product_element.inner_text()
-            
-            # Skip if doesn't contain essential product info
-            if '할인' not in full_text or '판매가' not in full_text:
-                return None
-            
-            # Get product name - try multiple selectors
-            product_name = ""
-            product_link = ""
-            
-            # Try to find product name link
-            name_selectors = [
-                'a[href*="/"]',
-                'a[href*="lge.co.kr"]',
-                'link',
-            ]
-            
-            for selector in name_selectors:
-                name_element = product_element.query_selector(selector)
-                if name_element:
-                    product_name = name_element.inner_text().strip()
-                    product_link = name_element.get_attribute('href') or ""
-                    if product_link and not product_link.startswith('http'):
-                        product_link = f"https://www.lge.co.kr{product_link}"
-                    break
-            
-            # If no name found, try to extract from text
-            if not product_name:
-                # Look for product name pattern (usually before model number)
-                name_match = re.search(r'^([^0-9]+?)([A-Z0-9]{6,})', full_text)
-                if name_match:
-                    product_name = name_match.group(1).strip()
-                else:
-                    # Fallback: take first line or first meaningful text
-                    lines = [line.strip() for line in full_text.split('\n') if line.strip()]
-                    if lines:
-                        product_name = lines[0]
+            card = self.read_card_handle(product_element)
+        except Exception as e:
+            logger.error(f"Error extracting product info: {e}")
+            return None
+        return self.parse_card(card)
+    
+    def crawl(self, browser: Optional[Browser] = None,
+              context: Optional[BrowserContext] = None) -> List[Dict]:
+        """Crawl products from LG Time Deal page.
+        
+        Pass a running browser or context (e.g. from BrowserManager) to reuse
+        it; by default a fresh browser is launched and closed for this crawl.
+        """
+        return list(self.iter_crawl(browser, context))
+    
+    def iter_crawl(self, browser: Optional[Browser] = None,
+                   context: Optional[BrowserContext] = None,
+                   tiers: Optional[List[str]] = None,
+                   later_tiers: Optional[List[str]] = None) -> Iterator[Dict]:
+        """Crawl the page, yielding each product as soon as it is parsed.
+        
+        The fetch tiers (default self.tiers) are tried in order: the "http"
+        tier needs no browser, the "browser" tier runs only if it found no
+        valid products. later_tiers are the tiers the caller runs itself
+        when these leave self.tier unset (e.g. the browser in another
+        thread), so a partial plain-HTML list still goes on to them. The page
+        (and a browser launched for the crawl) stays open until the generator
+        is exhausted or closed; all products end up in self.products.
+        """
+        tiers = tiers if tiers is not None else self.tiers
+        later_tiers = later_tiers or []
+        logger.info(f"Starting crawl of {self.url}")
+        self.timer = PhaseTimer()
+        self.products = []
+        self.fingerprint = None
+        self.unchanged = False
+        self.error = None
+        self.loaded_at = None
+        self.partial = False
+        self.tier = None
+        
+        try:
+            if "http" in tiers:
+                yield from self._iter_http(last_tier="browser" not in tiers + later_tiers)
+                if self.tier is not None:
+                    return
+            if "browser" not in tiers and later_tiers:
+                return
+            if "browser" not in tiers:
+                logger.warning(f"No products from fetch tiers {', '.join(tiers)}")
+                self.error = RuntimeError(f"No products from fetch tiers {', '.join(tiers)}")
+                return
             
-            # Extract model number - look for alphanumeric codes (usually 6+ chars)
-            model_number = ""
-            model_match = re.search(r'\b([A-Z]{2,}\d{2,}[A-Z0-9]*)\b', full_text)
-            if model_match:
-                model_number = model_match.group(1)
+            self.tier = "browser"
+            if context is not None:
+                yield from self._iter_in_context(context)
+                return
             
-            # Extract discount rate
-            discount_rate = None
-            discount_match = re.search(r'할인\s*율[^\d]*(\d+)%', full_text)
-            if discount_match:
-                discount_rate = int(discount_match.group(1))
-            else:
-                # Try alternative pattern
-                discount_match = re.search(r'(\d+)%\s*할인', full_text)
-                if discount_match:
-                    discount_rate = int(discount_match.group(1))
+            if browser is not None:
+                context = browser.new_context()
+                try:
+                    yield from self._iter_in_context(context)
+                finally:
+                    context.close()
+                return
             
-            # Extract sale price (할인 후 판매가)
-            sale_price = None
-            sale_match = re.search(r'할인\s*후\s*판매가[^\d]*([\d,]+)', full_text)
-            if sale_match:
-                sale_price = self.extract_price(sale_match.group(1))
-            else:
-                # Try alternative: look for price after "할인 후"
-                sale_match = re.search(r'할인\s*후[^\d]*([\d,]+)', full_text)
-                if sale_match:
-                    sale_price = self.extract_price(sale_match.group(1))
+            with sync_playwright() as p:
+                with self.timer.phase("launch"):
+                    browser = p.chromium.launch(headless=True)
+                try:
+                    yield from self._iter_in_context(browser.new_context())
+                finally:
+                    browser.close()
+        finally:
+            if self.tier is not None:
+                self.timer.count(f"tier_{self.tier}")
+            logger.info(f"Crawl timings ({self.tier or 'no'} tier): {self.timer.summary()}")
+            current_run().merge(self.timer)
+    
+    def _iter_http(self, last_tier: bool = False) -> Iterator[Dict]:
+        """Fast path: products from one plain GET of the page, parsed without a browser.
+        
+        Yields nothing and leaves self.tier unset when the request fails, the
+        HTML holds no valid products or only part of the list (more to load,
+        pages or tabs), so the next tier runs instead. As the last tier, a
+        partial list is kept and the crawl marked partial.
+        """
+        # Imported here so browser-only crawls do not need selectolax
+        try:
+            from replay import embedded_payloads, extract_cards_from_html, unloaded_content
+        except ImportError as e:
+            logger.warning(f"Plain HTTP tier unavailable ({e}), trying the next tier")
+            return
+        
+        cards = []
+        try:
+            with self.timer.phase("http"):
+                response = http_session().get(self.url, timeout=HTTP_TIMEOUT)
+                response.raise_for_status()
+                html = response.text
+            with self.timer.phase("http_parse"):
+                # Data embedded for the page's scripts, else the server-rendered cards
+                payloads = embedded_payloads(html, self.url)
+                products = products_from_payloads(payloads)
+                if not products:
+                    payloads = []
+                    cards = extract_cards_from_html(html)
+                    products = list(self.iter_parse_cards(cards))
+                missing = unloaded_content(html, LOAD_MORE_TEXT if LOAD_MORE else "")
+        except Exception as e:
+            logger.warning(f"Plain HTTP fetch of {self.url} failed: {e}")
+            return
+        
+        if not valid_http_products(products, len(cards)):
+            logger.info(f"No valid products in the plain HTML of {self.url} "
+                        f"({len(products)} from {len(cards)} cards), trying the next tier")
+            return
+        if missing:
+            if not last_tier:
+                logger.info(f"The plain HTML of {self.url} holds only part of the list ({missing}), "
+                            "trying the next tier")
+                return
+            logger.warning(f"The plain HTML of {self.url} holds only part of the list ({missing})")
+            self.partial = True
+        
+        self.tier = "http"
+        self.extraction_source = "network" if payloads else "dom"
+        self.loaded_at = time.perf_counter()
+        self.timer.count("cards_found", len(cards))
+        if payloads:
+            self.timer.count("api_products", len(products))
+        
+        if self.skip_unchanged:
+            self.fingerprint = payload_fingerprint(payloads) or html_fingerprint(
+                json.dumps(cards, ensure_ascii=False)
+            )
+            if self.fingerprint == FingerprintStore().get(self.url):
+                self.unchanged = True
+                self.timer.count("fingerprint_hit")
+                logger.info("Page unchanged since the last run, skipping extraction")
+                return
+            self.timer.count("fingerprint_miss")
+        
+        yield from self._collect(products)
+        
+        if SAVE_SNAPSHOTS:
+            with self.timer.phase("snapshot"):
+                try:
+                    self.save_snapshot(html)
+                    if payloads:
+                        save_payloads(payloads, snapshot_tag(self.url))
+                except Exception as e:
+                    logger.warning(f"Failed to save snapshot: {e}")
+    
+    def _collect(self, products: Iterable[Dict]) -> Iterator[Dict]:
+        """Yield new products into self.products, dropping duplicates and timing extraction."""
+        # Timed per product, excluding the time the consumer holds each one
+        extract_time = 0.0
+        start = time.perf_counter()
+        seen = set()
+        duplicates = 0
+        for product in products:
+            # The same card can be reached twice (nested matches, tabs, payloads)
+            key = product_key(product)
+            if key in seen:
+                duplicates += 1
+                continue
+            seen.add(key)
+            extract_time += time.perf_counter() - start
+            self.products.append(product)
+            yield product
+            start = time.perf_counter()
+        self.timer.record("extract", extract_time + time.perf_counter() - start)
+        self.timer.count("duplicates_dropped", duplicates)
+        
+        logger.info(f"Crawled {len(self.products)} products ({duplicates} duplicates dropped)")
+    
+    def _iter_in_context(self, context: BrowserContext) -> Iterator[Dict]:
+        """Crawl the page in a new tab of the given context."""
+        self.products = []
+        page = context.new_page()
+        capture = ResponseCapture() if self.network_capture else None
+        payloads = []
+        
+        try:
+            if capture is not None:
+                capture.attach(page)
             
-            # Extract original price (할인 전 정가)
-            original_price = None
-            original_match = re.search(r'할인\s*전\s*정가[^\d]*([\d,]+)', full_text)
-            if original_match:
-                original_price = self.extract_price(original_match.group(1))
-            else:
-                # Try alternative pattern
-                original_match = re.search(r'정가[^\d]*([\d,]+)', full_text)
-                if original_match:
-                    original_price = self.extract_price(original_match.group(1))
+            self.load_page(page)
+            self.loaded_at = time.perf_counter()
+            self.deadline = time.monotonic() + EXTRACT_BUDGET_MS / 1000
             
-            # Extract max benefit price (최대혜택가)
-            max_benefit_price = None
-            max_benefit_match = re.search(r'최대혜택가[^\d]*([\d,]+)', full_text)
-            if max_benefit_match:
-                max_benefit_price = self.extract_price(max_benefit_match.group(1))
+            with self.timer.phase("select"):
+                selector = self.find_card_selector(page, PRODUCT_SELECTORS)
+            load_more = LOAD_MORE and selector is not None
+            payloads = capture.payloads() if capture is not None else []
             
-            # Extract stock
-            stock = self.extract_stock(full_text)
+            # A paginated API has only answered its first page so far, and the
+            # fingerprint has to cover the whole list: load everything first
+            if load_more and (self.skip_unchanged or products_from_payloads(payloads)):
+                self.load_all(page, selector)
+                load_more = False
+                payloads = capture.payloads() if capture is not None else []
             
-            # Only return if we have at least a name
-            if not product_name:
-                return None
+            if self.skip_unchanged:
+                with self.timer.phase("fingerprint"):
+                    self.fingerprint = self.page_fingerprint(page, payloads)
+                if self.fingerprint is not None and self.fingerprint == FingerprintStore().get(self.url):
+                    self.unchanged = True
+                    self.timer.count("fingerprint_hit")
+                    logger.info("Page unchanged since the last run, skipping extraction")
+                    return
+                self.timer.count("fingerprint_miss")
             
-            product_info = {
-                "name": product_name,
-                "model": model_number,
-                "link": product_link,
-                "discount_rate": discount_rate,
-                "sale_price": sale_price,
-                "original_price": original_price,
-                "max_benefit_price": max_benefit_price,
-                "stock": stock,
-            }
+            yield from self._collect(self._iter_extract(page, payloads, selector, load_more))
             
-            return product_info
+            # Saved after extraction so it does not delay the first product
+            if SAVE_SNAPSHOTS:
+                self._save_snapshots(page, payloads)
             
         except Exception as e:
-            logger.error(f"Error extracting product info: {e}")
-            return None
+            # Products already yielded stay valid; callers check self.error
+            logger.error(f"Error during crawl: {e}")
+            self.error = e
+            if SAVE_SNAPSHOTS and self.loaded_at is not None:
+                self._save_snapshots(page, payloads)
+        finally:
+            try:
+                page.close()
+            except Exception as e:
+                logger.warning(f"Failed to close page: {e}")
     
-    def crawl(self) -> List[Dict]:
-        """Crawl products from LG Time Deal page."""
-        logger.info(f"Starting crawl of {self.url}")
+    def _save_snapshots(self, page: Page, payloads: List[Dict]):
+        """Save the rendered page and captured payloads for offline replay."""
+        with self.timer.phase("snapshot"):
+            try:
+                self.save_snapshot(page.content())
+                if payloads:
+                    save_payloads(payloads, snapshot_tag(self.url))
+            except Exception as e:
+                logger.warning(f"Failed to save snapshot: {e}")
+    
+    def _iter_extract(self, page: Page, payloads: List[Dict], selector: Optional[str],
+                      load_more: bool) -> Iterator[Dict]:
+        """Products from captured API responses, else from the cards matching selector.
+        
+        With load_more, more cards are loaded between batches. Without a
+        selector, the tab fallback is used.
+        """
+        products = products_from_payloads(payloads)
+        if products:
+            self.extraction_source = "network"
+            self.timer.count("api_products", len(products))
+            logger.info(f"Extracted {len(products)} products from captured API responses")
+            yield from products
+            return
+        
+        self.extraction_source = "dom"
+        if self.extraction_mode == "bulk":
+            yield from self._iter_bulk(page, selector, load_more)
+        else:
+            yield from self._iter_by_handle(page, selector, load_more)
+    
+    def _load_more(self, page: Page, selector: str) -> int:
+        """Click "load more" or scroll once; returns how many cards were added."""
+        with self.timer.phase("load_more"):
+            added = page.evaluate(LOAD_MORE_JS, {
+                "selector": selector, "buttonText": LOAD_MORE_TEXT,
+                "waitMs": LOAD_MORE_WAIT_MS, "quietMs": CARD_STABLE_MS, "graceMs": LOAD_MORE_GRACE_MS,
+            })
+        if added > 0:
+            self.timer.count("load_more_steps")
+        return added
+    
+    def _over_budget(self, cards: int) -> bool:
+        """Check the card and time budgets, marking the crawl partial when one is reached."""
+        if cards >= MAX_CARDS:
+            logger.warning(f"Stopped at the card budget of {MAX_CARDS} cards")
+        elif time.monotonic() > self.deadline:
+            logger.warning(f"Stopped after the extraction budget of {EXTRACT_BUDGET_MS} ms")
+        else:
+            return False
+        self.partial = True
+        return True
+    
+    def load_all(self, page: Page, selector: str) -> int:
+        """Load more cards until their count stops growing, without reading them.
+        
+        Returns the card count. Stops at the MAX_CARDS / EXTRACT_BUDGET_MS
+        budgets, marking the crawl partial.
+        """
+        count = page.evaluate("(selector) => document.querySelectorAll(selector).length", selector)
+        while not self._over_budget(count):
+            added = self._load_more(page, selector)
+            if added <= 0:
+                break
+            count += added
+        logger.info(f"Loaded {count} cards")
+        return count
+    
+    def _iter_pages(self, page: Page, selector: str, read_batch, load_more: bool = True) -> Iterator[Dict]:
+        """Extract cards batch by batch, loading more until the count stops growing.
         
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
+        read_batch(page, selector, limit) returns up to limit cards not read
+        before. Stops at MAX_CARDS cards or after EXTRACT_BUDGET_MS, marking
+        the crawl partial.
+        """
+        total = 0
+        while True:
+            cards = read_batch(page, selector, MAX_CARDS - total)
+            total += len(cards)
+            self.timer.count("cards_found", len(cards))
+            logger.info(f"Read {len(cards)} new cards ({total} total)")
+            yield from self.iter_parse_cards(cards)
             
+            if total >= MAX_CARDS:
+                # More cards may be on the page, read or not
+                self._over_budget(total)
+                return
+            if not load_more or self._over_budget(total) or self._load_more(page, selector) <= 0:
+                return
+    
+    def _read_batch_bulk(self, page: Page, selector: str, limit: int) -> List[Dict]:
+        """Read new cards in one page.evaluate call."""
+        return page.evaluate(READ_NEW_CARDS_JS, [selector, limit])
+    
+    def _read_batch_by_handle(self, page: Page, selector: str, limit: int) -> List[Dict]:
+        """Read new cards through element handles, disposing of each one.
+        
+        The batch is cut to limit inside the page, so at most one batch of
+        handles is alive however many cards are loaded.
+        """
+        cards = []
+        elements = page.evaluate_handle(UNREAD_CARD_ELEMENTS_JS, [selector, limit])
+        handles = [handle.as_element() for handle in elements.get_properties().values()]
+        elements.dispose()
+        for element in handles:
             try:
+                cards.append(self.read_card_handle(element))
+                element.evaluate(f"(el) => el.setAttribute('{READ_MARK}', '')")
+            except Exception as e:
+                logger.error(f"Error extracting product info: {e}")
+            finally:
+                element.dispose()
+        return cards
+    
+    def page_fingerprint(self, page: Page, payloads: List[Dict]) -> Optional[str]:
+        """Fingerprint the loaded product list: captured API payloads, else card HTML.
+        
+        None when neither is available (only the tab fallback would find
+        products, whose hidden tabs are not loaded yet), so the run is never skipped.
+        """
+        fingerprint = payload_fingerprint(payloads)
+        if fingerprint is not None:
+            return fingerprint
+        cards_html = page.evaluate(CARDS_HTML_JS, PRODUCT_SELECTORS)
+        return html_fingerprint(cards_html) if cards_html else None
+    
+    def commit_fingerprint(self):
+        """Remember this run's fingerprint once its products were fully processed."""
+        if self.fingerprint is not None:
+            FingerprintStore().set(self.url, self.fingerprint)
+    
+    def load_page(self, page: Page):
+        """Navigate to the exhibition page and wait until products are rendered."""
+        if self.page_load_profile != "fast":
+            with self.timer.phase("goto"):
                 page.goto(self.url, wait_until="networkidle", timeout=60000)
-                
-                # Wait for products to load
+            
+            # Wait for products to load
+            with self.timer.phase("ready"):
                 page.wait_for_timeout(3000)
-                
-                # Find all product elements with data-ec-product attribute
-                products = []
-                
-                # Try multiple selectors to find products
-                selectors = [
-                    '[data-ec-product]',
-                    '.product-item',
-                    'li[class*="product"]',
-                    'div[class*="product"]',
-                ]
-                
-                product_elements = []
-                for selector in selectors:
-                    elements = page.query_selector_all(selector)
-                    if elements:
-                        product_elements = elements
-                        logger.info(f"Found {len(elements)} products using selector: {selector}")
-                        break
-                
-                # If no products found with data-ec-product, try to find by tabpanel content
-                if not product_elements:
-                    # Get all tabpanels
-                    tabpanels = page.query_selector_all('div[role="tabpanel"]')
-                    logger.info(f"Found {len(tabpanels)} tabpanels")
-                    
-                    for tabpanel in tabpanels:
-                        # Find all list items in tabpanel
-                        list_items = tabpanel.query_selector_all('li')
-                        for item in list_items:
-                            # Check if it contains product information
-                            text = item.inner_text()
-                            if '할인' in text and ('판매가' in text or '정가' in text):
-                                product_elements.append(item)
-                
-                # Also try to find products by data-ec-product attribute using JavaScript
-                if not product_elements:
-                    try:
-                        # Execute JavaScript to find all elements with data-ec-product
-                        product_elements_js = page.evaluate("""
-                            () => {
-                                const products = document.querySelectorAll('[data-ec-product]');
-                                return Array.from(products).map(el => ({
-                                    name: el.querySelector('a')?.textContent?.trim() || '',
-                                    link: el.querySelector('a')?.href || '',
-                                    text: el.innerText
-                                }));
-                            }
-                        """)
-                        
-                        if product_elements_js:
-                            logger.info(f"Found {len(product_elements_js)} products via JavaScript")
-                            # Re-query elements to get actual DOM elements
-                            product_elements = page.query_selector_all('[data-ec-product]')
-                    except Exception as e:
-                        logger.warning(f"JavaScript product detection failed: {e}")
-                
-                logger.info(f"Total product elements found: {len(product_elements)}")
-                
-                # Extract product information
-                for element in product_elements:
-                    product_info = self.extract_product_info(page, element)
-                    if product_info and product_info.get('name'):
-                        products.append(product_info)
-                        logger.info(f"Extracted: {product_info['name']}")
-                
-                browser.close()
-                
-                logger.info(f"Crawled {len(products)} products")
-                self.products = products
-                return products
-                
-            except Exception as e:
-                logger.error(f"Error during crawl: {e}")
-                browser.close()
-                return []
+            return
+        
+        page.route("**/*", self._route_request)
+        
+        with self.timer.phase("goto"):
+            page.goto(self.url, wait_until="domcontentloaded", timeout=60000)
+        
+        # Wait for the first card, then until the card count stops changing
+        with self.timer.phase("ready"):
+            try:
+                page.wait_for_selector(ANY_CARD_SELECTOR, timeout=READY_TIMEOUT_MS)
+                page.wait_for_function(
+                    CARDS_STABLE_JS,
+                    arg=[ANY_CARD_SELECTOR, CARD_STABLE_MS],
+                    polling=100,
+                    timeout=READY_TIMEOUT_MS,
+                )
+            except PlaywrightTimeoutError:
+                logger.warning("Timed out waiting for product cards, extracting what is rendered")
+    
+    def is_blocked(self, request) -> bool:
+        """Check if a request is for a resource the extractor never reads."""
+        return request.resource_type in self.blocked_resource_types or bool(
+            self.blocked_url_pattern and self.blocked_url_pattern.search(request.url)
+        )
+    
+    def _route_request(self, route: Route):
+        """Abort requests for resources the extractor never reads."""
+        if self.is_blocked(route.request):
+            route.abort()
+        else:
+            route.continue_()
+    
+    def parse_cards(self, cards: List[Dict]) -> List[Dict]:
+        """Parse card dicts into product dicts."""
+        return list(self.iter_parse_cards(cards))
+    
+    def iter_parse_cards(self, cards: List[Dict]) -> Iterator[Dict]:
+        """Parse card dicts, yielding each product dict as it is parsed."""
+        for card in cards:
+            product_info = self.parse_card(card)
+            if product_info and product_info.get('name'):
+                self.timer.count("cards_parsed")
+                logger.info(f"Extracted: {product_info['name']}")
+                yield product_info
+            else:
+                self.timer.count("parse_failures")
+    
+    def _iter_bulk(self, page: Page, selector: Optional[str], load_more: bool) -> Iterator[Dict]:
+        """Extract products reading all cards in one round trip per batch."""
+        if selector is not None:
+            yield from self._iter_pages(page, selector, self._read_batch_bulk, load_more)
+            return
+        
+        # If no products found with the selectors, walk every tab's panel
+        with self.timer.phase("tabs"):
+            cards = self.crawl_tabs(page)
+        
+        self.timer.count("cards_found", len(cards))
+        logger.info(f"Total product elements found: {len(cards)}")
+        yield from self.iter_parse_cards(cards)
+    
+    def find_card_selector(self, page: Page, selectors: List[str]) -> Optional[str]:
+        """First selector matching any card on the page, restricted by CARD_NESTING."""
+        for selector in selectors:
+            cards = card_selector(selector)
+            matches, count = page.evaluate(
+                "(selectors) => selectors.map((s) => document.querySelectorAll(s).length)", [selector, cards]
+            )
+            if count:
+                if matches > count:
+                    self.timer.count("nested_cards_skipped", matches - count)
+                    logger.info(f"Skipped {matches - count} nested matches of {selector}")
+                logger.info(f"Found {count} products using selector: {selector}")
+                return cards
+        return None
+    
+    def crawl_tabs(self, page: Page) -> List[Dict]:
+        """Collect product list items from every tab of the page.
+        
+        Button tabs are clicked and read inside the page in one evaluate call;
+        tabs that link to other pages are loaded in parallel pages.
+        """
+        result = page.evaluate(
+            TAB_CRAWL_JS, {"clickTabs": True, "quietMs": CARD_STABLE_MS, "timeoutMs": TAB_TIMEOUT_MS}
+        )
+        card_lists = [result["cards"]]
+        links = result["links"]
+        logger.info(f"Found {len(result['cards'])} tabpanel products, {len(links)} linked tabs")
+        
+        if links:
+            # Start every navigation before waiting on any, so they load in parallel
+            tab_pages = []
+            for link in links:
+                tab_page = page.context.new_page()
+                if self.page_load_profile == "fast":
+                    tab_page.route("**/*", self._route_request)
+                try:
+                    tab_page.goto(link["href"], wait_until="commit", timeout=60000)
+                    tab_pages.append((link, tab_page))
+                except Exception as e:
+                    logger.warning(f"Failed to open tab {link['label']}: {e}")
+                    tab_page.close()
+            
+            for link, tab_page in tab_pages:
+                try:
+                    tab_page.wait_for_load_state("domcontentloaded")
+                    tab_page.wait_for_selector(TABPANEL_ITEM_SELECTOR, timeout=READY_TIMEOUT_MS)
+                    tab_result = tab_page.evaluate(
+                        TAB_CRAWL_JS,
+                        {"clickTabs": False, "quietMs": CARD_STABLE_MS, "timeoutMs": TAB_TIMEOUT_MS},
+                    )
+                    for card in tab_result["cards"]:
+                        card["tab"] = link["label"]
+                    card_lists.append(tab_result["cards"])
+                except Exception as e:
+                    logger.warning(f"Failed to read tab {link['label']}: {e}")
+                finally:
+                    tab_page.close()
+        
+        return merge_tab_cards(card_lists)
     
-    def save_products(self, products: Optional[List[Dict]] = None):
-        """Save products to JSON file."""
+    def _iter_by_handle(self, page: Page, selector: Optional[str], load_more: bool) -> Iterator[Dict]:
+        """Extract products with per-element round trips (legacy path)."""
+        if selector is not None:
+            yield from self._iter_pages(page, selector, self._read_batch_by_handle, load_more)
+            return
+        
+        # If no products found with data-ec-product, try to find by tabpanel content
+        product_elements = []
+        tabpanels = page.query_selector_all(TABPANEL_SELECTOR)
+        logger.info(f"Found {len(tabpanels)} tabpanels")
+        
+        for tabpanel in tabpanels:
+            # Find all list items in tabpanel
+            list_items = tabpanel.query_selector_all('li')
+            for item in list_items:
+                # Check if it contains product information
+                if is_product_text(item.inner_text()):
+                    product_elements.append(item)
+        
+        self.timer.count("cards_found", len(product_elements))
+        logger.info(f"Total product elements found: {len(product_elements)}")
+        
+        # Extract product information
+        for element in product_elements:
+            product_info = self.extract_product_info(page, element)
+            if product_info and product_info.get('name'):
+                self.timer.count("cards_parsed")
+                logger.info(f"Extracted: {product_info['name']}")
+                yield product_info
+            else:
+                self.timer.count("parse_failures")
+    
+    @timed("save_products")
+    def save_products(self, products: Optional[List[Dict]] = None) -> str:
+        """Save products as the current snapshot (atomic, see storage.py); returns its path."""
         if products is None:
             products = self.products
+        return storage.save_products(products)
+    
+    def save_snapshot(self, html: str) -> str:
+        """Save the rendered page HTML for offline replay."""
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
         
-        # Create data directory if it doesn't exist
-        os.makedirs(DATA_DIR, exist_ok=True)
+        path = os.path.join(
+            SNAPSHOT_DIR, f"snapshot-{datetime.now():%Y%m%d-%H%M%S}-{snapshot_tag(self.url)}.html"
+        )
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(html)
+        logger.info(f"Saved page snapshot to {path}")
         
-        # Save to JSON
-        with open(PRODUCTS_JSON, 'w', encoding='utf-8') as f:
-            json.dump(products, f, ensure_ascii=False, indent=2)
+        # Keep only the most recent snapshots
+        snapshots = sorted(
+            name for name in os.listdir(SNAPSHOT_DIR)
+            if name.startswith("snapshot-") and name.endswith(".html")
+        )
+        for name in snapshots[:-SNAPSHOT_KEEP]:
+            os.remove(os.path.join(SNAPSHOT_DIR, name))
         
-        logger.info(f"Saved {len(products)} products to {PRODUCTS_JSON}")
+        return path
     
     def load_products(self) -> List[Dict]:
-        """Load products from JSON file."""
-        if os.path.exists(PRODUCTS_JSON):
-            with open(PRODUCTS_JSON, 'r', encoding='utf-8') as f:
-                products = json.load(f)
-            logger.info(f"Loaded {len(products)} products from {PRODUCTS_JSON}")
-            return products
-        return []
+        """Load the products of the current snapshot."""
+        products = storage.load_products()
+        if products:
+            logger.info(f"Loaded {len(products)} products")
+        return products
+    
+    def iter_products(self) -> Iterator[Dict]:
+        """Stream the products of the current snapshot one by one."""
+        return storage.iter_products()
 
 
 if __name__ == "__main__":
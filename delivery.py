@@ -0,0 +1,327 @@
+"""Telegram message delivery: durable outbox, rate limits, retries, pooled connections.
+
+Messages are first written to a SQLite outbox, so anything not yet sent
+survives a crash or restart and goes out with the next delivery. deliver()
+sends pending messages over one keep-alive requests.Session: chats are
+sent concurrently (up to DELIVERY_CONCURRENCY), messages of one chat in
+order. A token bucket keeps sending within Telegram's global limit and a
+per-chat schedule within its per-chat limit. Failed requests are retried
+with exponential backoff, waiting at least the retry_after Telegram
+returns with HTTP 429. shared_queue() keeps one queue per bot token for
+the whole process, so every sender and run reuses its session, outbox
+connection and global rate limit.
+"""
+import atexit
+import heapq
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Deque, Dict, List, Optional, Tuple
+import requests
+from requests.adapters import HTTPAdapter
+from metrics import count
+from config import (
+    TELEGRAM_BOT_TOKEN, TELEGRAM_API_BASE, OUTBOX_DB, DELIVERY_CONCURRENCY,
+    TELEGRAM_GLOBAL_RATE, TELEGRAM_CHAT_RATE, DELIVERY_MAX_RETRIES
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    chat_id TEXT NOT NULL,
+    text TEXT NOT NULL,
+    parse_mode TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_status ON outbox (status, id);
+"""
+
+# Delivery outcomes of one message
+SENT = "sent"
+FAILED = "failed"      # rejected by Telegram (bad request, blocked bot, ...); never retried
+RETRY_LATER = "retry"  # rate limited or server/network error; retried, then kept for the next delivery
+
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+
+
+class TokenBucket:
+    """Thread-safe token bucket: rate tokens per second, bursts up to capacity."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, sleeping until one is available."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def retry_after(response: requests.Response) -> Optional[float]:
+    """Seconds Telegram asks to wait before retrying, if given."""
+    try:
+        value = response.json().get("parameters", {}).get("retry_after")
+    except ValueError:
+        value = None
+    if value is None:
+        value = response.headers.get("Retry-After")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+_shared_queues: Dict[str, "DeliveryQueue"] = {}
+_shared_lock = threading.Lock()
+
+
+def shared_queue(bot_token: str = TELEGRAM_BOT_TOKEN) -> "DeliveryQueue":
+    """The process-wide DeliveryQueue of a bot token, opened on first use."""
+    with _shared_lock:
+        queue = _shared_queues.get(bot_token)
+        if queue is None:
+            queue = _shared_queues[bot_token] = DeliveryQueue(bot_token=bot_token)
+        return queue
+
+
+@atexit.register
+def close_shared_queues():
+    """Close every shared queue (at exit)."""
+    with _shared_lock:
+        for queue in _shared_queues.values():
+            queue.close()
+        _shared_queues.clear()
+
+
+class DeliveryQueue:
+    """Durable, rate-limited outbox for Telegram sendMessage calls."""
+
+    def __init__(self, bot_token: str = TELEGRAM_BOT_TOKEN, api_base: str = TELEGRAM_API_BASE,
+                 outbox_path: str = OUTBOX_DB, concurrency: int = DELIVERY_CONCURRENCY,
+                 global_rate: float = TELEGRAM_GLOBAL_RATE, chat_rate: float = TELEGRAM_CHAT_RATE,
+                 max_retries: int = DELIVERY_MAX_RETRIES):
+        self.api_url = f"{api_base.rstrip('/')}/bot{bot_token}"
+        self.concurrency = concurrency
+        self.chat_rate = chat_rate
+        self.max_retries = max_retries
+
+        # One pooled keep-alive session, a connection per concurrent chat
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.global_bucket = TokenBucket(global_rate)
+
+        os.makedirs(os.path.dirname(outbox_path) or ".", exist_ok=True)
+        # Shared by the sender threads; every use goes through _db_lock
+        self.conn = sqlite3.connect(outbox_path, timeout=30, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self._db_lock = threading.Lock()
+        # One delivery at a time, so concurrent flushes never send a message twice
+        self._deliver_lock = threading.Lock()
+
+    def close(self):
+        """Close the HTTP session and the outbox."""
+        self.session.close()
+        self.conn.close()
+
+    def enqueue(self, chat_id: str, text: str, parse_mode: Optional[str] = "HTML") -> int:
+        """Store a message in the outbox; it is sent by the next deliver()."""
+        with self._db_lock, self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO outbox (chat_id, text, parse_mode, created_at) VALUES (?, ?, ?, ?)",
+                (str(chat_id), text, parse_mode, datetime.now().isoformat(timespec='seconds')),
+            )
+        return cursor.lastrowid
+
+    def pending(self) -> int:
+        """Number of messages waiting in the outbox."""
+        with self._db_lock:
+            return self.conn.execute("SELECT COUNT(*) FROM outbox WHERE status = 'pending'").fetchone()[0]
+
+    def status(self, message_id: int) -> Optional[str]:
+        """Outbox status of a message: pending, failed, or None once sent."""
+        with self._db_lock:
+            row = self.conn.execute("SELECT status FROM outbox WHERE id = ?", (message_id,)).fetchone()
+        return row["status"] if row else None
+
+    def deliver(self) -> bool:
+        """Send every pending message; True when the outbox is empty afterwards."""
+        with self._deliver_lock:
+            return self._deliver()
+
+    def _deliver(self) -> bool:
+        with self._db_lock:
+            rows = self.conn.execute(
+                "SELECT id, chat_id, text, parse_mode FROM outbox WHERE status = 'pending' ORDER BY id"
+            ).fetchall()
+        if not rows:
+            return True
+
+        schedule = ChatSchedule(rows, 1 / self.chat_rate)
+        logger.info(f"Delivering {len(rows)} messages to {len(schedule.queues)} chats")
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="delivery") as executor:
+            for _ in range(self.concurrency):
+                executor.submit(self._worker, schedule)
+
+        remaining = self.pending()
+        count("messages_sent", schedule.counts[SENT])
+        count("messages_rejected", schedule.counts[FAILED])
+        logger.info(f"Delivered {schedule.counts[SENT]}/{len(rows)} messages "
+                    f"({schedule.counts[FAILED]} rejected, {remaining} pending)")
+        return schedule.counts[FAILED] == 0 and remaining == 0
+
+    def _worker(self, schedule: "ChatSchedule"):
+        try:
+            while True:
+                chat_id = schedule.next_chat()
+                if chat_id is None:
+                    return
+                message = schedule.queues[chat_id][0]
+                self.global_bucket.acquire()
+                outcome, delay, error = self._send(message["row"])
+                if outcome == RETRY_LATER:
+                    message["attempts"] += 1
+                    count("delivery_retries")
+                    if message["attempts"] <= self.max_retries:
+                        delay = schedule.retry(chat_id, delay)
+                        logger.warning(f"Retrying message {message['row']['id']} to chat {chat_id} "
+                                       f"in {delay:.1f}s: {error}")
+                        continue
+                    logger.error(f"Giving up on message {message['row']['id']} to chat {chat_id} "
+                                 f"for now: {error}")
+                self._record(message["row"]["id"], outcome, error)
+                schedule.done(chat_id, outcome)
+        except Exception as e:
+            logger.error(f"Delivery worker failed: {e}", exc_info=True)
+            schedule.abort()
+
+    def _record(self, message_id: int, outcome: str, error: Optional[str]):
+        with self._db_lock, self.conn:
+            if outcome == SENT:
+                self.conn.execute("DELETE FROM outbox WHERE id = ?", (message_id,))
+            else:
+                self.conn.execute(
+                    "UPDATE outbox SET status = ?, attempts = attempts + 1, last_error = ? WHERE id = ?",
+                    ("failed" if outcome == FAILED else "pending", error, message_id),
+                )
+
+    def _send(self, row: sqlite3.Row) -> Tuple[str, float, Optional[str]]:
+        """POST one message; returns (outcome, retry delay, error)."""
+        payload = {"chat_id": row["chat_id"], "text": row["text"]}
+        if row["parse_mode"]:
+            payload["parse_mode"] = row["parse_mode"]
+        try:
+            response = self.session.post(f"{self.api_url}/sendMessage", json=payload, timeout=10)
+        except requests.exceptions.RequestException as e:
+            return RETRY_LATER, BACKOFF_BASE, str(e)
+
+        if response.ok:
+            return SENT, 0.0, None
+        error = f"HTTP {response.status_code}: {response.text[:200]}"
+        if response.status_code == 429:
+            count("rate_limited")
+            return RETRY_LATER, retry_after(response) or BACKOFF_BASE, error
+        if response.status_code >= 500:
+            return RETRY_LATER, BACKOFF_BASE, error
+        logger.error(f"Telegram rejected message {row['id']} to chat {row['chat_id']}: {error}")
+        return FAILED, 0.0, error
+
+
+class ChatSchedule:
+    """Hands delivery workers the chat that may send soonest.
+
+    A chat is held by one worker at a time, so its messages go out in
+    order, and becomes ready again chat_interval seconds after each send
+    (Telegram's per-chat limit) or after a retry delay. Retries back off
+    exponentially on top of the delay the server asked for.
+    """
+
+    def __init__(self, rows: List[sqlite3.Row], chat_interval: float):
+        self.chat_interval = chat_interval
+        self.queues: Dict[str, Deque[Dict]] = {}
+        for row in rows:
+            self.queues.setdefault(row["chat_id"], deque()).append({"row": row, "attempts": 0})
+        # (ready time, sequence, chat id); the sequence keeps queue order on ties
+        self._ready: List[Tuple[float, int, str]] = [
+            (0.0, sequence, chat_id) for sequence, chat_id in enumerate(self.queues)
+        ]
+        self._sequence = len(self._ready)
+        self._in_flight = 0
+        self._aborted = False
+        self._cond = threading.Condition()
+        self.counts = {SENT: 0, FAILED: 0, RETRY_LATER: 0}
+
+    def next_chat(self) -> Optional[str]:
+        """Wait for the next ready chat; None when everything is delivered."""
+        with self._cond:
+            while not self._aborted:
+                if not self._ready:
+                    if self._in_flight == 0:
+                        return None
+                    self._cond.wait()
+                    continue
+                wait = self._ready[0][0] - time.monotonic()
+                if wait <= 0:
+                    self._in_flight += 1
+                    return heapq.heappop(self._ready)[2]
+                self._cond.wait(wait)
+            return None
+
+    def retry(self, chat_id: str, delay: float) -> float:
+        """Put the chat back with its current message after a backoff; returns the delay."""
+        attempts = self.queues[chat_id][0]["attempts"]
+        delay = max(delay, random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempts)))
+        self._release(chat_id, time.monotonic() + delay)
+        return delay
+
+    def done(self, chat_id: str, outcome: str):
+        """Finish the chat's current message and schedule its next one."""
+        queue = self.queues[chat_id]
+        queue.popleft()
+        self.counts[outcome] += 1
+        if outcome == RETRY_LATER:
+            # Keep the chat's order: later messages wait for the next delivery
+            queue.clear()
+        self._release(chat_id, time.monotonic() + self.chat_interval)
+
+    def abort(self):
+        """Stop handing out chats."""
+        with self._cond:
+            self._aborted = True
+            self._cond.notify_all()
+
+    def _release(self, chat_id: str, ready_at: float):
+        with self._cond:
+            self._in_flight -= 1
+            if self.queues[chat_id]:
+                heapq.heappush(self._ready, (ready_at, self._sequence, chat_id))
+                self._sequence += 1
+            self._cond.notify_all()
@@ -0,0 +1,72 @@
+"""Page fingerprints, to skip crawls of an unchanged exhibition page.
+
+Right after the page loads, the product list is hashed: the captured
+product API payloads when there are any, else the product cards' HTML. A
+fingerprint equal to the last fully processed run's means nothing on the
+page changed, and extraction, writes and notifications can be skipped.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+from datetime import datetime
+from typing import Dict, List, Optional
+from config import FINGERPRINT_JSON
+from network_capture import find_product_lists
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Countdown timers ("03:12:45") change every second without any product change
+TIMER_PATTERN = re.compile(r'\d{1,2}:\d{2}(?::\d{2})?')
+
+
+def payload_fingerprint(payloads: List[Dict]) -> Optional[str]:
+    """Hash the product lists in captured payloads (None if there are none)."""
+    product_lists = [items for payload in payloads for items in find_product_lists(payload["data"])]
+    if not product_lists:
+        return None
+    data = json.dumps(product_lists, ensure_ascii=False, sort_keys=True)
+    return "api:" + hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+
+def html_fingerprint(html: str) -> str:
+    """Hash product card HTML, ignoring countdown timers."""
+    return "html:" + hashlib.sha1(TIMER_PATTERN.sub('', html).encode('utf-8')).hexdigest()
+
+
+class FingerprintStore:
+    """Fingerprint of the last fully processed run, per page URL."""
+
+    def __init__(self, path: str = FINGERPRINT_JSON):
+        self.path = path
+        self.fingerprints: Dict[str, Dict] = self.load()
+
+    def load(self) -> Dict[str, Dict]:
+        """Load the fingerprints saved by earlier runs."""
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable fingerprint file {self.path}: {e}")
+            return {}
+
+    def get(self, url: str) -> Optional[str]:
+        """Last fingerprint of a page, if any."""
+        entry = self.fingerprints.get(url)
+        return entry["fingerprint"] if entry else None
+
+    def set(self, url: str, fingerprint: str):
+        """Record a page's fingerprint and save the file."""
+        self.fingerprints[url] = {
+            "fingerprint": fingerprint,
+            "updated_at": datetime.now().isoformat(timespec='seconds'),
+        }
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.fingerprints, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
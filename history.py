@@ -0,0 +1,272 @@
+"""Append-only SQLite history of crawled prices and stock.
+
+Every crawl is stored as one run plus one observation row per product, so
+price and stock series can be queried per model without loading JSON.
+Products are told apart by their product key (model and link), so the
+same model sold on two pages keeps two series.
+The database runs in WAL mode: the scheduler can append while
+`python main.py --mode history` reads.
+"""
+import logging
+import os
+import sqlite3
+from datetime import datetime
+from typing import Dict, List, Optional
+from card_parser import product_key
+from config import HISTORY_DB
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started_at TEXT NOT NULL,
+    finished_at TEXT NOT NULL,
+    product_count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS observations (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    observed_at TEXT NOT NULL,
+    model TEXT NOT NULL,
+    name TEXT NOT NULL,
+    link TEXT,
+    source_url TEXT,
+    sale_price INTEGER,
+    original_price INTEGER,
+    max_benefit_price INTEGER,
+    discount_rate INTEGER,
+    stock INTEGER,
+    product_key TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_observations_model_time ON observations (model, observed_at);
+CREATE INDEX IF NOT EXISTS idx_observations_time ON observations (observed_at);
+CREATE TABLE IF NOT EXISTS products (
+    product_key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    link TEXT,
+    name TEXT NOT NULL,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    lowest_price INTEGER,
+    lowest_at TEXT,
+    first_stock INTEGER,
+    last_stock INTEGER,
+    sold INTEGER NOT NULL DEFAULT 0,
+    sold_out_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_products_model ON products (model);
+"""
+# Created after observations gained product_key in older databases
+KEY_INDEX = "CREATE INDEX IF NOT EXISTS idx_observations_key_time ON observations (product_key, observed_at)"
+
+# Per-product summary kept current on every insert, so lowest-price and
+# all-time depletion queries read one row instead of scanning observations.
+# SET expressions see the old row, so each one compares against it.
+UPSERT_PRODUCT = """
+INSERT INTO products (product_key, model, link, name, first_seen, last_seen, lowest_price, lowest_at,
+                      first_stock, last_stock, sold_out_at)
+VALUES (:product_key, :model, :link, :name, :observed_at, :observed_at, :price,
+        CASE WHEN :price IS NULL THEN NULL ELSE :observed_at END,
+        :stock, :stock, CASE WHEN :stock = 0 THEN :observed_at END)
+ON CONFLICT (product_key) DO UPDATE SET
+    link = excluded.link,
+    name = excluded.name,
+    last_seen = excluded.last_seen,
+    lowest_price = CASE WHEN excluded.lowest_price < COALESCE(products.lowest_price, excluded.lowest_price + 1)
+                        THEN excluded.lowest_price ELSE products.lowest_price END,
+    lowest_at = CASE WHEN excluded.lowest_price < COALESCE(products.lowest_price, excluded.lowest_price + 1)
+                     THEN excluded.lowest_at ELSE products.lowest_at END,
+    first_stock = COALESCE(products.first_stock, excluded.first_stock),
+    last_stock = COALESCE(excluded.last_stock, products.last_stock),
+    sold = products.sold + MAX(COALESCE(products.last_stock - excluded.last_stock, 0), 0),
+    sold_out_at = COALESCE(products.sold_out_at, excluded.sold_out_at)
+"""
+
+# Time buckets for downsampled price series (prefix length of the ISO timestamp)
+BUCKET_LENGTHS = {"minute": 16, "hour": 13, "day": 10}
+
+OBSERVATION_COLUMNS = (
+    "run_id", "observed_at", "model", "name", "link", "source_url",
+    "sale_price", "original_price", "max_benefit_price", "discount_rate", "stock", "product_key",
+)
+INSERT_OBSERVATION = (
+    f"INSERT INTO observations ({', '.join(OBSERVATION_COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in OBSERVATION_COLUMNS)})"
+)
+
+
+def _timestamp(value: Optional[datetime] = None) -> str:
+    return (value or datetime.now()).isoformat(timespec='seconds')
+
+
+def _summary_row(product: Dict, key: str, observed_at: str) -> Dict:
+    """UPSERT_PRODUCT parameters for one observed product."""
+    return {
+        "product_key": key, "model": product.get('model') or "", "link": product.get('link'),
+        "name": product.get('name') or "", "observed_at": observed_at,
+        "price": product.get('sale_price'), "stock": product.get('stock'),
+    }
+
+
+class HistoryStore:
+    """Crawl runs and product observations in a SQLite database."""
+
+    def __init__(self, path: str = HISTORY_DB):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        # WAL lets readers query while a crawl is being written;
+        # NORMAL sync is durable enough for a WAL database
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+        self.conn.execute(KEY_INDEX)
+
+    def _migrate(self):
+        """Bring a database summarised per model up to per-product keys."""
+        columns = {row["name"] for row in self.conn.execute("PRAGMA table_info(observations)")}
+        legacy = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'models'"
+        ).fetchone()
+        if "product_key" in columns and legacy is None:
+            return
+        with self.conn:
+            if "product_key" not in columns:
+                self.conn.execute("ALTER TABLE observations ADD COLUMN product_key TEXT")
+            rows = self.conn.execute(
+                "SELECT rowid, * FROM observations WHERE product_key IS NULL"
+            ).fetchall()
+            self.conn.executemany(
+                "UPDATE observations SET product_key = ? WHERE rowid = ?",
+                ((product_key(dict(row)), row["rowid"]) for row in rows),
+            )
+            if legacy is not None:
+                # Replay every observation into the new summary, oldest first
+                self.conn.execute("DELETE FROM products")
+                self.conn.executemany(UPSERT_PRODUCT, (
+                    _summary_row(dict(row), row["product_key"], row["observed_at"])
+                    for row in self.conn.execute("SELECT * FROM observations ORDER BY observed_at, rowid")
+                ))
+                self.conn.execute("DROP TABLE models")
+        logger.info(f"Migrated {self.path} to per-product history ({len(rows)} observations keyed)")
+
+    def close(self):
+        """Close the database connection."""
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def record_run(self, products: List[Dict], started_at: Optional[datetime] = None) -> int:
+        """Append one crawl (all its products) in a single transaction."""
+        finished_at = _timestamp()
+        started = _timestamp(started_at) if started_at else finished_at
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO runs (started_at, finished_at, product_count) VALUES (?, ?, ?)",
+                (started, finished_at, len(products)),
+            )
+            run_id = cursor.lastrowid
+            keys = [product_key(product) for product in products]
+            self.conn.executemany(INSERT_OBSERVATION, (
+                (
+                    run_id, finished_at, product.get('model') or "", product.get('name') or "",
+                    product.get('link'), product.get('source_url'), product.get('sale_price'),
+                    product.get('original_price'), product.get('max_benefit_price'),
+                    product.get('discount_rate'), product.get('stock'), key,
+                )
+                for product, key in zip(products, keys)
+            ))
+            self.conn.executemany(UPSERT_PRODUCT, (
+                _summary_row(product, key, finished_at) for product, key in zip(products, keys)
+            ))
+        logger.info(f"Recorded {len(products)} observations (run #{run_id}) in {self.path}")
+        return run_id
+
+    def lowest_prices(self, model: Optional[str] = None) -> List[Dict]:
+        """Lowest sale price ever seen per product, with when it was seen."""
+        query = "SELECT model, link, name, lowest_price, lowest_at, first_seen, last_seen FROM products"
+        params = []
+        if model:
+            query += " WHERE model = ?"
+            params.append(model)
+        query += " ORDER BY model, link"
+        return [dict(row) for row in self.conn.execute(query, params)]
+
+    def price_series(self, model: str, since: Optional[str] = None,
+                     bucket: Optional[str] = None) -> List[Dict]:
+        """Price observations of one model, one series per product (link), oldest first.
+
+        With a bucket ("minute", "hour" or "day") each series is downsampled
+        to the lowest sale price per bucket.
+        """
+        where = "WHERE model = ?"
+        params = [model]
+        if since:
+            where += " AND observed_at >= ?"
+            params.append(since)
+
+        if bucket:
+            length = BUCKET_LENGTHS[bucket]
+            query = (
+                f"SELECT MAX(link) AS link, substr(observed_at, 1, {length}) AS period, "
+                f"MIN(sale_price) AS sale_price, MIN(max_benefit_price) AS max_benefit_price, "
+                f"MAX(discount_rate) AS discount_rate, COUNT(*) AS observations FROM observations {where} "
+                f"GROUP BY product_key, period ORDER BY link, period"
+            )
+        else:
+            query = (
+                f"SELECT link, observed_at, sale_price, original_price, max_benefit_price, discount_rate "
+                f"FROM observations {where} ORDER BY product_key, observed_at, run_id"
+            )
+        return [dict(row) for row in self.conn.execute(query, params)]
+
+    def stock_depletion(self, model: str, since: Optional[str] = None) -> List[Dict]:
+        """Units sold and sell rate of each product of one model, from its stock series.
+
+        Only decreases count as sales, so restocks do not hide them.
+        """
+        if since:
+            rows = self.conn.execute(
+                """
+                WITH series AS (
+                    SELECT product_key, link, observed_at, stock,
+                           LAG(stock) OVER (PARTITION BY product_key ORDER BY observed_at, run_id) AS previous_stock,
+                           ROW_NUMBER() OVER (PARTITION BY product_key ORDER BY observed_at, run_id) AS first_rank,
+                           ROW_NUMBER() OVER (PARTITION BY product_key ORDER BY observed_at DESC, run_id DESC) AS last_rank
+                    FROM observations
+                    WHERE model = ? AND stock IS NOT NULL AND observed_at >= ?
+                )
+                SELECT MAX(link) AS link, MIN(observed_at) AS first_seen, MAX(observed_at) AS last_seen,
+                       MAX(CASE WHEN first_rank = 1 THEN stock END) AS first_stock,
+                       MAX(CASE WHEN last_rank = 1 THEN stock END) AS last_stock,
+                       SUM(MAX(COALESCE(previous_stock - stock, 0), 0)) AS sold,
+                       MIN(CASE WHEN stock = 0 THEN observed_at END) AS sold_out_at
+                FROM series GROUP BY product_key ORDER BY link
+                """,
+                (model, since),
+            ).fetchall()
+        else:
+            rows = self.conn.execute(
+                "SELECT link, first_seen, last_seen, first_stock, last_stock, sold, sold_out_at "
+                "FROM products WHERE model = ? ORDER BY link",
+                (model,),
+            ).fetchall()
+
+        results = []
+        for row in rows:
+            hours = (
+                datetime.fromisoformat(row["last_seen"]) - datetime.fromisoformat(row["first_seen"])
+            ).total_seconds() / 3600
+            results.append({
+                "model": model,
+                **dict(row),
+                "sold_per_hour": round(row["sold"] / hours, 2) if hours else None,
+            })
+        return results
@@ -1,11 +1,21 @@
 """Main entry point for LG Time Deal crawler."""
 import argparse
+import cProfile
+import json
 import logging
+import os
+import pstats
 import sys
+from datetime import datetime
+from urllib.parse import urlsplit
+from async_crawler import crawl_urls
 from crawler import LGTimedealCrawler
+from history import HistoryStore
+from metrics import finish_run, start_run
 from telegram_sender import TelegramSender
 from scheduler import start_scheduler, run_crawl_and_send
-from config import TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID
+from subscribers import SubscriberRegistry
+from config import TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, LG_TIMEDEAL_URLS, SUBSCRIBERS_JSON, METRICS_DIR
 
 logging.basicConfig(
     level=logging.INFO,
@@ -14,71 +24,201 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def check_urls():
+    """Check that LG_TIMEDEAL_URL holds at least one http(s) URL."""
+    if not LG_TIMEDEAL_URLS:
+        logger.error("LG_TIMEDEAL_URL is empty. Please set it in .env file or remove it to use the default page.")
+        return False
+    invalid = [url for url in LG_TIMEDEAL_URLS
+               if urlsplit(url).scheme not in ("http", "https") or not urlsplit(url).netloc]
+    if invalid:
+        logger.error(f"LG_TIMEDEAL_URL has invalid URLs: {', '.join(invalid)}")
+        return False
+    return True
+
+
 def check_config():
     """Check if required configuration is set."""
+    if not check_urls():
+        return False
     if not TELEGRAM_BOT_TOKEN:
         logger.error("TELEGRAM_BOT_TOKEN is not set. Please set it in .env file.")
         return False
-    if not TELEGRAM_CHAT_ID:
-        logger.error("TELEGRAM_CHAT_ID is not set. Please set it in .env file.")
+    if not TELEGRAM_CHAT_ID and not os.path.exists(SUBSCRIBERS_JSON):
+        logger.error(f"TELEGRAM_CHAT_ID is not set and {SUBSCRIBERS_JSON} does not exist. "
+                     "Please set it in .env file.")
         return False
     return True
 
 
+def dump_profile(profiler: cProfile.Profile) -> str:
+    """Save a cProfile dump of the run and log its top functions."""
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    path = os.path.join(METRICS_DIR, f"profile-{datetime.now():%Y%m%d-%H%M%S}.prof")
+    profiler.dump_stats(path)
+    logger.info(f"Saved profile to {path} (view with: python -m pstats {path})")
+    pstats.Stats(profiler, stream=sys.stderr).sort_stats('cumulative').print_stats(20)
+    return path
+
+
 def main():
     """Main function."""
     parser = argparse.ArgumentParser(description='LG Time Deal Crawler')
     parser.add_argument(
         '--mode',
-        choices=['crawl', 'send', 'schedule'],
+        choices=['crawl', 'send', 'schedule', 'watch', 'replay', 'history'],
         default='crawl',
-        help='Operation mode: crawl (default), send, or schedule'
+        help='Operation mode: crawl (default), send, schedule, watch, replay, or history'
     )
     parser.add_argument(
         '--test',
         action='store_true',
         help='Test mode: run once and exit'
     )
+    parser.add_argument(
+        '--snapshot',
+        help='Replay mode: snapshot (.html) or captured payload (.json) file, '
+             'or a directory of them (default: latest snapshot)'
+    )
+    parser.add_argument(
+        '--query',
+        choices=['lowest', 'prices', 'stock'],
+        default='lowest',
+        help='History mode: lowest-ever prices (default), price series, or stock depletion'
+    )
+    parser.add_argument(
+        '--model',
+        help='History mode: model name (required for prices and stock)'
+    )
+    parser.add_argument(
+        '--since',
+        help='History mode: only observations from this date (YYYY-MM-DD)'
+    )
+    parser.add_argument(
+        '--bucket',
+        choices=['minute', 'hour', 'day'],
+        help='History mode: downsample the price series to the lowest price per bucket'
+    )
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='Also save a cProfile dump of the run in the metrics directory'
+    )
     
     args = parser.parse_args()
     
+    if args.profile:
+        profiler = cProfile.Profile()
+        try:
+            profiler.runcall(run_mode, args)
+        finally:
+            dump_profile(profiler)
+    else:
+        run_mode(args)
+
+
+def run_mode(args: argparse.Namespace):
+    """Run the selected mode."""
     if args.mode == 'schedule':
         if not check_config():
             sys.exit(1)
         start_scheduler()
     
+    elif args.mode == 'watch':
+        if not check_config():
+            sys.exit(1)
+        # Imported here so other modes do not load the watcher
+        from watch import run_watch
+        run_watch()
+    
     elif args.mode == 'crawl':
+        if not check_urls():
+            sys.exit(1)
         logger.info("Running crawler...")
+        start_run("crawl")
+        started_at = datetime.now()
         crawler = LGTimedealCrawler()
-        products = crawler.crawl()
+        if len(LG_TIMEDEAL_URLS) > 1:
+            products, _ = crawl_urls(LG_TIMEDEAL_URLS)
+        else:
+            products = crawler.crawl()
         crawler.save_products(products)
+        with HistoryStore() as history:
+            history.record_run(products, started_at)
         logger.info(f"Crawled {len(products)} products")
         
+        success = bool(products)
         if args.test and check_config():
-            # Also send notification in test mode
+            # Also send notification in test mode, to every subscriber watching a product
             sender = TelegramSender()
-            sender.send_products(products)
+            success = sender.send_products_to_subscribers(products, SubscriberRegistry()) and success
+        finish_run(success)
     
     elif args.mode == 'send':
         if not check_config():
             sys.exit(1)
         
         logger.info("Sending notification...")
+        start_run("send")
         crawler = LGTimedealCrawler()
-        products = crawler.load_products()
+        sender = TelegramSender()
+        registry = SubscriberRegistry()
+        # Streamed from the snapshot, keeping only watched products in memory
+        total = 0
+        watched_products = []
+        for product in crawler.iter_products():
+            total += 1
+            if registry.chats_for(product):
+                watched_products.append(product)
         
-        if not products:
+        if not total:
             logger.warning("No products found. Run crawl first.")
             sys.exit(1)
         
-        sender = TelegramSender()
-        success = sender.send_products(products)
+        logger.info(f"Loaded {total} products, {len(watched_products)} watched")
+        success = sender.send_products_to_subscribers(watched_products, registry)
+        finish_run(success)
         
         if success:
             logger.info("Notification sent successfully")
         else:
             logger.error("Failed to send notification")
             sys.exit(1)
+    
+    elif args.mode == 'replay':
+        # Imported here so other modes do not need selectolax
+        from replay import latest_snapshot, list_snapshots, replay_snapshot
+        
+        if args.snapshot and os.path.isdir(args.snapshot):
+            paths = list_snapshots(args.snapshot, include_payloads=True)
+        elif args.snapshot:
+            paths = [args.snapshot]
+        else:
+            latest = latest_snapshot()
+            paths = [latest] if latest else []
+        
+        if not paths:
+            logger.warning("No snapshots found. Run crawl first.")
+            sys.exit(1)
+        
+        for path in paths:
+            products = replay_snapshot(path)
+            print(json.dumps(products, ensure_ascii=False, indent=2))
+    
+    elif args.mode == 'history':
+        if args.query != 'lowest' and not args.model:
+            logger.error(f"--model is required for --query {args.query}")
+            sys.exit(1)
+        
+        with HistoryStore() as history:
+            if args.query == 'lowest':
+                result = history.lowest_prices(args.model)
+            elif args.query == 'prices':
+                result = history.price_series(args.model, args.since, args.bucket)
+            else:
+                result = history.stock_depletion(args.model, args.since)
+        
+        print(json.dumps(result, ensure_ascii=False, indent=2))
 
 
 if __name__ == "__main__":
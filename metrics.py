@@ -0,0 +1,224 @@
+"""Run timing and metrics for LG Time Deal crawler.
+
+Every run records phase durations, counters (cards found and parsed, parse
+failures, messages sent, retries, ...) and peak RSS into the process-wide
+current run, through phase(), timed() and count(). finish_run() writes the
+run as one JSON line and as a Prometheus textfile (for node_exporter's
+textfile collector).
+"""
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, Optional, TypeVar
+from config import METRICS_JSONL, METRICS_TEXTFILE
+
+try:
+    import resource
+except ImportError:  # Peak RSS is not reported on Windows
+    resource = None
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Prefix of every exported Prometheus metric
+METRIC_PREFIX = "lg_timedeal"
+
+
+class PhaseTimer:
+    """Record how long each named phase of a run takes."""
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        # Phases and counters are also recorded from delivery and browser threads
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time the enclosed block as phase name (seconds, accumulated)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name: str, seconds: float):
+        """Add seconds measured elsewhere to phase name."""
+        with self._lock:
+            self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def count(self, name: str, value: int = 1):
+        """Add value to counter name (e.g. cache hits)."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def merge(self, other: "PhaseTimer", prefix: str = ""):
+        """Add another timer's phases and counters, with names prefixed."""
+        for name, seconds in list(other.timings.items()):
+            self.record(prefix + name, seconds)
+        for name, value in list(other.counters.items()):
+            self.count(prefix + name, value)
+
+    def summary(self) -> str:
+        """Format timings as 'phase=123ms ...' in recording order, then counters."""
+        parts = [f"{name}={seconds * 1000:.0f}ms" for name, seconds in self.timings.items()]
+        parts += [f"{name}={value}" for name, value in self.counters.items()]
+        return " ".join(parts)
+
+
+class RunMetrics(PhaseTimer):
+    """Phases and counters of one whole run, with its outcome."""
+
+    def __init__(self, name: str = "run"):
+        super().__init__()
+        self.name = name
+        self.started_at = datetime.now()
+        self.start = time.perf_counter()
+        self.duration: Optional[float] = None
+        self.success: Optional[bool] = None
+
+    def to_dict(self) -> Dict:
+        """Run as a JSON-serialisable dict."""
+        return {
+            "run": self.name,
+            "started_at": self.started_at.isoformat(timespec='seconds'),
+            "duration_s": round(self.duration if self.duration is not None
+                                else time.perf_counter() - self.start, 4),
+            "success": self.success,
+            "peak_rss_bytes": peak_rss_bytes(),
+            "children_peak_rss_bytes": peak_rss_bytes(children=True),
+            "phases_s": {name: round(seconds, 4) for name, seconds in self.timings.items()},
+            "counts": dict(self.counters),
+        }
+
+
+_current = RunMetrics()
+
+
+def current_run() -> RunMetrics:
+    """Metrics of the run in progress."""
+    return _current
+
+
+def start_run(name: str = "run") -> RunMetrics:
+    """Start recording a new run."""
+    global _current
+    _current = RunMetrics(name)
+    return _current
+
+
+def phase(name: str):
+    """Time the enclosed block as a phase of the current run."""
+    return _current.phase(name)
+
+
+def count(name: str, value: int = 1):
+    """Add value to a counter of the current run."""
+    _current.count(name, value)
+
+
+def timed(name: str) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    """Decorator timing every call of a function as phase name of the current run."""
+    def decorator(func: Callable[..., T]) -> Callable[..., T]:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            # Looked up per call: the current run changes between calls
+            with _current.phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def peak_rss_bytes(children: bool = False) -> Optional[int]:
+    """Peak resident memory of this process (or its largest waited-for child)."""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    if sys.platform == "darwin":
+        return usage.ru_maxrss
+    return usage.ru_maxrss * 1024
+
+
+def finish_run(success: Optional[bool] = None, jsonl_path: str = METRICS_JSONL,
+               textfile_path: str = METRICS_TEXTFILE) -> Dict:
+    """Close the current run and export it; returns the exported record."""
+    run = _current
+    run.duration = time.perf_counter() - run.start
+    run.success = success
+    record = run.to_dict()
+    logger.info(f"Run metrics: {run.summary()} total={run.duration * 1000:.0f}ms")
+    try:
+        append_json_line(record, jsonl_path)
+        write_prometheus(record, textfile_path)
+    except OSError as e:
+        logger.warning(f"Failed to export run metrics: {e}")
+    return record
+
+
+def append_json_line(record: Dict, path: str = METRICS_JSONL):
+    """Append one run to the JSON lines file."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text(record: Dict) -> str:
+    """Format a run record in the Prometheus text exposition format."""
+    run = _label(record["run"])
+    lines = [
+        f"# HELP {METRIC_PREFIX}_phase_seconds Time spent in each phase of the last run.",
+        f"# TYPE {METRIC_PREFIX}_phase_seconds gauge",
+    ]
+    lines += [
+        f'{METRIC_PREFIX}_phase_seconds{{run="{run}",phase="{_label(name)}"}} {seconds}'
+        for name, seconds in record["phases_s"].items()
+    ]
+    lines += [
+        f"# HELP {METRIC_PREFIX}_count Counters of the last run.",
+        f"# TYPE {METRIC_PREFIX}_count gauge",
+    ]
+    lines += [
+        f'{METRIC_PREFIX}_count{{run="{run}",name="{_label(name)}"}} {value}'
+        for name, value in record["counts"].items()
+    ]
+    gauges = [
+        ("run_duration_seconds", "Duration of the last run.", record["duration_s"]),
+        ("run_success", "Whether the last run succeeded (1) or failed (0).",
+         None if record["success"] is None else int(record["success"])),
+        ("last_run_timestamp_seconds", "Start time of the last run.",
+         datetime.fromisoformat(record["started_at"]).timestamp()),
+        ("peak_rss_bytes", "Peak resident memory of the crawler process.", record["peak_rss_bytes"]),
+        ("children_peak_rss_bytes", "Peak resident memory of its largest exited child (browser).",
+         record["children_peak_rss_bytes"]),
+    ]
+    for name, help_text, value in gauges:
+        if value is None:
+            continue
+        lines += [
+            f"# HELP {METRIC_PREFIX}_{name} {help_text}",
+            f"# TYPE {METRIC_PREFIX}_{name} gauge",
+            f'{METRIC_PREFIX}_{name}{{run="{run}"}} {value}',
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(record: Dict, path: str = METRICS_TEXTFILE):
+    """Write a run record as a Prometheus textfile (temp file + rename)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(prometheus_text(record))
+    os.replace(tmp_path, path)
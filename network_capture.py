@@ -0,0 +1,192 @@
+"""Product extraction from captured product-list API responses.
+
+The exhibition page fills its product grid from background XHR/fetch
+responses. ResponseCapture records those JSON payloads while the page
+loads, and products_from_payloads builds product dicts straight from their
+structured fields, without parsing any rendered text.
+"""
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+from card_parser import ProductRecord, absolute_link, parse_price
+from config import SNAPSHOT_DIR, SNAPSHOT_KEEP
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Field names seen in LG product APIs (and data-ec-product), in priority order
+FIELD_KEYS = {
+    "name": ["userFriendlyName", "modelDisplayName", "productName", "item_name",
+             "model_display_name", "displayName", "name"],
+    "model": ["modelName", "model_name", "modelCode", "salesModelCode", "sku", "item_id", "modelId"],
+    "link": ["modelUrlPath", "pdpUrl", "productUrl", "linkUrl", "url", "link"],
+    "discount_rate": ["discountRate", "dcRate", "discount_rate", "saleRate"],
+    "sale_price": ["obsSellingPrice", "salePrice", "sellingPrice", "discountPrice",
+                   "discountedPrice", "finalPrice", "price"],
+    "original_price": ["obsOriginalPrice", "originalPrice", "listPrice", "normalPrice", "msrp"],
+    "max_benefit_price": ["maxBenefitPrice", "benefitPrice", "obsBenefitPrice", "lowestPrice"],
+    "stock": ["stockQty", "remainQty", "remainStock", "stockCount", "inventoryQty", "stock"],
+}
+PRICE_FIELDS = ("sale_price", "original_price", "max_benefit_price")
+
+# Responses worth reading
+CAPTURE_RESOURCE_TYPES = {"xhr", "fetch"}
+# Skip huge bodies (analytics dumps, bundles served as JSON)
+MAX_PAYLOAD_BYTES = 5 * 1024 * 1024
+
+
+class ResponseCapture:
+    """Record JSON XHR/fetch responses of a page."""
+
+    def __init__(self):
+        self._responses = []
+
+    def attach(self, page):
+        """Start listening to the page's responses."""
+        page.on("response", self._on_response)
+
+    def _on_response(self, response):
+        # Bodies are read later in payloads(); reading inside the event
+        # handler would block the page's event dispatch
+        if response.request.resource_type not in CAPTURE_RESOURCE_TYPES:
+            return
+        if "json" not in (response.headers.get("content-type") or ""):
+            return
+        self._responses.append(response)
+
+    def payloads(self) -> List[Dict]:
+        """Read the captured responses as [{"url": ..., "data": ...}]."""
+        payloads = []
+        for response in self._responses:
+            try:
+                payload = _decode_payload(response.url, response.body())
+            except Exception as e:
+                logger.debug(f"Skipping response {response.url}: {e}")
+                continue
+            if payload is not None:
+                payloads.append(payload)
+        return payloads
+
+    async def async_payloads(self) -> List[Dict]:
+        """Same as payloads() for pages of the async Playwright API."""
+        payloads = []
+        for response in self._responses:
+            try:
+                payload = _decode_payload(response.url, await response.body())
+            except Exception as e:
+                logger.debug(f"Skipping response {response.url}: {e}")
+                continue
+            if payload is not None:
+                payloads.append(payload)
+        return payloads
+
+
+def _decode_payload(url: str, body: bytes) -> Optional[Dict]:
+    if len(body) > MAX_PAYLOAD_BYTES:
+        return None
+    return {"url": url, "data": json.loads(body)}
+
+
+def _first(item: Dict, keys: List[str]) -> Any:
+    for key in keys:
+        value = item.get(key)
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def _to_int(value: Any) -> Optional[int]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        return parse_price(value.replace('%', '').replace('개', ''))
+    return None
+
+
+def is_product_item(item: Any) -> bool:
+    """Check if a JSON object looks like a product entry."""
+    return (
+        isinstance(item, dict)
+        and _first(item, FIELD_KEYS["name"]) is not None
+        and any(_first(item, FIELD_KEYS[field]) is not None for field in PRICE_FIELDS)
+    )
+
+
+def find_product_lists(data: Any) -> Iterator[List[Dict]]:
+    """Yield lists in a JSON document whose entries are mostly products."""
+    if isinstance(data, dict):
+        for value in data.values():
+            yield from find_product_lists(value)
+    elif isinstance(data, list) and data:
+        products = [item for item in data if is_product_item(item)]
+        if products and len(products) * 2 >= len(data):
+            yield products
+        else:
+            for value in data:
+                if isinstance(value, (dict, list)):
+                    yield from find_product_lists(value)
+
+
+def product_from_item(item: Dict) -> Optional[ProductRecord]:
+    """Build a product dict from a structured product entry."""
+    name = _first(item, FIELD_KEYS["name"])
+    if not name:
+        return None
+    return ProductRecord(
+        name=str(name).strip(),
+        model=str(_first(item, FIELD_KEYS["model"]) or ""),
+        link=absolute_link(str(_first(item, FIELD_KEYS["link"]) or "")),
+        discount_rate=_to_int(_first(item, FIELD_KEYS["discount_rate"])),
+        sale_price=_to_int(_first(item, FIELD_KEYS["sale_price"])),
+        original_price=_to_int(_first(item, FIELD_KEYS["original_price"])),
+        max_benefit_price=_to_int(_first(item, FIELD_KEYS["max_benefit_price"])),
+        stock=_to_int(_first(item, FIELD_KEYS["stock"])),
+    )
+
+
+def products_from_payloads(payloads: List[Dict]) -> List[ProductRecord]:
+    """Build products from captured payloads, skipping repeated entries."""
+    products = []
+    seen = set()
+    for payload in payloads:
+        for items in find_product_lists(payload["data"]):
+            for item in items:
+                product = product_from_item(item)
+                if product is None:
+                    continue
+                key = (product["model"], product["link"], product["name"])
+                if key in seen:
+                    continue
+                seen.add(key)
+                products.append(product)
+    return products
+
+
+def save_payloads(payloads: List[Dict], tag: str = "page", snapshot_dir: str = SNAPSHOT_DIR) -> str:
+    """Save captured payloads next to the page snapshots for offline replay."""
+    os.makedirs(snapshot_dir, exist_ok=True)
+
+    path = os.path.join(snapshot_dir, f"payloads-{datetime.now():%Y%m%d-%H%M%S}-{tag}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(payloads, f, ensure_ascii=False)
+    logger.info(f"Saved {len(payloads)} captured responses to {path}")
+
+    # Keep only the most recent captures
+    captures = sorted(
+        name for name in os.listdir(snapshot_dir)
+        if name.startswith("payloads-") and name.endswith(".json")
+    )
+    for name in captures[:-SNAPSHOT_KEEP]:
+        os.remove(os.path.join(snapshot_dir, name))
+
+    return path
+
+
+def load_payloads(path: str) -> List[Dict]:
+    """Load payloads saved by save_payloads."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
@@ -0,0 +1,152 @@
+"""Streaming crawl -> notify pipeline.
+
+Products are fed to AlertPipeline as the crawler parses them. Each one is
+diffed against the state store and routed to the interested chats right
+away; a sender thread delivers queued alerts while the crawl goes on,
+packing whatever accumulated during the previous delivery into as few
+messages as possible. Persistence (products JSON, history, state) is left
+to the caller, as one batch after finish(), off the alert path.
+"""
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+from config import NOTIFY_MODE
+from card_parser import product_key
+from state_store import ProductStateStore, diff_count, empty_diff
+from subscribers import SubscriberRegistry, passes_threshold
+from telegram_sender import TelegramSender
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class AlertPipeline:
+    """Match, queue and deliver alerts per product while the crawl continues."""
+
+    def __init__(self, sender: TelegramSender, registry: SubscriberRegistry,
+                 state_store: ProductStateStore, notify_mode: str = NOTIFY_MODE):
+        self.sender = sender
+        self.registry = registry
+        self.state_store = state_store
+        self.notify_mode = notify_mode
+        self.products: List[Dict] = []
+        self.diff = empty_diff()
+        # Every alert reached the outbox, which delivers what is left on a later run
+        self.queued = True
+        # Every alert was delivered
+        self.success = True
+        # perf_counter time of the first delivered alert
+        self.first_alert_at: Optional[float] = None
+        self._seen = set()
+        # Chat id -> alerts waiting for the sender thread: (change_type, change)
+        # in "changes" mode, products in "all" mode
+        self._pending: Dict[str, List] = {}
+        self._closed = False
+        self._delivered = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._send_loop, name="alerts", daemon=True)
+
+    def start(self) -> "AlertPipeline":
+        """Start the sender thread."""
+        self._thread.start()
+        return self
+
+    def submit(self, product: Dict):
+        """Record a crawled product, diff it and queue its alerts.
+
+        The diff is kept in every notify mode (it drives the polling
+        back-off); notify_mode only decides what is sent.
+        """
+        key = product_key(product)
+        if key in self._seen:
+            return
+        self._seen.add(key)
+        self.products.append(product)
+
+        for change_type, change in self.state_store.product_changes(product):
+            self.diff[change_type].append(change)
+            if self.notify_mode == "changes":
+                self._route_change(change_type, change)
+        if self.notify_mode != "changes":
+            for chat_id in self.registry.chats_for(product):
+                self._queue(chat_id, product)
+
+    def consume(self, products: Iterable[Dict]):
+        """Submit every product of an iterable, e.g. LGTimedealCrawler.iter_crawl()."""
+        for product in products:
+            self.submit(product)
+
+    def finish(self, complete: bool = True) -> bool:
+        """Queue removals (complete crawls only), deliver everything and stop.
+
+        Returns whether every alert was delivered. Alerts still pending in
+        the outbox go out with the next delivery, so callers advance their
+        state on self.queued instead, or the same change is alerted twice.
+        """
+        if complete:
+            for change_type, change in self.state_store.removed_changes(self._seen):
+                self.diff[change_type].append(change)
+                if self.notify_mode == "changes":
+                    self._route_change(change_type, change)
+
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        if not self._delivered and self.sender.bot_token:
+            # Alerts left in the outbox by an earlier run go out even when this one has none
+            self._deliver()
+
+        logger.info(f"{diff_count(self.diff)} changes since last run: " + ", ".join(
+            f"{change_type}={len(changes)}" for change_type, changes in self.diff.items()
+        ))
+        return self.success
+
+    def _route_change(self, change_type: str, change):
+        for chat_id in self.registry.chats_for(change["product"]):
+            if passes_threshold(self.registry.subscribers[chat_id], change_type, change):
+                self._queue(chat_id, (change_type, change))
+
+    def _queue(self, chat_id: str, alert):
+        with self._cond:
+            self._pending.setdefault(chat_id, []).append(alert)
+            self._cond.notify()
+
+    def _send_loop(self):
+        queue_alerts: Callable = (
+            self.sender.queue_change_list if self.notify_mode == "changes" else self.sender.queue_product_list
+        )
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                pending, self._pending = self._pending, {}
+
+            try:
+                for chat_id, alerts in pending.items():
+                    logger.info(f"Queueing {len(alerts)} alerts for chat {chat_id}")
+                    if not queue_alerts(alerts, chat_id):
+                        self.queued = False
+                        self.success = False
+            except Exception as e:
+                logger.error(f"Failed to queue alerts: {e}", exc_info=True)
+                self.queued = False
+                self.success = False
+
+            self._deliver()
+
+    def _deliver(self):
+        self._delivered = True
+        try:
+            if self.sender.flush():
+                if self.first_alert_at is None:
+                    self.first_alert_at = time.perf_counter()
+            else:
+                self.success = False
+        except Exception as e:
+            logger.error(f"Failed to deliver alerts: {e}", exc_info=True)
+            self.success = False
+
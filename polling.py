@@ -0,0 +1,108 @@
+"""Adaptive polling trigger for the scheduler's poll mode.
+
+Polls at a short interval inside configured windows (when time deals go
+live) and at a long default interval otherwise, adds jitter, and backs
+off while the page does not change.
+"""
+import logging
+from datetime import datetime, time, timedelta
+from typing import List, NamedTuple, Optional
+from apscheduler.triggers.base import BaseTrigger
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class PollWindow(NamedTuple):
+    """Daily time window with its own polling interval (seconds)."""
+    start: time
+    end: time
+    interval: float
+
+    def contains(self, moment: time) -> bool:
+        if self.start <= self.end:
+            return self.start <= moment < self.end
+        # Window across midnight, e.g. 23:50-00:10
+        return moment >= self.start or moment < self.end
+
+
+def parse_windows(spec: str) -> List[PollWindow]:
+    """Parse "HH:MM-HH:MM=seconds" entries separated by commas."""
+    windows = []
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        try:
+            span, interval = entry.split("=")
+            start, end = span.split("-")
+            windows.append(PollWindow(time.fromisoformat(start.strip()), time.fromisoformat(end.strip()),
+                                      float(interval)))
+        except ValueError:
+            raise ValueError(f"Invalid polling window {entry!r}, expected HH:MM-HH:MM=seconds")
+    return windows
+
+
+class PollingTrigger(BaseTrigger):
+    """APScheduler trigger with per-window intervals, jitter and back-off.
+
+    The interval is multiplied by a back-off factor that doubles after each
+    run that found no change (up to max_backoff) and resets on a change or
+    when a polling window starts; a window start is never skipped. Jitter
+    adds up to jitter * interval seconds to each fire time.
+    """
+
+    def __init__(self, windows: List[PollWindow], default_interval: float,
+                 jitter: float = 0.0, max_backoff: float = 1.0):
+        self.windows = windows
+        self.default_interval = default_interval
+        self.jitter = jitter
+        self.max_backoff = max_backoff
+        self.backoff = 1.0
+
+    def base_interval(self, moment: datetime) -> float:
+        """Interval of the window containing moment, or the default interval."""
+        for window in self.windows:
+            if window.contains(moment.time()):
+                return window.interval
+        return self.default_interval
+
+    def interval(self, moment: datetime) -> float:
+        """Current interval at moment, including back-off."""
+        return self.base_interval(moment) * self.backoff
+
+    def record(self, changed: Optional[bool]):
+        """Adjust the back-off after a run (None: run failed, keep it)."""
+        if changed is None:
+            return
+        if changed:
+            self.backoff = 1.0
+        elif self.backoff < self.max_backoff:
+            self.backoff = min(self.backoff * 2, self.max_backoff)
+            logger.info(f"No changes, backing off polling to {self.backoff:g}x interval")
+
+    def _next_window_start(self, after: datetime, before: datetime) -> Optional[datetime]:
+        starts = [
+            datetime.combine(after.date() + timedelta(days=days), window.start, tzinfo=after.tzinfo)
+            for window in self.windows
+            for days in (0, 1)
+        ]
+        starts = [start for start in starts if after < start < before]
+        return min(starts) if starts else None
+
+    def get_next_fire_time(self, previous_fire_time, now):
+        if previous_fire_time is None:
+            return now
+
+        interval = self.interval(previous_fire_time)
+        next_fire_time = previous_fire_time + timedelta(seconds=interval)
+        window_start = self._next_window_start(previous_fire_time, next_fire_time)
+        if window_start is not None:
+            next_fire_time = window_start
+            interval = self.base_interval(window_start)
+            self.backoff = 1.0
+        return self._apply_jitter(next_fire_time, self.jitter * interval, now)
+
+    def __str__(self):
+        windows = ", ".join(f"{w.start:%H:%M}-{w.end:%H:%M} every {w.interval:g}s" for w in self.windows)
+        return f"polling[{windows}; otherwise every {self.default_interval:g}s]"
@@ -0,0 +1,176 @@
+"""Offline replay of saved page snapshots (no browser, no network).
+
+Runs the crawler's selector cascade over rendered HTML saved by
+LGTimedealCrawler.save_snapshot, using selectolax's C-backed Lexbor parser,
+and rebuilds products from API responses saved by network_capture.
+"""
+import glob
+import json
+import logging
+import os
+from typing import Any, List, Dict, Optional
+from selectolax.lexbor import LexborHTMLParser
+from card_parser import parse_card, unique_products
+from card_selectors import (
+    PRODUCT_SELECTORS, NAME_SELECTORS, CARD_LABEL, TABPANEL_SELECTOR, TABPANEL_ITEM_SELECTOR, TAB_SELECTOR,
+    card_selector, is_product_text
+)
+from config import SNAPSHOT_DIR
+from network_capture import load_payloads, products_from_payloads
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Elements rendered on their own line by innerText
+BLOCK_TAGS = {
+    'address', 'article', 'aside', 'blockquote', 'dd', 'div', 'dl', 'dt',
+    'fieldset', 'figcaption', 'figure', 'footer', 'form', 'h1', 'h2', 'h3',
+    'h4', 'h5', 'h6', 'header', 'hr', 'li', 'main', 'nav', 'ol', 'p', 'pre',
+    'section', 'table', 'tr', 'ul',
+}
+# Elements whose text is never rendered
+HIDDEN_TAGS = {'script', 'style', 'noscript', 'template', 'head'}
+# Links to further pages of a list
+PAGINATION_SELECTOR = 'a[rel="next"], link[rel="next"], [class*="pagination"], [class*="paging"]'
+
+
+def _collect_text(node, parts: List[str]):
+    """Append the text of node's children, breaking lines at block elements."""
+    child = node.child
+    while child is not None:
+        if child.is_text_node:
+            parts.append(child.text_content or "")
+        elif child.tag == 'br':
+            parts.append('\n')
+        elif child.tag not in HIDDEN_TAGS:
+            block = child.tag in BLOCK_TAGS
+            if block:
+                parts.append('\n')
+            _collect_text(child, parts)
+            if block:
+                parts.append('\n')
+        child = child.next
+
+
+def inner_text(node) -> str:
+    """Approximate the browser's innerText for a parsed element."""
+    parts: List[str] = []
+    _collect_text(node, parts)
+    lines = (' '.join(line.split()) for line in ''.join(parts).split('\n'))
+    return '\n'.join(line for line in lines if line)
+
+
+def read_card_node(node) -> Dict:
+    """Read a parsed card element into the same dict as the browser reader."""
+    card = {
+        "name": "",
+        "href": "",
+        "ec_product": node.attributes.get('data-ec-product') or "",
+        "text": inner_text(node),
+    }
+    for selector in NAME_SELECTORS:
+        name_node = node.css_first(selector)
+        if name_node is not None:
+            card["name"] = inner_text(name_node)
+            card["href"] = name_node.attributes.get('href') or ""
+            break
+    return card
+
+
+def drop_wrappers(nodes: List) -> List:
+    """Drop matches containing two or more matches that hold CARD_LABEL (list wrappers)."""
+    labelled: Dict[int, int] = {}
+    for node in nodes:
+        if CARD_LABEL not in (node.text(deep=True) or ""):
+            continue
+        parent = node.parent
+        while parent is not None:
+            labelled[parent.mem_id] = labelled.get(parent.mem_id, 0) + 1
+            parent = parent.parent
+    return [node for node in nodes if labelled.get(node.mem_id, 0) < 2]
+
+
+def extract_cards_from_html(html: str) -> List[Dict]:
+    """Run the selector cascade over page HTML and return card dicts."""
+    tree = LexborHTMLParser(html)
+
+    for selector in PRODUCT_SELECTORS:
+        nodes = drop_wrappers(tree.css(card_selector(selector)))
+        if nodes:
+            logger.info(f"Found {len(nodes)} products using selector: {selector}")
+            return [read_card_node(node) for node in nodes]
+
+    # If no products found with the selectors, try to find by tabpanel content
+    cards = [read_card_node(node) for node in tree.css(TABPANEL_ITEM_SELECTOR)]
+    logger.info(f"Found {len(cards)} tabpanel list items")
+    return [card for card in cards if is_product_text(card["text"])]
+
+
+def embedded_payloads(html: str, url: str = "") -> List[Dict[str, Any]]:
+    """JSON data embedded in the page's script tags (e.g. __NEXT_DATA__), as captured payloads."""
+    payloads = []
+    for node in LexborHTMLParser(html).css('script[type="application/json"], script[type="application/ld+json"]'):
+        try:
+            data = json.loads(node.text(deep=True) or "")
+        except ValueError:
+            continue
+        payloads.append({"url": f"{url}#{node.attributes.get('id') or 'script'}", "data": data})
+    return payloads
+
+
+def unloaded_content(html: str, load_more_text: str = "") -> Optional[str]:
+    """Why the page HTML may hold only part of the list, or None if nothing is left to load.
+    
+    Looks for an enabled load-more button (when load_more_text is given),
+    pagination links and tabs whose panels are not rendered.
+    """
+    tree = LexborHTMLParser(html)
+    if load_more_text:
+        for node in tree.css('button, a, [role="button"]'):
+            if ('disabled' not in node.attributes and node.attributes.get('aria-disabled') != 'true'
+                    and load_more_text in inner_text(node)):
+                return f'"{load_more_text}" button'
+    if tree.css_first(PAGINATION_SELECTOR) is not None:
+        return "pagination"
+    tabs = len(tree.css(TAB_SELECTOR))
+    if tabs > 1:
+        rendered = sum(1 for panel in tree.css(TABPANEL_SELECTOR) if panel.css_first('li') is not None)
+        if rendered < tabs:
+            return f"{tabs - rendered} of {tabs} tabs not rendered"
+    return None
+
+
+def parse_html(html: str) -> List[Dict]:
+    """Extract products from page HTML."""
+    products = []
+    for card in extract_cards_from_html(html):
+        product_info = parse_card(card)
+        if product_info and product_info.get('name'):
+            products.append(product_info)
+    return list(unique_products(products))
+
+
+def list_snapshots(snapshot_dir: str = SNAPSHOT_DIR, include_payloads: bool = False) -> List[str]:
+    """List saved snapshots (and optionally captured payloads), oldest first."""
+    paths = glob.glob(os.path.join(snapshot_dir, "snapshot-*.html"))
+    if include_payloads:
+        paths += glob.glob(os.path.join(snapshot_dir, "payloads-*.json"))
+    return sorted(paths, key=os.path.getmtime)
+
+
+def latest_snapshot(snapshot_dir: str = SNAPSHOT_DIR) -> Optional[str]:
+    """Return the most recent snapshot path, if any."""
+    snapshots = list_snapshots(snapshot_dir)
+    return snapshots[-1] if snapshots else None
+
+
+def replay_snapshot(path: str) -> List[Dict]:
+    """Extract products from a saved snapshot or captured payload file."""
+    if path.endswith('.json'):
+        products = products_from_payloads(load_payloads(path))
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            html = f.read()
+        products = parse_html(html)
+    logger.info(f"Replayed {len(products)} products from {path}")
+    return products
@@ -1,11 +1,28 @@
 """Scheduler for LG Time Deal crawler."""
+import functools
 import logging
+import time
+from apscheduler.schedulers.base import BaseScheduler
 from apscheduler.schedulers.blocking import BlockingScheduler
 from apscheduler.triggers.cron import CronTrigger
 from datetime import datetime
+from typing import Callable, Optional
+from browser_manager import BrowserManager
+from async_crawler import crawl_urls
 from crawler import LGTimedealCrawler
+from polling import PollingTrigger, parse_windows
+from history import HistoryStore
+from metrics import count, current_run, finish_run, phase, start_run
+from pipeline import AlertPipeline
+from state_store import ProductStateStore, diff_count
+from subscribers import SubscriberRegistry
 from telegram_sender import TelegramSender
-from config import SCHEDULE_HOUR, SCHEDULE_MINUTE
+from worker import CrawlSupervisor
+from config import (
+    SCHEDULE_HOUR, SCHEDULE_MINUTE, BROWSER_REUSE, LG_TIMEDEAL_URLS,
+    SCHEDULE_MODE, POLL_WINDOWS, POLL_INTERVAL, POLL_JITTER, POLL_MAX_BACKOFF, SKIP_UNCHANGED,
+    WORKER_PROCESS
+)
 
 logging.basicConfig(
     level=logging.INFO,
@@ -14,55 +31,193 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def run_crawl_and_send():
-    """Run crawler and send notification."""
+def run_crawl_and_send(browser_manager: Optional[BrowserManager] = None,
+                       registry: Optional[SubscriberRegistry] = None) -> Optional[bool]:
+    """Run crawler and send notification.
+    
+    With a browser_manager the crawl runs in a fresh context of its warm
+    browser instead of launching a new browser. A long-lived registry is
+    reloaded only when the subscriber file changed. The run's metrics are
+    exported when it ends (see metrics.py).
+    
+    Returns whether products changed since the last run (None on failure).
+    """
+    start_run("crawl_and_send")
+    changed = _crawl_and_send(browser_manager, registry)
+    finish_run(success=changed is not None)
+    return changed
+
+
+def _crawl_and_send(browser_manager: Optional[BrowserManager],
+                    registry: Optional[SubscriberRegistry]) -> Optional[bool]:
     logger.info("Starting scheduled crawl and notification")
+    started_at = datetime.now()
+    pipeline = None
     
     try:
+        if registry is None:
+            registry = SubscriberRegistry()
+        else:
+            registry.reload_if_changed()
+        state_store = ProductStateStore()
+        # Alerts go out while the crawl goes on; see pipeline.py
+        pipeline = AlertPipeline(TelegramSender(), registry, state_store).start()
+        
         # Crawl products
-        crawler = LGTimedealCrawler()
-        products = crawler.crawl()
+        crawler = LGTimedealCrawler(skip_unchanged=SKIP_UNCHANGED)
+        incomplete_urls = []
+        with phase("crawl"):
+            if len(LG_TIMEDEAL_URLS) > 1:
+                # Several exhibition pages are crawled concurrently
+                products, incomplete_urls = crawl_urls(LG_TIMEDEAL_URLS)
+                pipeline.consume(products)
+            elif browser_manager is not None:
+                # The browser thread is only taken when plain HTTP found nothing
+                browser_tiers = crawler.tiers
+                if "http" in crawler.tiers and "browser" in crawler.tiers:
+                    pipeline.consume(crawler.iter_crawl(tiers=["http"], later_tiers=["browser"]))
+                    browser_tiers = [] if crawler.tier is not None else ["browser"]
+                if browser_tiers:
+                    browser_manager.run(
+                        lambda context: pipeline.consume(crawler.iter_crawl(context=context, tiers=browser_tiers))
+                    )
+            else:
+                pipeline.consume(crawler.iter_crawl())
         
+        if crawler.unchanged:
+            pipeline.finish(complete=False)
+            logger.info("Page unchanged since the last run; nothing to save or send")
+            return False
+        
+        products = pipeline.products
         if not products:
+            pipeline.finish(complete=False)
             logger.warning("No products found")
-            return
+            return None
         
-        # Save products
-        crawler.save_products(products)
+        # Removals are only known, and unseen products only pruned, after a full crawl
+        complete = crawler.error is None and not crawler.partial and not incomplete_urls
+        if crawler.partial:
+            logger.warning("Crawl stopped at a budget; removals are not reported this run")
+        if incomplete_urls:
+            logger.warning(f"{len(incomplete_urls)} pages failed or were cut short; "
+                           "removals are not reported this run")
+        count("products", len(products))
+        with phase("notify"):
+            success = pipeline.finish(complete)
+        if pipeline.first_alert_at is not None and crawler.loaded_at is not None:
+            first_alert = pipeline.first_alert_at - crawler.loaded_at
+            current_run().record("first_alert", first_alert)
+            logger.info(f"First alert {first_alert:.2f}s after page load")
         
-        # Send notification
-        sender = TelegramSender()
-        success = sender.send_products(products)
+        # Save products in one batch, off the alert path
+        crawler.save_products(products)
+        with phase("history"), HistoryStore() as history:
+            history.record_run(products, started_at)
         
+        # Alerts left in the outbox are retried by the next delivery; holding
+        # the state back as well would alert the same changes again
+        if pipeline.queued:
+            with phase("state"):
+                state_store.update(products, prune=complete)
+            if complete:
+                # Later runs may skip this page only once it was fully processed
+                crawler.commit_fingerprint()
         if success:
             logger.info(f"Successfully sent notification for {len(products)} products")
+        elif pipeline.queued:
+            logger.error("Failed to deliver some notifications; they stay in the outbox for the next run")
         else:
             logger.error("Failed to send notification")
+        
+        return diff_count(pipeline.diff) > 0
             
     except Exception as e:
         logger.error(f"Error in scheduled task: {e}", exc_info=True)
+        if pipeline is not None:
+            # Deliver what was already matched; the state is left untouched
+            pipeline.finish(complete=False)
+        return None
+
+
+# Job id of the polling crawl, which reschedules itself after each run
+POLL_JOB_ID = 'lg_timedeal_poll'
+
+
+def run_poll(scheduler: BaseScheduler, trigger: PollingTrigger, run: Callable[[], Optional[bool]]):
+    """One polling run: crawl and notify with run, then adjust the back-off and reschedule.
+    
+    The scheduler picks the next fire time before the run starts, so the
+    job is rescheduled once the run's back-off is known.
+    """
+    started = datetime.now(scheduler.timezone)
+    start = time.perf_counter()
+    changed = run()
+    elapsed = time.perf_counter() - start
+    
+    trigger.record(changed)
+    now = datetime.now(scheduler.timezone)
+    next_run_time = trigger.get_next_fire_time(started, now)
+    interval = (next_run_time - started).total_seconds()
+    logger.info(f"Poll run took {elapsed:.1f}s of its {interval:.0f}s interval "
+                f"({elapsed / interval:.0%}), next poll at {next_run_time:%H:%M:%S}")
+    if next_run_time < now:
+        logger.warning("Poll run took longer than its interval; overlapping runs are skipped")
+    job = scheduler.get_job(POLL_JOB_ID)
+    if job is not None:
+        job.modify(next_run_time=next_run_time)
 
 
 def start_scheduler():
     """Start the scheduler."""
     scheduler = BlockingScheduler()
+    browser_manager = None
+    supervisor = None
+    if WORKER_PROCESS:
+        # Each run in a supervised child process, which keeps its own browser
+        supervisor = CrawlSupervisor().start()
+        run = supervisor.run
+    else:
+        if BROWSER_REUSE and len(LG_TIMEDEAL_URLS) == 1:
+            browser_manager = BrowserManager()
+        run = functools.partial(run_crawl_and_send, browser_manager, SubscriberRegistry())
     
-    # Schedule daily at 9:00 AM
-    scheduler.add_job(
-        run_crawl_and_send,
-        trigger=CronTrigger(hour=SCHEDULE_HOUR, minute=SCHEDULE_MINUTE),
-        id='lg_timedeal_daily',
-        name='LG Time Deal Daily Crawl',
-        replace_existing=True
-    )
-    
-    logger.info(f"Scheduler started. Will run daily at {SCHEDULE_HOUR:02d}:{SCHEDULE_MINUTE:02d}")
+    if SCHEDULE_MODE == "poll":
+        trigger = PollingTrigger(parse_windows(POLL_WINDOWS), POLL_INTERVAL, POLL_JITTER, POLL_MAX_BACKOFF)
+        # One run at a time; runs missed while one was running collapse into one
+        scheduler.add_job(
+            run_poll,
+            trigger=trigger,
+            args=[scheduler, trigger, run],
+            id=POLL_JOB_ID,
+            name='LG Time Deal Polling Crawl',
+            max_instances=1,
+            coalesce=True,
+            misfire_grace_time=None,
+            replace_existing=True
+        )
+        logger.info(f"Scheduler started. Polling: {trigger}")
+    else:
+        # Schedule daily at 9:00 AM
+        scheduler.add_job(
+            run,
+            trigger=CronTrigger(hour=SCHEDULE_HOUR, minute=SCHEDULE_MINUTE),
+            id='lg_timedeal_daily',
+            name='LG Time Deal Daily Crawl',
+            replace_existing=True
+        )
+        logger.info(f"Scheduler started. Will run daily at {SCHEDULE_HOUR:02d}:{SCHEDULE_MINUTE:02d}")
     logger.info("Press Ctrl+C to exit")
     
     try:
         scheduler.start()
     except (KeyboardInterrupt, SystemExit):
         logger.info("Scheduler stopped")
+    finally:
+        if browser_manager is not None:
+            browser_manager.close()
+        if supervisor is not None:
+            supervisor.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,132 @@
+"""Per-product state between crawls, for change-based notifications."""
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple, TypedDict
+from card_parser import product_key
+from config import STATE_JSON
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Fields compared between runs
+TRACKED_FIELDS = ("name", "sale_price", "original_price", "max_benefit_price", "discount_rate", "stock")
+
+
+class ProductChange(TypedDict):
+    """One product that changed since the last run."""
+    product: Dict
+    # State entry from the last run, None for new products
+    previous: Optional[Dict]
+
+
+class ProductDiff(TypedDict):
+    """Changes between the last run and the current crawl."""
+    new: List[ProductChange]
+    removed: List[ProductChange]
+    price_dropped: List[ProductChange]
+    stock_changed: List[ProductChange]
+    sold_out: List[ProductChange]
+
+
+CHANGE_TYPES = ("new", "price_dropped", "sold_out", "stock_changed", "removed")
+
+
+def content_hash(product: Dict) -> str:
+    """Hash of the tracked fields, to skip unchanged products quickly."""
+    values = [product.get(field) for field in TRACKED_FIELDS]
+    return hashlib.sha1(json.dumps(values, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def empty_diff() -> ProductDiff:
+    """A diff with no changes."""
+    return ProductDiff(new=[], removed=[], price_dropped=[], stock_changed=[], sold_out=[])
+
+
+def diff_count(diff: ProductDiff) -> int:
+    """Total number of changes in a diff."""
+    return sum(len(diff[change_type]) for change_type in CHANGE_TYPES)
+
+
+class ProductStateStore:
+    """Last-seen price, discount and stock for every product, keyed by model and link."""
+
+    def __init__(self, path: str = STATE_JSON):
+        self.path = path
+        self.state: Dict[str, Dict] = self.load()
+
+    def load(self) -> Dict[str, Dict]:
+        """Load the state saved by the last run."""
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable state file {self.path}: {e}")
+            return {}
+        # Re-key entries, so state saved with older keys still matches
+        return {product_key(entry["product"]) if "product" in entry else key: entry for key, entry in state.items()}
+
+    def product_changes(self, product: Dict) -> List[Tuple[str, ProductChange]]:
+        """Changes of one product against the stored state (all but removed)."""
+        previous = self.state.get(product_key(product))
+        if previous is None:
+            return [("new", ProductChange(product=product, previous=None))]
+        if previous.get("hash") == content_hash(product):
+            return []
+
+        changes = []
+        change = ProductChange(product=product, previous=previous)
+        old_price = previous.get("sale_price")
+        new_price = product.get("sale_price")
+        if old_price is not None and new_price is not None and new_price < old_price:
+            changes.append(("price_dropped", change))
+
+        old_stock = previous.get("stock")
+        new_stock = product.get("stock")
+        if old_stock is not None and new_stock is not None and old_stock != new_stock:
+            changes.append(("sold_out" if new_stock == 0 else "stock_changed", change))
+        return changes
+
+    def removed_changes(self, seen_keys: Iterable[str]) -> List[Tuple[str, ProductChange]]:
+        """Stored products whose key is not among seen_keys."""
+        seen_keys = set(seen_keys)
+        return [
+            ("removed", ProductChange(product=previous["product"], previous=previous))
+            for key, previous in self.state.items()
+            if key not in seen_keys
+        ]
+
+    def update(self, products: List[Dict], prune: bool = True):
+        """Replace the stored state with the current crawl and save it.
+
+        With prune=False (e.g. after a partial crawl) products missing from
+        the crawl are kept instead of dropped.
+        """
+        now = datetime.now().isoformat(timespec='seconds')
+        state = {} if prune else dict(self.state)
+        for product in products:
+            key = product_key(product)
+            previous = self.state.get(key) or {}
+            state[key] = {
+                "product": product,
+                "sale_price": product.get("sale_price"),
+                "discount_rate": product.get("discount_rate"),
+                "stock": product.get("stock"),
+                "hash": content_hash(product),
+                "first_seen": previous.get("first_seen", now),
+                "last_seen": now,
+            }
+        self.state = state
+        self.save()
+
+    def save(self):
+        """Write the state file (temp file + rename, so readers never see half of it)."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,195 @@
+"""Product snapshot storage: atomic writes, compact formats, streaming reads, rotation.
+
+A snapshot is written to a temp file in the same directory and renamed
+over the current one, so a concurrent reader (e.g. `--mode send` while the
+scheduler crawls) sees either the previous or the new snapshot, never half
+of one. Formats, chosen by PRODUCTS_FORMAT and recognised by extension:
+
+- json: one indented JSON array (the original products.json)
+- ndjson: one compact JSON object per line, read back line by line
+- msgpack: a stream of MessagePack maps, read back one by one (needs msgpack)
+
+Any of them may be gzip-compressed (".gz"). Before a new snapshot
+replaces the current one, the current one is gzipped into PRODUCTS_ARCHIVE_DIR
+and only the newest PRODUCTS_ARCHIVE_KEEP archives are kept.
+"""
+import gzip
+import json
+import logging
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from typing import IO, Dict, Iterable, Iterator, List, Optional
+from config import DATA_DIR, PRODUCTS_FORMAT, PRODUCTS_ARCHIVE_DIR, PRODUCTS_ARCHIVE_KEEP
+
+try:
+    import orjson
+except ImportError:  # The standard json module is used instead
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # The msgpack format falls back to ndjson
+    msgpack = None
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+EXTENSIONS = {"json": ".json", "ndjson": ".ndjson", "msgpack": ".msgpack"}
+
+
+def snapshot_path(fmt: str = PRODUCTS_FORMAT, data_dir: str = DATA_DIR) -> str:
+    """Path of the current products snapshot in a format."""
+    return os.path.join(data_dir, f"products{EXTENSIONS[fmt]}")
+
+
+def detect_format(path: str) -> str:
+    """Format of a snapshot file from its extension (".gz" ignored)."""
+    name = path[:-3] if path.endswith(".gz") else path
+    for fmt, extension in EXTENSIONS.items():
+        if name.endswith(extension):
+            return fmt
+    if name.endswith(".jsonl"):
+        return "ndjson"
+    raise ValueError(f"Unknown snapshot format: {path}")
+
+
+def writable_format(fmt: str) -> str:
+    """The format to write: msgpack falls back to ndjson without the package."""
+    if fmt == "msgpack" and msgpack is None:
+        logger.warning("msgpack is not installed, writing ndjson instead")
+        return "ndjson"
+    if fmt not in EXTENSIONS:
+        raise ValueError(f"Unknown snapshot format {fmt!r}, expected one of {', '.join(EXTENSIONS)}")
+    return fmt
+
+
+def _dump_line(record: Dict) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(record) + b"\n"
+    return (json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n").encode('utf-8')
+
+
+def _open(path: str, mode: str) -> IO[bytes]:
+    return gzip.open(path, mode) if path.endswith(".gz") else open(path, mode)
+
+
+def write_records(f: IO[bytes], records: Iterable[Dict], fmt: str) -> int:
+    """Encode records to a binary file object; returns how many were written."""
+    if fmt == "json":
+        records = list(records)
+        f.write(json.dumps(records, ensure_ascii=False, indent=2).encode('utf-8'))
+        return len(records)
+
+    count = 0
+    packer = msgpack.Packer() if fmt == "msgpack" else None
+    for record in records:
+        f.write(packer.pack(record) if packer is not None else _dump_line(record))
+        count += 1
+    return count
+
+
+def write_snapshot(records: Iterable[Dict], path: str, archive: bool = True) -> int:
+    """Atomically replace the snapshot at path; returns how many records were written.
+
+    The format comes from the extension. With archive, the snapshot being
+    replaced is first gzipped into PRODUCTS_ARCHIVE_DIR.
+    """
+    fmt = detect_format(path)
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(prefix=".products-", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as raw:
+            if path.endswith(".gz"):
+                with gzip.GzipFile(fileobj=raw, mode='wb') as f:
+                    count = write_records(f, records, fmt)
+            else:
+                count = write_records(raw, records, fmt)
+            raw.flush()
+            os.fsync(raw.fileno())
+        # mkstemp creates the file readable by its owner only
+        os.chmod(tmp_path, 0o644)
+        if archive and PRODUCTS_ARCHIVE_KEEP > 0 and os.path.exists(path):
+            archive_snapshot(path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return count
+
+
+def iter_snapshot(path: str) -> Iterator[Dict]:
+    """Read a snapshot record by record.
+
+    ndjson and msgpack snapshots are streamed with bounded memory; a json
+    array has to be parsed whole. The file stays open until the iterator is
+    exhausted, so a snapshot renamed over it meanwhile does not affect it.
+    """
+    fmt = detect_format(path)
+    with _open(path, 'rb') as f:
+        if fmt == "json":
+            data = f.read()
+            yield from (orjson.loads(data) if orjson is not None else json.loads(data))
+        elif fmt == "msgpack":
+            if msgpack is None:
+                raise RuntimeError(f"msgpack is not installed, cannot read {path}")
+            yield from msgpack.Unpacker(f, raw=False)
+        else:
+            for line in f:
+                if line.strip():
+                    yield orjson.loads(line) if orjson is not None else json.loads(line)
+
+
+def current_snapshot(data_dir: str = DATA_DIR) -> Optional[str]:
+    """The newest products snapshot in any format, if any."""
+    paths = [snapshot_path(fmt, data_dir) for fmt in EXTENSIONS]
+    paths = [path for path in paths if os.path.exists(path)]
+    return max(paths, key=os.path.getmtime) if paths else None
+
+
+def archive_snapshot(path: str, archive_dir: str = PRODUCTS_ARCHIVE_DIR,
+                     keep: int = PRODUCTS_ARCHIVE_KEEP) -> str:
+    """Gzip a snapshot into the archive and drop all but the newest keep archives."""
+    os.makedirs(archive_dir, exist_ok=True)
+    name = os.path.basename(path)
+    stem, extension = os.path.splitext(name[:-3] if name.endswith(".gz") else name)
+    archive_path = os.path.join(
+        archive_dir, f"{stem}-{datetime.fromtimestamp(os.path.getmtime(path)):%Y%m%d-%H%M%S}{extension}.gz"
+    )
+    with _open(path, 'rb') as src, gzip.open(archive_path, 'wb', compresslevel=6) as dst:
+        shutil.copyfileobj(src, dst)
+
+    archives = sorted(
+        entry for entry in os.listdir(archive_dir)
+        if entry.startswith(f"{stem}-") and entry.endswith(".gz")
+    )
+    for entry in archives[:-keep]:
+        os.remove(os.path.join(archive_dir, entry))
+    return archive_path
+
+
+def save_products(products: Iterable[Dict], fmt: str = PRODUCTS_FORMAT, data_dir: str = DATA_DIR) -> str:
+    """Write the current products snapshot; returns its path."""
+    path = snapshot_path(writable_format(fmt), data_dir)
+    count = write_snapshot(products, path)
+    logger.info(f"Saved {count} products to {path}")
+    return path
+
+
+def iter_products(path: Optional[str] = None) -> Iterator[Dict]:
+    """Stream the products of a snapshot (default: the current one)."""
+    path = path or current_snapshot()
+    if path is None or not os.path.exists(path):
+        return iter(())
+    return iter_snapshot(path)
+
+
+def load_products(path: Optional[str] = None) -> List[Dict]:
+    """Read a whole snapshot (default: the current one)."""
+    return list(iter_products(path))
@@ -0,0 +1,138 @@
+"""Subscriber registry: many Telegram chats, each with its own watchlist and thresholds.
+
+Subscribers are read from a JSON file (SUBSCRIBERS_JSON):
+
+    [
+        {"chat_id": "123456789", "codes": ["42C4", "48C5"],
+         "change_types": ["new", "price_dropped"], "min_price_drop_pct": 5}
+    ]
+
+Only chat_id and codes are required; thresholds default to the NOTIFY_*
+settings. Without the file, TELEGRAM_CHAT_ID with PRIORITY_PRODUCTS is the
+only subscriber. The registry keeps an inverted index from watch code to
+subscribers and one WatchlistMatcher over all codes, so each product is
+matched once and routed to every chat watching one of its codes.
+"""
+import json
+import logging
+import os
+from typing import Dict, List, Optional, TypedDict
+from config import (
+    SUBSCRIBERS_JSON, TELEGRAM_CHAT_ID, PRIORITY_PRODUCTS,
+    NOTIFY_CHANGE_TYPES, NOTIFY_MIN_PRICE_DROP_PCT, NOTIFY_MIN_STOCK_CHANGE
+)
+from state_store import ProductChange
+from watchlist import WatchlistMatcher
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class Subscriber(TypedDict):
+    """One chat with its watchlist and notification thresholds."""
+    chat_id: str
+    codes: List[str]
+    change_types: List[str]
+    min_price_drop_pct: float
+    min_stock_change: int
+
+
+def make_subscriber(entry: Dict) -> Subscriber:
+    """Build a subscriber from a registry entry, filling in default thresholds."""
+    return Subscriber(
+        chat_id=str(entry["chat_id"]),
+        codes=[code.strip().upper() for code in entry.get("codes", []) if code.strip()],
+        change_types=list(entry.get("change_types", NOTIFY_CHANGE_TYPES)),
+        min_price_drop_pct=float(entry.get("min_price_drop_pct", NOTIFY_MIN_PRICE_DROP_PCT)),
+        min_stock_change=int(entry.get("min_stock_change", NOTIFY_MIN_STOCK_CHANGE)),
+    )
+
+
+def default_subscriber() -> Subscriber:
+    """The single subscriber configured by TELEGRAM_CHAT_ID and PRIORITY_PRODUCTS."""
+    return make_subscriber({"chat_id": TELEGRAM_CHAT_ID, "codes": PRIORITY_PRODUCTS})
+
+
+def passes_threshold(subscriber: Subscriber, change_type: str, change: ProductChange) -> bool:
+    """Check if a change is big enough to notify the subscriber."""
+    if change_type not in subscriber["change_types"]:
+        return False
+
+    product = change["product"]
+    previous = change["previous"]
+    if change_type == "price_dropped":
+        old_price = previous["sale_price"]
+        drop_pct = (old_price - product["sale_price"]) * 100 / old_price if old_price else 0
+        return drop_pct >= subscriber["min_price_drop_pct"]
+    if change_type == "stock_changed":
+        return abs(previous["stock"] - product["stock"]) >= subscriber["min_stock_change"]
+    return True
+
+
+class SubscriberRegistry:
+    """Subscribers loaded from SUBSCRIBERS_JSON, reloaded when the file changes."""
+
+    def __init__(self, path: str = SUBSCRIBERS_JSON):
+        self.path = path
+        self.subscribers: Dict[str, Subscriber] = {}
+        # Watch code -> chat ids watching it
+        self.index: Dict[str, List[str]] = {}
+        self.matcher = WatchlistMatcher([])
+        self._mtime: Optional[float] = None
+        self.reload()
+
+    def _file_mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.path).st_mtime
+        except OSError:
+            return None
+
+    def load(self) -> List[Subscriber]:
+        """Read the subscriber file (the default subscriber when there is none)."""
+        if not os.path.exists(self.path):
+            return [default_subscriber()] if TELEGRAM_CHAT_ID else []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return [make_subscriber(entry) for entry in json.load(f)]
+
+    def reload(self):
+        """Rebuild the index and matcher from the subscriber file."""
+        mtime = self._file_mtime()
+        try:
+            subscribers = self.load()
+        except (OSError, ValueError, KeyError) as e:
+            # Keep serving the previous registry until the file is fixed
+            logger.error(f"Failed to load subscribers from {self.path}: {e}")
+            return
+
+        index: Dict[str, List[str]] = {}
+        for subscriber in subscribers:
+            for code in subscriber["codes"]:
+                index.setdefault(code, []).append(subscriber["chat_id"])
+
+        self.subscribers = {subscriber["chat_id"]: subscriber for subscriber in subscribers}
+        self.index = index
+        self.matcher = WatchlistMatcher(index)
+        self._mtime = mtime
+        logger.info(f"Loaded {len(self.subscribers)} subscribers watching {len(index)} codes")
+
+    def reload_if_changed(self) -> bool:
+        """Reload when the subscriber file was created, modified or removed."""
+        if self._file_mtime() == self._mtime:
+            return False
+        self.reload()
+        return True
+
+    def chats_for(self, product: Dict) -> List[str]:
+        """Chat ids watching any code found in the product."""
+        chats = []
+        for code in self.matcher.match_product(product):
+            chats.extend(self.index[code])
+        return list(dict.fromkeys(chats))
+
+    def route_products(self, products: List[Dict]) -> Dict[str, List[Dict]]:
+        """Group products by interested chat, matching each product once."""
+        routed: Dict[str, List[Dict]] = {}
+        for product in products:
+            for chat_id in self.chats_for(product):
+                routed.setdefault(chat_id, []).append(product)
+        return routed
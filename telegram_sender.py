@@ -1,12 +1,94 @@
 """Telegram notification sender for LG Time Deal products."""
+import html
 import logging
-import requests
-from typing import List, Dict
-from config import TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, PRIORITY_PRODUCTS
+import re
+from typing import Callable, List, Dict, Optional, Tuple
+from config import TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, TELEGRAM_API_BASE
+from delivery import DeliveryQueue, shared_queue
+from metrics import count, timed
+from state_store import ProductChange
+from subscribers import SubscriberRegistry
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Messages use HTML: only &, < and > need escaping, so any product name is safe
+PARSE_MODE = "HTML"
+# Telegram's limit on message text after entity parsing, in UTF-16 code units
+MESSAGE_LIMIT = 4096
+# Product names longer than this are cut, so a single product always fits a message
+MAX_NAME_LENGTH = 300
+# Separator line after each product block
+BLOCK_SEPARATOR = "---\n"
+
+TAG_PATTERN = re.compile(r'<[^>]*>')
+
+
+def escape(text) -> str:
+    """Escape text for Telegram HTML."""
+    return html.escape(str(text), quote=False)
+
+
+def visible_length(text: str) -> int:
+    """Length of HTML message text as Telegram counts it: tags removed, in UTF-16 code units."""
+    plain = html.unescape(TAG_PATTERN.sub('', text))
+    return len(plain.encode('utf-16-le')) // 2
+
+
+def pack_messages(header: str, blocks: List[str], footer: Callable[[int], str],
+                  limit: int = MESSAGE_LIMIT) -> List[str]:
+    """Pack rendered blocks, in order, into as few messages as fit under limit.
+    
+    Each message is header, its blocks each followed by BLOCK_SEPARATOR, and
+    footer(number of blocks), joined with newlines. Block lengths are
+    measured once; filling each message before starting the next is
+    optimal when block order is kept.
+    """
+    if not blocks:
+        return []
+    
+    # Footer budget for the largest count it can show
+    footer_length = visible_length(footer(len(blocks)))
+    fixed_length = visible_length(header) + 1 + footer_length
+    separator_length = visible_length(BLOCK_SEPARATOR) + 2  # plus the two joining newlines
+    
+    messages = []
+    current: List[str] = []
+    length = fixed_length
+    for block in blocks:
+        block_length = visible_length(block) + separator_length
+        if current and length + block_length > limit:
+            messages.append(_join_message(header, current, footer))
+            current = []
+            length = fixed_length
+        current.append(block)
+        length += block_length
+    messages.append(_join_message(header, current, footer))
+    return messages
+
+
+def _join_message(header: str, blocks: List[str], footer: Callable[[int], str]) -> str:
+    message_parts = [header]
+    for block in blocks:
+        message_parts.append(block)
+        message_parts.append(BLOCK_SEPARATOR)
+    message_parts.append(footer(len(blocks)))
+    return "\n".join(message_parts)
+
+
+PRODUCTS_HEADER = "🔥 <b>원하는 상품 발견!</b> 🔥\n\n"
+CHANGES_HEADER = "🔔 <b>원하는 상품 변동 알림</b> 🔔\n\n"
+
+
+def products_footer(count: int) -> str:
+    """Footer of a product message."""
+    return f"\n총 {count}개의 원하는 상품이 있습니다."
+
+
+def changes_footer(count: int) -> str:
+    """Footer of a change message."""
+    return f"\n총 {count}건의 변동이 있습니다."
+
 
 class TelegramSender:
     """Send product notifications via Telegram."""
@@ -14,19 +96,8 @@ class TelegramSender:
     def __init__(self):
         self.bot_token = TELEGRAM_BOT_TOKEN
         self.chat_id = TELEGRAM_CHAT_ID
-        self.api_url = f"https://api.telegram.org/bot{self.bot_token}"
-        self.priority_products = [code.upper() for code in PRIORITY_PRODUCTS]
-    
-    def is_priority_product(self, product: Dict) -> bool:
-        """Check if product is a priority product."""
-        product_name = product.get('name', '').upper()
-        product_model = product.get('model', '').upper()
-        
-        # Check if any priority code is in product name or model
-        for code in self.priority_products:
-            if code in product_name or code in product_model:
-                return True
-        return False
+        self.api_url = f"{TELEGRAM_API_BASE}/bot{self.bot_token}"
+        self._delivery: Optional[DeliveryQueue] = None
     
     def format_price(self, price: int) -> str:
         """Format price with commas."""
@@ -36,7 +107,9 @@ class TelegramSender:
     
     def format_product_message(self, product: Dict) -> str:
         """Format a single product as a message."""
-        name = product.get('name', 'N/A')
+        name = product.get('name') or ''
+        if len(name) > MAX_NAME_LENGTH:
+            name = name[:MAX_NAME_LENGTH - 1] + "…"
         model = product.get('model', '')
         discount_rate = product.get('discount_rate')
         sale_price = product.get('sale_price')
@@ -45,10 +118,10 @@ class TelegramSender:
         stock = product.get('stock')
         link = product.get('link', '')
         
-        message = f"*{name}*\n"
+        message = f"<b>{escape(name)}</b>\n"
         
         if model:
-            message += f"모델명: `{model}`\n"
+            message += f"모델명: <code>{escape(model)}</code>\n"
         
         if discount_rate:
             message += f"할인율: {discount_rate}%\n"
@@ -66,85 +139,95 @@ class TelegramSender:
             message += f"재고: {stock}개 남음\n"
         
         if link:
-            message += f"[상품 보기]({link})\n"
+            message += f"<a href=\"{html.escape(link)}\">상품 보기</a>\n"
         
         return message
     
-    def create_message(self, products: List[Dict]) -> str:
-        """Create formatted message from products list (only priority products)."""
-        if not products:
-            return "오늘 타임딜 상품이 없습니다."
-        
-        # Filter only priority products
-        priority_products = []
-        for product in products:
-            if self.is_priority_product(product):
-                priority_products.append(product)
-        
-        # Build message
-        message_parts = []
-        
-        if priority_products:
-            message_parts.append("🔥 *원하는 상품 발견!* 🔥\n\n")
-            for product in priority_products:
-                message_parts.append(self.format_product_message(product))
-                message_parts.append("---\n")
-            message_parts.append(f"\n총 {len(priority_products)}개의 원하는 상품이 있습니다.")
-        else:
-            message_parts.append("오늘 원하는 상품(42C5, 42C4, 48C5, 48C4)이 없습니다.")
-        
-        return "\n".join(message_parts)
+    def create_messages(self, priority_products: List[Dict]) -> List[str]:
+        """Render priority products once and pack them into as few messages as possible."""
+        blocks = [self.format_product_message(product) for product in priority_products]
+        return pack_messages(PRODUCTS_HEADER, blocks, products_footer)
     
-    def send_message(self, text: str, parse_mode: str = "Markdown") -> bool:
-        """Send message to Telegram."""
-        if not self.bot_token or not self.chat_id:
+    @property
+    def delivery(self) -> DeliveryQueue:
+        """Outbox and sender for Telegram messages, shared by the process's senders."""
+        if self._delivery is None:
+            self._delivery = shared_queue(self.bot_token)
+        return self._delivery
+    
+    def queue_message(self, text: str, parse_mode: str = PARSE_MODE, chat_id: Optional[str] = None) -> bool:
+        """Add a message to the outbox (to chat_id, default TELEGRAM_CHAT_ID)."""
+        chat_id = chat_id or self.chat_id
+        if not self.bot_token or not chat_id:
             logger.error("Telegram bot token or chat ID not configured")
             return False
-        
-        url = f"{self.api_url}/sendMessage"
-        payload = {
-            "chat_id": self.chat_id,
-            "text": text,
-            "parse_mode": parse_mode,
-        }
-        
-        try:
-            response = requests.post(url, json=payload, timeout=10)
-            response.raise_for_status()
-            logger.info("Message sent successfully to Telegram")
-            return True
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Failed to send message to Telegram: {e}")
+        self.delivery.enqueue(chat_id, text, parse_mode)
+        count("messages_queued")
+        return True
+    
+    @timed("deliver")
+    def flush(self) -> bool:
+        """Deliver every queued message, including ones left over from earlier runs."""
+        if self._delivery is None and not self.bot_token:
             return False
+        return self.delivery.deliver()
     
-    def send_products(self, products: List[Dict]) -> bool:
-        """Send only priority products to Telegram."""
-        # Filter only priority products
-        priority_products = [p for p in products if self.is_priority_product(p)]
-        
-        if not priority_products:
-            logger.info("No priority products found. Skipping notification.")
-            return True  # Not an error, just no products to send
+    def send_message(self, text: str, parse_mode: str = PARSE_MODE, chat_id: Optional[str] = None) -> bool:
+        """Send message to Telegram (to chat_id, default TELEGRAM_CHAT_ID)."""
+        if not self.queue_message(text, parse_mode, chat_id):
+            return False
+        return self.flush()
+    
+    def format_change_message(self, change_type: str, change: ProductChange) -> str:
+        """Format a single product change as a message."""
+        product = change["product"]
+        previous = change["previous"]
         
-        message = self.create_message(priority_products)
+        if change_type == "new":
+            headline = "🆕 새 상품"
+        elif change_type == "price_dropped":
+            old_price = previous["sale_price"]
+            new_price = product["sale_price"]
+            headline = (f"📉 가격 인하: {self.format_price(old_price)} → {self.format_price(new_price)} "
+                        f"(-{(old_price - new_price) * 100 / old_price:.1f}%)")
+        elif change_type == "sold_out":
+            headline = "❌ 품절"
+        elif change_type == "stock_changed":
+            headline = f"📦 재고 변동: {previous['stock']}개 → {product['stock']}개"
+        else:
+            headline = "🗑 판매 종료"
         
-        # Telegram has a message length limit of 4096 characters
-        # Split message if too long
-        max_length = 4000  # Leave some buffer
+        return f"{escape(headline)}\n{self.format_product_message(product)}"
+    
+    def create_change_messages(self, changes: List[Tuple[str, ProductChange]]) -> List[str]:
+        """Render changes once and pack them into as few messages as possible."""
+        blocks = [self.format_change_message(change_type, change) for change_type, change in changes]
+        return pack_messages(CHANGES_HEADER, blocks, changes_footer)
+    
+    def queue_change_list(self, changes: List[Tuple[str, ProductChange]], chat_id: Optional[str] = None) -> bool:
+        """Queue already filtered changes for one chat."""
+        return all([self.queue_message(message, chat_id=chat_id)
+                    for message in self.create_change_messages(changes)])
+    
+    def send_products_to_subscribers(self, products: List[Dict], registry: SubscriberRegistry) -> bool:
+        """Send each subscriber the products on its watchlist."""
+        routed = registry.route_products(products)
+        if not routed:
+            logger.info("No watched products for any subscriber. Skipping notification.")
+            return True
         
-        if len(message) <= max_length:
-            return self.send_message(message)
-        else:
-            # Split into multiple messages if too long
-            success = True
-            chunk_size = 3  # Send 3 products per message
-            for i in range(0, len(priority_products), chunk_size):
-                chunk = priority_products[i:i + chunk_size]
-                chunk_message = self.create_message(chunk)
-                if not self.send_message(chunk_message):
-                    success = False
-            
-            return success
+        success = True
+        for chat_id, chat_products in routed.items():
+            logger.info(f"Sending {len(chat_products)} products to chat {chat_id}")
+            if not self.queue_product_list(chat_products, chat_id):
+                success = False
+        # All chats are delivered together, concurrently across chats
+        return self.flush() and success
+    
+    def queue_product_list(self, priority_products: List[Dict], chat_id: Optional[str] = None) -> bool:
+        """Queue already filtered priority products for one chat."""
+        return all([self.queue_message(message, chat_id=chat_id)
+                    for message in self.create_messages(priority_products)])
 
 
 if __name__ == "__main__":
@@ -172,5 +255,5 @@ if __name__ == "__main__":
     ]
     
     sender = TelegramSender()
-    sender.send_products(sample_products)
+    sender.send_products_to_subscribers(sample_products, SubscriberRegistry())
 
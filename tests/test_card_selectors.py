@@ -0,0 +1,53 @@
+"""Card selection on pages whose card selectors match nested elements."""
+import os
+from card_selectors import card_selector
+from replay import extract_cards_from_html, parse_html
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def read_fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def test_broad_selector_keeps_cards_inside_list_wrapper():
+    products = parse_html(read_fixture("nested_cards.html"))
+    assert [product["model"] for product in products] == ["OLED42C4ENA", "OLED48C4ENA", "OLED55C4ENA"]
+    assert [product["stock"] for product in products] == [3, 5, 1]
+
+
+def test_outermost_skips_cards_nested_in_cards():
+    html = (
+        '<ul><li data-ec-product="{}"><a href="/a">A</a><p>할인 후 판매가 1,000원</p>'
+        '<div data-ec-product="{}"><a href="/a-option">A option</a></div></li>'
+        '<li data-ec-product="{}"><a href="/b">B</a><p>할인 후 판매가 2,000원</p></li></ul>'
+    )
+    cards = extract_cards_from_html(html)
+    assert [card["href"] for card in cards] == ["/a", "/b"]
+
+
+def test_nesting_modes():
+    assert card_selector('.product-item', "outermost") == '.product-item:not(.product-item .product-item)'
+    assert card_selector('.product-item', "innermost") == '.product-item:not(:has(.product-item))'
+    assert card_selector('.product-item', "all") == '.product-item'
+    assert card_selector('div[class*="product"]', "outermost") == 'div[class*="product"]:has(a[href])'
+
+
+def test_list_wrapper_matching_the_card_selector_is_not_read():
+    # The wrapper matches div[class*="product"] like its cards; read as a card it
+    # would get the first card's name with the second card's stock and benefit price
+    html = (
+        '<div class="product-list"><div class="product-card">'
+        '<div class="product-info"><a href="/tvs/oled42c4ena">LG TV</a><p>OLED42C4ENA</p></div>'
+        '<p>할인율 20%</p><p>할인 후 판매가 1,590,000원</p></div>'
+        '<div class="product-card">'
+        '<div class="product-info"><a href="/tvs/oled48c4ena">LG TV</a><p>OLED48C4ENA</p></div>'
+        '<p>할인율 15%</p><p>할인 후 판매가 1,690,000원</p><p>최대혜택가 1,500,000원</p><p>2개 남음</p></div></div>'
+    )
+    cards = extract_cards_from_html(html)
+    assert not [card for card in cards if "OLED42C4ENA" in card["text"] and "OLED48C4ENA" in card["text"]]
+    products = parse_html(html)
+    assert [(product["model"], product["stock"], product["max_benefit_price"]) for product in products] == [
+        ("OLED42C4ENA", None, None), ("OLED48C4ENA", 2, 1500000)
+    ]
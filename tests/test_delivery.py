@@ -0,0 +1,66 @@
+"""DeliveryQueue against the fake Telegram server."""
+import time
+import pytest
+from benchmarks.fake_telegram import FakeTelegramServer
+from delivery import DeliveryQueue
+
+TOKEN = "123:test"
+
+
+@pytest.fixture
+def server():
+    server = FakeTelegramServer(global_rate=1000, chat_rate=1000).start()
+    yield server
+    server.shutdown()
+
+
+def open_queue(server: FakeTelegramServer, tmp_path, **kwargs) -> DeliveryQueue:
+    # The client paces nothing itself, so the server's limits are what it hits
+    options = dict(concurrency=4, global_rate=1000, chat_rate=1000, max_retries=3)
+    options.update(kwargs)
+    return DeliveryQueue(bot_token=TOKEN, api_base=server.url,
+                         outbox_path=str(tmp_path / "outbox.db"), **options)
+
+
+def test_waits_retry_after_on_429(server, tmp_path):
+    server.chat_rate = 1
+    server.retry_after = 2
+    queue = open_queue(server, tmp_path)
+    queue.enqueue("1", "first", parse_mode=None)
+    queue.enqueue("1", "second", parse_mode=None)
+    start = time.monotonic()
+    assert queue.deliver()
+    queue.close()
+    # One 429 for the second message, then a retry no sooner than retry_after
+    assert time.monotonic() - start >= 2
+    assert server.rate_limited == 1
+    assert [message["text"] for message in server.messages] == ["first", "second"]
+
+
+def test_keeps_order_per_chat(server, tmp_path):
+    queue = open_queue(server, tmp_path)
+    for index in range(5):
+        for chat_id in ("1", "2", "3"):
+            queue.enqueue(chat_id, f"{chat_id}-{index}", parse_mode=None)
+    assert queue.deliver()
+    queue.close()
+    for chat_id in ("1", "2", "3"):
+        texts = [message["text"] for message in server.messages if message["chat_id"] == chat_id]
+        assert texts == [f"{chat_id}-{index}" for index in range(5)]
+
+
+def test_pending_messages_survive_a_restart(server, tmp_path):
+    server.error_rate = 1.0
+    queue = open_queue(server, tmp_path, max_retries=0)
+    queue.enqueue("1", "first", parse_mode=None)
+    queue.enqueue("1", "second", parse_mode=None)
+    assert not queue.deliver()
+    assert queue.pending() == 2
+    queue.close()
+
+    server.error_rate = 0.0
+    queue = open_queue(server, tmp_path)
+    assert queue.deliver()
+    assert queue.pending() == 0
+    queue.close()
+    assert [message["text"] for message in server.messages] == ["first", "second"]
@@ -0,0 +1,33 @@
+"""Per-product summaries in the price and stock history."""
+from history import HistoryStore
+
+
+def test_same_model_on_two_pages_keeps_two_summaries(tmp_path):
+    first = {"model": "OLED42C4ENA", "name": "LG TV", "link": "https://www.lge.co.kr/a", "sale_price": 100, "stock": 5}
+    second = dict(first, link="https://www.lge.co.kr/b", sale_price=90, stock=9)
+    with HistoryStore(str(tmp_path / "history.db")) as history:
+        history.record_run([first, second])
+        history.record_run([dict(first, sale_price=80, stock=3), second])
+        lowest = history.lowest_prices("OLED42C4ENA")
+        depletion = history.stock_depletion("OLED42C4ENA")
+    assert [(row["link"], row["lowest_price"]) for row in lowest] == [
+        ("https://www.lge.co.kr/a", 80), ("https://www.lge.co.kr/b", 90)
+    ]
+    assert [row["sold"] for row in depletion] == [2, 0]
+
+
+def test_price_series_per_listing(tmp_path):
+    first = {"model": "OLED42C4ENA", "name": "LG TV", "link": "https://www.lge.co.kr/a", "sale_price": 100}
+    second = dict(first, link="https://www.lge.co.kr/b", sale_price=90)
+    with HistoryStore(str(tmp_path / "history.db")) as history:
+        history.record_run([first, second])
+        history.record_run([dict(first, sale_price=80), second])
+        series = history.price_series("OLED42C4ENA")
+        daily = history.price_series("OLED42C4ENA", bucket="day")
+    assert [(row["link"], row["sale_price"]) for row in series] == [
+        ("https://www.lge.co.kr/a", 100), ("https://www.lge.co.kr/a", 80),
+        ("https://www.lge.co.kr/b", 90), ("https://www.lge.co.kr/b", 90),
+    ]
+    assert [(row["link"], row["sale_price"]) for row in daily] == [
+        ("https://www.lge.co.kr/a", 80), ("https://www.lge.co.kr/b", 90)
+    ]
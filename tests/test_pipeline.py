@@ -0,0 +1,23 @@
+"""Change detection in the alert pipeline."""
+import pytest
+from pipeline import AlertPipeline
+from state_store import ProductStateStore, diff_count
+from subscribers import SubscriberRegistry
+from telegram_sender import TelegramSender
+
+PRODUCT = {"model": "OLED42C4ENA", "name": "LG TV", "link": "https://www.lge.co.kr/a", "sale_price": 100, "stock": 5}
+
+
+@pytest.mark.parametrize("notify_mode", ["changes", "all"])
+def test_diff_is_kept_in_every_notify_mode(tmp_path, notify_mode):
+    state_store = ProductStateStore(str(tmp_path / "state.json"))
+    state_store.update([PRODUCT])
+    registry = SubscriberRegistry(str(tmp_path / "subscribers.json"))
+    sender = TelegramSender()
+    # Nothing is sent: only the diff is checked
+    sender.bot_token = ""
+    pipeline = AlertPipeline(sender, registry, state_store, notify_mode).start()
+    pipeline.consume([dict(PRODUCT, sale_price=90)])
+    pipeline.finish()
+    assert diff_count(pipeline.diff) == 1
+    assert len(pipeline.diff["price_dropped"]) == 1
@@ -0,0 +1,20 @@
+"""Completeness checks on plain page HTML."""
+from replay import unloaded_content
+
+CARDS = '<ul><li class="product-item"><a href="/a">A</a><p>할인 후 판매가 1,000원</p></li></ul>'
+
+
+def test_full_list_has_nothing_to_load():
+    assert unloaded_content(CARDS, "더보기") is None
+
+
+def test_load_more_button_and_pagination():
+    assert unloaded_content(CARDS + '<button type="button">상품 더보기</button>', "더보기") == '"더보기" button'
+    assert unloaded_content(CARDS + '<button disabled>더보기</button>', "더보기") is None
+    assert unloaded_content(CARDS + '<a rel="next" href="?page=2">2</a>', "더보기") == "pagination"
+
+
+def test_unrendered_tabs():
+    tabs = '<div role="tab">TV</div><div role="tab">냉장고</div>'
+    html = tabs + '<div role="tabpanel"><ul><li>TV</li></ul></div><div role="tabpanel"></div>'
+    assert unloaded_content(html) == "1 of 2 tabs not rendered"
@@ -0,0 +1,221 @@
+"""Watch mode: refresh only the watched products between full crawls.
+
+A full crawl locates every product; the ones some subscriber watches are
+then re-sampled every WATCH_INTERVAL seconds in one kept-open page until
+the next full crawl is due. Samples come from the page's own product API
+(re-fetched inside the page, with its cookies) when the products were
+served by one, else from re-reading just the watched cards' DOM nodes.
+Only samples that changed are diffed, alerted and written.
+"""
+import logging
+import time
+from typing import Dict, List, Optional
+from playwright.sync_api import BrowserContext, Page
+from browser_manager import BrowserManager
+from card_parser import parse_card, product_key
+from card_selectors import PRODUCT_SELECTORS, TABPANEL_ITEM_SELECTOR, card_selector
+from config import LG_TIMEDEAL_URL, WATCH_INTERVAL, WATCH_FULL_INTERVAL
+from crawler import READ_CARD_JS, LGTimedealCrawler
+from metrics import PhaseTimer
+from network_capture import ResponseCapture, find_product_lists, products_from_payloads
+from pipeline import AlertPipeline
+from scheduler import run_crawl_and_send
+from state_store import ProductStateStore, content_hash
+from subscribers import SubscriberRegistry
+from telegram_sender import TelegramSender
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Reads the cards holding each of the given product links, innermost first
+# (an empty list for links not on the page). cardSelectors are the crawler's
+# card selectors with their nesting rule applied, so a link can sit in
+# several matches (e.g. a broad selector's card and its parts). Card nodes
+# are cached on window and looked up again once detached.
+READ_WATCHED_CARDS_JS = """
+([links, cardSelectors]) => {
+    const readCard = %s;
+    const cache = window.__lgWatchedCards || (window.__lgWatchedCards = new Map());
+    const findCards = (link) => {
+        for (const a of document.querySelectorAll('a[href]')) {
+            if (a.href !== link) continue;
+            for (const selector of cardSelectors) {
+                const cards = [];
+                for (let card = a.closest(selector); card; card = card.parentElement && card.parentElement.closest(selector)) {
+                    cards.push(card);
+                }
+                if (cards.length) return cards;
+            }
+        }
+        return [];
+    };
+    return links.map((link) => {
+        let cards = cache.get(link);
+        if (!cards || !cards.every((card) => card.isConnected)) {
+            cards = findCards(link);
+            if (cards.length) cache.set(link, cards);
+        }
+        return cards.map(readCard);
+    });
+}
+""" % READ_CARD_JS
+
+# Card selectors as the crawler applies them, then the tab panel fallback
+WATCHED_CARD_SELECTORS = [card_selector(selector) for selector in PRODUCT_SELECTORS] + [TABPANEL_ITEM_SELECTOR]
+
+# Re-fetches product API responses from inside the page (null for failures)
+FETCH_JSON_JS = """
+async (urls) => Promise.all(urls.map((url) =>
+    fetch(url, {credentials: 'include', cache: 'no-store'})
+        .then((response) => response.ok ? response.json() : null)
+        .catch(() => null)
+))
+"""
+
+
+class ProductWatcher:
+    """Sample a few products of one page at a short interval."""
+
+    def __init__(self, registry: SubscriberRegistry, sender: Optional[TelegramSender] = None,
+                 url: str = LG_TIMEDEAL_URL, interval: float = WATCH_INTERVAL):
+        self.registry = registry
+        self.sender = sender or TelegramSender()
+        self.url = url
+        self.interval = interval
+        self.crawler = LGTimedealCrawler(url=url)
+        self.timer = PhaseTimer()
+        # Product key -> last sampled product
+        self.watched: Dict[str, Dict] = {}
+        # "api" or "dom", chosen on the first sample
+        self.source: Optional[str] = None
+        self.api_urls: List[str] = []
+
+    def select(self, products: List[Dict]) -> Dict[str, Dict]:
+        """Products of this page that any subscriber watches, by product key."""
+        return {
+            product_key(product): product
+            for product in products
+            if product.get("source_url", self.url) == self.url and self.registry.chats_for(product)
+        }
+
+    def watch(self, context: BrowserContext, products: List[Dict], duration: float) -> int:
+        """Sample the watched products for duration seconds; returns the number of changes."""
+        self.watched = self.select(products)
+        self.timer = PhaseTimer()
+        self.source = None
+        if not self.watched:
+            logger.info("No watched products on the page, nothing to refresh")
+            return 0
+
+        page = context.new_page()
+        capture = ResponseCapture()
+        capture.attach(page)
+        state_store = ProductStateStore()
+        changes = 0
+        deadline = time.monotonic() + duration
+        try:
+            with self.timer.phase("load"):
+                self.crawler.load_page(page)
+            self.api_urls = [
+                payload["url"] for payload in capture.payloads()
+                if any(find_product_lists(payload["data"]))
+            ]
+            logger.info(f"Watching {len(self.watched)} products every {self.interval:g}s "
+                        f"for {duration:.0f}s")
+
+            while time.monotonic() < deadline:
+                started = time.monotonic()
+                with self.timer.phase("sample"):
+                    samples = self.sample(page)
+                self.timer.count("samples")
+                changes += self.handle(samples, state_store)
+                time.sleep(max(0.0, min(self.interval - (time.monotonic() - started),
+                                        deadline - time.monotonic())))
+        finally:
+            page.close()
+            samples = self.timer.counters.get("samples", 0)
+            if samples:
+                logger.info(f"Watch: {samples} samples from {self.source}, "
+                            f"{self.timer.timings['sample'] / samples * 1000:.0f}ms per sample, "
+                            f"{changes} changes")
+        return changes
+
+    def sample(self, page: Page) -> List[Dict]:
+        """Current state of the watched products still found on the page."""
+        if self.source != "dom" and self.api_urls:
+            samples = self._sample_api(page)
+            if samples or self.source == "api":
+                self.source = "api"
+                return samples
+            logger.info("Product API has none of the watched products, reading cards instead")
+        self.source = "dom"
+        return self._sample_dom(page)
+
+    def _sample_api(self, page: Page) -> List[Dict]:
+        results = page.evaluate(FETCH_JSON_JS, self.api_urls)
+        payloads = [{"url": url, "data": data} for url, data in zip(self.api_urls, results) if data]
+        return [product for product in products_from_payloads(payloads) if product_key(product) in self.watched]
+
+    def _sample_dom(self, page: Page) -> List[Dict]:
+        links = [product["link"] for product in self.watched.values() if product.get("link")]
+        results = page.evaluate(READ_WATCHED_CARDS_JS, [links, WATCHED_CARD_SELECTORS])
+        samples = []
+        for cards in results:
+            products = [product for product in map(parse_card, cards)
+                        if product and product_key(product) in self.watched]
+            # Prefer the innermost match that is a whole card, with its price
+            priced = [product for product in products if product.get('sale_price')]
+            if priced or products:
+                samples.append((priced or products)[0])
+        return samples
+
+    def handle(self, samples: List[Dict], state_store: ProductStateStore) -> int:
+        """Alert on and record the samples that changed since the last one.
+
+        Samples are left out of the price history: a run there holds every
+        product of the page, and the full crawls between samples record them.
+        """
+        changed = [
+            product for product in samples
+            if content_hash(product) != content_hash(self.watched[product_key(product)])
+        ]
+        if not changed:
+            return 0
+
+        for product in changed:
+            self.watched[product_key(product)] = product
+        pipeline = AlertPipeline(self.sender, self.registry, state_store).start()
+        pipeline.consume(changed)
+        # A sample is never complete: unsampled products are not removed
+        pipeline.finish(complete=False)
+        if pipeline.queued:
+            state_store.update(changed, prune=False)
+        return len(changed)
+
+
+def run_watch(full_interval: float = WATCH_FULL_INTERVAL, interval: float = WATCH_INTERVAL):
+    """Alternate full crawls with watching the priority products until interrupted."""
+    browser_manager = BrowserManager()
+    registry = SubscriberRegistry()
+    watcher = ProductWatcher(registry, interval=interval)
+    try:
+        while True:
+            started = time.monotonic()
+            run_crawl_and_send(browser_manager, registry)
+            products = watcher.crawler.load_products()
+            remaining = full_interval - (time.monotonic() - started)
+            if remaining > 0:
+                try:
+                    browser_manager.run(lambda context: watcher.watch(context, products, remaining))
+                except Exception as e:
+                    logger.error(f"Watch failed, waiting for the next full crawl: {e}", exc_info=True)
+            # Also when nothing was watched, wait for the next full crawl
+            time.sleep(max(0.0, full_interval - (time.monotonic() - started)))
+    except KeyboardInterrupt:
+        logger.info("Watch stopped")
+    finally:
+        browser_manager.close()
+
+
+if __name__ == "__main__":
+    run_watch()
@@ -0,0 +1,75 @@
+"""Watchlist matching of product names and models against many code fragments.
+
+WatchlistMatcher compiles the watch codes into an Aho-Corasick automaton
+once, then finds every code contained in a product's name or model in a
+single pass over the text, however many codes are watched.
+"""
+from typing import Dict, Iterable, List, Tuple
+
+# Joins name and model so no code matches across the two
+FIELD_SEPARATOR = "\n"
+
+
+class WatchlistMatcher:
+    """Find which watch codes occur in a product's name or model (case-insensitive)."""
+
+    def __init__(self, codes: Iterable[str]):
+        # Codes are kept in watchlist order, upper-cased and without duplicates
+        self.codes: List[str] = list(dict.fromkeys(
+            code.strip().upper() for code in codes if code.strip()
+        ))
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[int, ...]] = [()]
+        self._build()
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def _build(self):
+        # Trie of all codes; each terminal state outputs its code's index
+        for index, code in enumerate(self.codes):
+            state = 0
+            for char in code:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                state = next_state
+            self._out[state] += (index,)
+
+        # Breadth-first failure links; outputs are merged along them so a
+        # state reports every code ending there, not just the longest
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for char, next_state in self._goto[state].items():
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._out[next_state] += self._out[self._fail[next_state]]
+                queue.append(next_state)
+
+    def find(self, text: str) -> List[str]:
+        """Return the codes occurring in text, in watchlist order."""
+        goto, fail, out = self._goto, self._fail, self._out
+        matched = set()
+        state = 0
+        for char in text.upper():
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state]:
+                matched.update(out[state])
+        return [self.codes[index] for index in sorted(matched)]
+
+    def match_product(self, product: Dict) -> List[str]:
+        """Return the codes occurring in the product's name or model."""
+        return self.find(f"{product.get('name') or ''}{FIELD_SEPARATOR}{product.get('model') or ''}")
+
+    def matches(self, product: Dict) -> bool:
+        """Check if any code occurs in the product's name or model."""
+        return bool(self.match_product(product))
@@ -0,0 +1,284 @@
+"""Supervised crawl worker processes for the scheduler.
+
+With WORKER_PROCESS=true each scheduled run happens in a child process
+instead of the scheduler process, so Chromium driver state, leaked handles
+and memory growth die with the child. The child keeps a warm browser and
+serves up to WORKER_MAX_RUNS runs, then is replaced; its replacement is
+started (and its browser launched) right away, between runs, so a run never
+waits for process start-up. A child whose process tree (driver and browser
+included) ends a run above WORKER_MAX_RSS_MB is replaced too. A run that
+exceeds WORKER_TIMEOUT seconds or half again the memory cap is killed
+together with its Chromium processes, and Chromium processes orphaned by
+any dead worker are reaped.
+"""
+import logging
+import multiprocessing
+import os
+import shutil
+import signal
+import tempfile
+import time
+from multiprocessing.connection import Connection
+from typing import List, Optional
+from config import WORKER_MAX_RUNS, WORKER_TIMEOUT, WORKER_MAX_RSS_MB
+
+try:
+    import psutil
+except ImportError:  # Memory caps and orphan reaping are skipped without psutil
+    psutil = None
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Chromium launched by Playwright runs with a temporary profile like this
+PROFILE_MARKER = "playwright_chromiumdev_profile-"
+# Seconds between checks of a running child
+POLL_SECONDS = 0.5
+# Profiles younger than this may belong to a browser that is still launching
+STALE_PROFILE_SECONDS = 300
+
+
+def _worker_main(conn: Connection):
+    """Child process: serve "run" requests on conn until "stop"."""
+    # Ctrl+C reaches the whole process group; the supervisor stops workers itself
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    from browser_manager import BrowserManager
+    from scheduler import run_crawl_and_send
+    from subscribers import SubscriberRegistry
+
+    browser_manager = BrowserManager()
+    registry = SubscriberRegistry()
+    try:
+        # Launch the browser now, before the first run is requested
+        browser_manager.run(lambda context: None)
+    except Exception as e:
+        logger.warning(f"Failed to warm up the browser: {e}")
+    conn.send({"ready": True})
+
+    try:
+        while True:
+            command = conn.recv()
+            if command == "stop":
+                break
+            conn.send({"changed": run_crawl_and_send(browser_manager, registry)})
+    except EOFError:
+        pass
+    finally:
+        browser_manager.close()
+
+
+def process_tree(pid: int) -> List["psutil.Process"]:
+    """A process and all its descendants (empty if it is gone)."""
+    try:
+        parent = psutil.Process(pid)
+        return [parent] + parent.children(recursive=True)
+    except psutil.Error:
+        return []
+
+
+def tree_rss_mb(pid: int) -> Optional[float]:
+    """Resident memory of a process and its descendants, in MB."""
+    if psutil is None:
+        return None
+    total = 0
+    for process in process_tree(pid):
+        try:
+            total += process.memory_info().rss
+        except psutil.Error:
+            continue
+    return total / (1024 * 1024)
+
+
+def _profile_dirs(processes: List["psutil.Process"]) -> List[str]:
+    dirs = set()
+    for process in processes:
+        try:
+            cmdline = process.cmdline()
+        except psutil.Error:
+            continue
+        for arg in cmdline:
+            if arg.startswith("--user-data-dir=") and PROFILE_MARKER in arg:
+                dirs.add(arg.split("=", 1)[1])
+    return list(dirs)
+
+
+def kill_processes(processes: List["psutil.Process"]):
+    """Kill processes and remove the Chromium profiles they used."""
+    profile_dirs = _profile_dirs(processes)
+    for process in processes:
+        try:
+            process.kill()
+        except psutil.Error:
+            continue
+    psutil.wait_procs(processes, timeout=5)
+    for path in profile_dirs:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def reap_orphans() -> int:
+    """Kill Playwright Chromium processes left behind by dead workers; returns how many."""
+    if psutil is None:
+        return 0
+    orphans = []
+    for process in psutil.process_iter(["ppid", "cmdline", "uids"]):
+        try:
+            info = process.info
+            if info["uids"] is None or info["uids"].real != os.getuid():
+                continue
+            cmdline = " ".join(info["cmdline"] or [])
+            if PROFILE_MARKER not in cmdline:
+                continue
+            # Re-parented to init (or a subreaper) once its worker died
+            if info["ppid"] == 1 or not psutil.pid_exists(info["ppid"]):
+                orphans.append(process)
+        except psutil.Error:
+            continue
+    if orphans:
+        logger.warning(f"Killing {len(orphans)} orphaned Chromium processes")
+        kill_processes(orphans)
+    # Profiles of Chromium processes that were killed without cleanup
+    for path in _stale_profiles():
+        shutil.rmtree(path, ignore_errors=True)
+    return len(orphans)
+
+
+def _stale_profiles() -> List[str]:
+    """Playwright profile directories no running Chromium uses."""
+    tmp = tempfile.gettempdir()
+    try:
+        candidates = [os.path.join(tmp, name) for name in os.listdir(tmp) if name.startswith(PROFILE_MARKER)]
+    except OSError:
+        return []
+    in_use = set()
+    for process in psutil.process_iter(["cmdline"]):
+        try:
+            in_use.update(_profile_dirs([process]))
+        except psutil.Error:
+            continue
+    stale = []
+    for path in candidates:
+        try:
+            if path not in in_use and time.time() - os.path.getmtime(path) > STALE_PROFILE_SECONDS:
+                stale.append(path)
+        except OSError:
+            continue
+    return stale
+
+
+class CrawlSupervisor:
+    """Run crawls in a reused child process with a timeout and a memory cap."""
+
+    def __init__(self, max_runs: int = WORKER_MAX_RUNS, timeout: float = WORKER_TIMEOUT,
+                 max_rss_mb: int = WORKER_MAX_RSS_MB):
+        self.max_runs = max_runs
+        self.timeout = timeout
+        self.max_rss_mb = max_rss_mb
+        # spawn: a fresh interpreter, nothing inherited from the scheduler's threads
+        self._context = multiprocessing.get_context("spawn")
+        self._process: Optional[multiprocessing.Process] = None
+        self._conn: Optional[Connection] = None
+        self.run_count = 0
+        self.spawn_count = 0
+        if psutil is None:
+            logger.warning("psutil is not installed: no memory cap, Chromium orphans are not reaped")
+
+    def start(self) -> "CrawlSupervisor":
+        """Reap leftovers of earlier workers and start the first one."""
+        reap_orphans()
+        self._spawn()
+        return self
+
+    def run(self) -> Optional[bool]:
+        """Run run_crawl_and_send in the worker; None when it failed or was killed."""
+        if self._process is None or not self._process.is_alive():
+            self._discard("worker is not running")
+            self._spawn()
+            if self._process is None:
+                return None
+
+        self._conn.send("run")
+        self.run_count += 1
+        result = self._wait(self.timeout)
+        if result is None:
+            return None
+
+        rss = tree_rss_mb(self._process.pid)
+        if self.run_count >= self.max_runs:
+            self._replace(f"after {self.run_count} runs")
+        elif rss is not None and rss > self.max_rss_mb:
+            self._replace(f"at {rss:.0f} MB RSS (limit {self.max_rss_mb} MB)")
+        return result["changed"]
+
+    def close(self):
+        """Stop the worker."""
+        if self._process is not None:
+            self._stop()
+
+    def _wait(self, timeout: float) -> Optional[dict]:
+        """Wait for the worker's reply, killing it on timeout, crash or memory cap."""
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                if self._conn.poll(POLL_SECONDS):
+                    return self._conn.recv()
+            except (EOFError, OSError):
+                self._discard("worker crashed")
+                return None
+            if not self._process.is_alive():
+                self._discard(f"worker exited with code {self._process.exitcode}")
+                return None
+            if time.monotonic() > deadline:
+                self._discard(f"run exceeded {timeout:g}s")
+                return None
+            rss = tree_rss_mb(self._process.pid)
+            if rss is not None and rss > self.max_rss_mb * 1.5:
+                # Far over the cap: do not wait for the run to finish
+                self._discard(f"worker reached {rss:.0f} MB RSS")
+                return None
+
+    def _spawn(self):
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(target=_worker_main, args=(child_conn,),
+                                        name="crawl-worker", daemon=True)
+        process.start()
+        child_conn.close()
+        self._process = process
+        self._conn = parent_conn
+        self.run_count = 0
+        self.spawn_count += 1
+        logger.info(f"Started crawl worker pid {process.pid} (worker #{self.spawn_count})")
+        if self._wait(self.timeout) is None:
+            logger.error("Crawl worker failed to start")
+
+    def _replace(self, reason: str):
+        logger.info(f"Replacing crawl worker {reason}")
+        self._stop()
+        self._spawn()
+
+    def _stop(self):
+        """Ask the worker to exit, killing it if it does not."""
+        try:
+            self._conn.send("stop")
+        except (OSError, ValueError):
+            pass
+        self._process.join(30)
+        if self._process.is_alive():
+            self._discard("worker did not stop")
+            return
+        self._conn.close()
+        self._process = None
+        reap_orphans()
+
+    def _discard(self, reason: str):
+        """Kill the worker and everything it started."""
+        if self._process is None:
+            return
+        logger.error(f"Killing crawl worker pid {self._process.pid}: {reason}")
+        if psutil is not None:
+            kill_processes(process_tree(self._process.pid))
+        else:
+            self._process.kill()
+        self._process.join(5)
+        self._conn.close()
+        self._process = None
+        reap_orphans()